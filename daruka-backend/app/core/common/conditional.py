@@ -0,0 +1,67 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import Request, Response, status
+
+
+def make_etag(version: Sequence[Any], variant: str = "") -> str:
+    """Weak ETag from a cheap version tuple plus the response variant."""
+    raw = "|".join(str(part) for part in version) + "#" + variant
+    return 'W/"%s"' % hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _last_modified(version: Sequence[Any]) -> Optional[datetime]:
+    stamps = [part for part in version if isinstance(part, datetime)]
+    if not stamps:
+        return None
+    # HTTP dates have second precision
+    return max(stamps).astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _opaque(tag: str) -> str:
+    # weak comparison: W/"x" and "x" are the same validator
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _matches(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        candidates = {_opaque(tag.strip()) for tag in if_none_match.split(",")}
+        return "*" in candidates or _opaque(etag) in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def check_not_modified(
+    request: Request, response: Response, version: Optional[Sequence[Any]]
+) -> Optional[Response]:
+    """
+    Compare the request validators against `version` (e.g. updated_at, or
+    row count + max(updated_at)) without touching the full rows.
+    Returns a ready 304 when the client copy is current; otherwise sets
+    ETag/Last-Modified on `response` and returns None.
+    """
+    if version is None:
+        return None
+
+    etag = make_etag(version, request.url.query)
+    last_modified = _last_modified(version)
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _matches(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
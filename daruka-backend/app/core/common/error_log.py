@@ -0,0 +1,13 @@
+import logging
+
+
+def log_failure(logger: logging.Logger, action: str, error: Exception) -> None:
+    """
+    Log an error a handler turns into a response: expected ones (services
+    raise ValueError, e.g. "not found") on one line, anything else with its
+    traceback.
+    """
+    if isinstance(error, ValueError):
+        logger.info("%s failed: %s", action, error)
+    else:
+        logger.error("%s failed", action, exc_info=error)
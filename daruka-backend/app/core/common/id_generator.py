@@ -1,4 +1,5 @@
 import random
+import secrets
 import string
 
 
@@ -24,3 +25,14 @@ def generate_project_id() -> str:
     """Generate a unique 6-character Project ID (starts with P)."""
     chars = string.ascii_uppercase + string.digits
     return "P" + "".join(random.choices(chars, k=5))
+
+
+def generate_org_id() -> str:
+    """Generate a unique 6-character Organization ID (starts with O)."""
+    chars = string.ascii_uppercase + string.digits
+    return "O" + "".join(random.choices(chars, k=5))
+
+
+def generate_token_id() -> str:
+    """Generate an unguessable 32-character hex ID (refresh tokens and their families)."""
+    return secrets.token_hex(16)
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (function, file, first line) from the outermost frame to the innermost
+Stack = Tuple[Tuple[str, str, int], ...]
+
+
+def thread_stack(thread_id: int) -> Optional[Stack]:
+    """Current Python stack of another thread (None if it has no frame)."""
+    frame = sys._current_frames().get(thread_id)
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(stack)) if stack else None
+
+
+class Profile:
+    """Stack samples with weights, exported in speedscope's sampled format."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.frames: List[Tuple[str, str, int]] = []
+        self.frame_index: Dict[Tuple[str, str, int], int] = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+
+    def add(self, stack: Stack, weight_ms: float) -> None:
+        sample = []
+        for frame in stack:
+            index = self.frame_index.get(frame)
+            if index is None:
+                index = self.frame_index[frame] = len(self.frames)
+                self.frames.append(frame)
+            sample.append(index)
+        self.samples.append(sample)
+        self.weights.append(weight_ms)
+
+    def hottest(self, count: int = 3) -> List[Tuple[str, float]]:
+        """Innermost frames with the most sampled time, for log lines."""
+        totals: Counter = Counter()
+        for sample, weight in zip(self.samples, self.weights):
+            if sample:
+                name, file, line = self.frames[sample[-1]]
+                totals[f"{name} ({os.path.basename(file)}:{line})"] += weight
+        return totals.most_common(count)
+
+    def to_speedscope(self) -> dict:
+        """https://www.speedscope.app/file-format-schema.json"""
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "daruka-backend",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [
+                    {"name": name, "file": file, "line": line}
+                    for name, file, line in self.frames
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(self.weights),
+                    "samples": self.samples,
+                    "weights": self.weights,
+                }
+            ],
+        }
+
+
+def profile_thread(thread_id: int, seconds: float, interval_ms: float) -> Profile:
+    """
+    Sample `thread_id` every `interval_ms` for `seconds` (blocking; run it
+    in another thread). Time the event loop spends waiting shows up under
+    the selector's select().
+    """
+    profile = Profile(f"pid {os.getpid()}, {seconds:g}s every {interval_ms:g}ms")
+    interval = interval_ms / 1000
+    deadline = time.perf_counter() + seconds
+    last = time.perf_counter()
+    while last < deadline:
+        time.sleep(interval)
+        stack = thread_stack(thread_id)
+        now = time.perf_counter()
+        if stack:
+            profile.add(stack, (now - last) * 1000)
+        last = now
+    return profile
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a timer; lag means a
+    callback held the loop (blocking I/O, CPU-heavy code).
+    """
+
+    def __init__(self, interval_ms: int, warn_ms: int, window: int = 600):
+        self.interval = interval_ms / 1000
+        self.warn_ms = warn_ms
+        self.lags: "deque[float]" = deque(maxlen=window)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - started - self.interval) * 1000)
+            self.lags.append(lag_ms)
+            if lag_ms >= self.warn_ms:
+                logger.warning("Event loop blocked for %.0fms", lag_ms)
+
+    def stats(self) -> dict:
+        lags = sorted(self.lags)
+        if not lags:
+            return {"samples": 0}
+        return {
+            "samples": len(lags),
+            "interval_ms": self.interval * 1000,
+            "mean_ms": round(statistics.fmean(lags), 2),
+            "p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 2),
+            "max_ms": round(lags[-1], 2),
+        }
+
+
+class _InFlight:
+    __slots__ = ("request_id", "method", "path", "started", "profile")
+
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.profile: Optional[Profile] = None
+
+
+class SlowRequestSampler:
+    """
+    Once a request has run longer than `threshold_ms`, samples what the
+    event loop thread is executing until it finishes: the request's own
+    code, another task holding the loop, or idle waiting on I/O. The
+    stacks of the last `keep` slow requests are kept for the admin routes.
+    """
+
+    def __init__(self, threshold_ms: int, interval_ms: float, keep: int):
+        self.threshold = threshold_ms / 1000
+        self.interval_ms = interval_ms
+        self.in_flight: Dict[asyncio.Task, _InFlight] = {}
+        self.recent: "deque[dict]" = deque(maxlen=keep)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="slow-request-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def begin(self, request_id: str, method: str, path: str) -> None:
+        self.in_flight[asyncio.current_task()] = _InFlight(request_id, method, path)
+
+    def end(self) -> None:
+        request = self.in_flight.pop(asyncio.current_task(), None)
+        if request is None or request.profile is None:
+            return
+        duration_ms = (time.perf_counter() - request.started) * 1000
+        self.recent.append(
+            {
+                "request_id": request.request_id,
+                "method": request.method,
+                "path": request.path,
+                "duration_ms": round(duration_ms, 1),
+                "profile": request.profile,
+            }
+        )
+        logger.warning(
+            "Slow request %s %s %.0fms, event loop was in: %s",
+            request.method,
+            request.path,
+            duration_ms,
+            "; ".join(f"{frame} {ms:.0f}ms" for frame, ms in request.profile.hottest()),
+        )
+
+    def find(self, request_id: str) -> Optional[dict]:
+        for entry in self.recent:
+            if entry["request_id"] == request_id:
+                return entry
+        return None
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_ms / 1000):
+            now = time.perf_counter()
+            weight_ms, last = (now - last) * 1000, now
+            # copied in one step: the loop thread adds and removes entries
+            slow = [
+                (task, request)
+                for task, request in list(self.in_flight.items())
+                if now - request.started >= self.threshold
+            ]
+            if not slow:
+                continue
+            stack = thread_stack(self._loop_thread) or ()
+            running = asyncio.current_task(self._loop)
+            for task, request in slow:
+                if request.profile is None:
+                    request.profile = Profile(
+                        f"{request.method} {request.path} ({request.request_id})"
+                    )
+                if running is task:
+                    label = "[this request]"
+                elif running is not None:
+                    label = f"[other task: {running.get_name()}]"
+                else:
+                    label = "[event loop]"
+                request.profile.add(((label, "", 0),) + stack, weight_ms)
@@ -0,0 +1,83 @@
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+
+
+def parse_fields(
+    raw: Optional[str],
+    allowed: Iterable[str],
+    always: Iterable[str] = (),
+    what: str = "fields",
+) -> Optional[List[str]]:
+    """
+    Parse a `?fields=a,b,c` projection against a whitelist.
+    Returns None when no projection was asked for (i.e. full rows).
+    """
+    if not raw:
+        return None
+
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = sorted(set(fields) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown {what}: {', '.join(unknown)}")
+
+    # keep order, drop duplicates, make sure identifying columns are present
+    return list(dict.fromkeys([*always, *fields]))
+
+
+def fields_query(
+    allowed: Iterable[str], always: Iterable[str] = (), alias: str = "fields"
+) -> Callable:
+    """Dependency factory for a whitelisted comma separated query parameter."""
+    allowed = tuple(allowed)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            alias=alias,
+            description=f"Comma separated subset of: {', '.join(allowed)}",
+        ),
+    ) -> Optional[List[str]]:
+        try:
+            return parse_fields(fields, allowed, always, what=alias)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return dependency
+
+
+def parse_sort(raw: Optional[str], allowed: Iterable[str]) -> List[Tuple[str, bool]]:
+    """
+    Parse a `?sort=-area,name` spec against a whitelist into
+    [(field, descending)]; a leading "-" sorts that field descending.
+    """
+    if not raw:
+        return []
+
+    order = []
+    for part in (p.strip() for p in raw.split(",")):
+        if not part:
+            continue
+        name = part.lstrip("-+")
+        if name not in allowed:
+            raise ValueError(f"Unknown sort field: {name}")
+        order.append((name, part.startswith("-")))
+    return order
+
+
+def sort_query(allowed: Iterable[str], default: Optional[str] = None) -> Callable:
+    """Dependency factory for a whitelisted `?sort=` parameter."""
+    allowed = tuple(allowed)
+
+    def dependency(
+        sort: Optional[str] = Query(
+            default,
+            description=f"Comma separated, '-' for descending: {', '.join(allowed)}",
+        ),
+    ) -> List[Tuple[str, bool]]:
+        try:
+            return parse_sort(sort, allowed)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return dependency
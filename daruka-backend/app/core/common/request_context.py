@@ -0,0 +1,100 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+from fastapi.routing import APIRoute
+
+from app.core.common.tracing import SERVER, current_span, span
+
+
+class RequestContext:
+    """Id and timing breakdown of the request being handled."""
+
+    def __init__(self, request_id: str, trace_sql: bool = False):
+        self.request_id = request_id
+        self.trace_sql = trace_sql
+        self.started = time.perf_counter()
+        # phase -> milliseconds, e.g. {"auth": 0.4, "db": 12.1}
+        self.timings: Dict[str, float] = {}
+        self.db_statements = 0
+        self.handler_done: Optional[float] = None
+
+    def add(self, phase: str, ms: float) -> None:
+        self.timings[phase] = self.timings.get(phase, 0.0) + ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+
+current_request: ContextVar[Optional[RequestContext]] = ContextVar(
+    "current_request", default=None
+)
+
+
+def request_id() -> Optional[str]:
+    context = current_request.get()
+    return context.request_id if context else None
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Add the time spent in the block to the current request's `phase` (and
+    trace it as a span of that name).
+    """
+    context = current_request.get()
+    if context is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        with span(phase):
+            yield
+    finally:
+        context.add(phase, (time.perf_counter() - started) * 1000)
+
+
+class TimedRoute(APIRoute):
+    """
+    Traces the endpoint as the router-layer span and names the request's
+    root span after the route. Once the endpoint returns, commits the
+    request's unit of work (see db_session), or rolls it back if the
+    endpoint returned a failed ApiResponse, then marks the time, so the
+    time until the response starts (response model validation, encoding,
+    rendering) is reported as "serialize" by RequestLoggingMiddleware.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # postgres -> sql_trace imports this module
+        from app.integration.db.postgres import finish_request
+
+        # include_router() rebuilds routes from their (wrapped) endpoints
+        endpoint = getattr(endpoint, "route_endpoint", endpoint)
+        name = f"{endpoint.__module__.rsplit('.', 1)[-1]}.{endpoint.__name__}"
+        methods = ",".join(sorted(kwargs.get("methods") or ["GET"]))
+
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kw):
+            root = current_span.get()
+            if root is not None and root.kind == SERVER:
+                root.name = f"{methods} {path}"
+                root.attributes["http.route"] = path
+            try:
+                with span(name):
+                    result = await endpoint(*args, **kw)
+                # controllers report caught errors as success=False; what
+                # was written before the failure must not be committed
+                failed = getattr(result, "success", None) is False
+                # commit and release the connection before serialization
+                with timed("commit"):
+                    await finish_request(failed)
+                return result
+            finally:
+                context = current_request.get()
+                if context is not None:
+                    context.handler_done = time.perf_counter()
+
+        timed_endpoint.route_endpoint = endpoint
+        super().__init__(path, timed_endpoint, **kwargs)
@@ -0,0 +1,213 @@
+import functools
+import inspect
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+_STATUS_ERROR = 2
+
+
+class Trace:
+    """Spans of one request, exported together when the root span ends."""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans: List["Span"] = []
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent_id: Optional[str] = None,
+        kind: int = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def child(self, name: str, kind: int = INTERNAL, **attributes) -> "Span":
+        return Span(self.trace, name, self.span_id, kind, attributes)
+
+    def fail(self, error: BaseException) -> None:
+        self.error = str(error) or type(error).__name__
+        self.attributes["exception.type"] = type(error).__name__
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self.trace.spans.append(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            span["status"] = {"code": _STATUS_ERROR, "message": self.error}
+        return span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[dict]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, kind: int = INTERNAL, **attributes):
+    """
+    Child span of the current one for the duration of the block. Outside a
+    traced request this does nothing and yields None.
+    """
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, kind, **attributes)
+    token = current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.fail(e)
+        raise
+    finally:
+        current_span.reset(token)
+        child.end()
+
+
+def traced(cls):
+    """
+    Class decorator: a span around every async staticmethod, named
+    `Class.method`. Costs one ContextVar lookup per call when not tracing.
+    """
+    for attr, member in list(vars(cls).items()):
+        if not isinstance(member, staticmethod):
+            continue
+        function = member.__func__
+        if not inspect.iscoroutinefunction(function):
+            continue
+        setattr(cls, attr, staticmethod(_traced(function, f"{cls.__name__}.{attr}")))
+    return cls
+
+
+def _traced(function, name: str):
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        if current_span.get() is None:
+            return await function(*args, **kwargs)
+        with span(name):
+            return await function(*args, **kwargs)
+
+    return wrapper
+
+
+class TraceExporter:
+    """
+    Writes finished traces as OTLP/JSON lines (one ExportTraceServiceRequest
+    per trace, the OpenTelemetry collector's file format) to stdout or a
+    file, from a background thread.
+    """
+
+    def __init__(self, target: str, service_name: str):
+        self.target = target
+        self.resource = {
+            "attributes": _otlp_attributes(
+                {"service.name": service_name, "process.pid": os.getpid()}
+            )
+        }
+        self.traces: "queue.SimpleQueue[Optional[Trace]]" = queue.SimpleQueue()
+        self.thread = threading.Thread(
+            target=self._run, name="trace-exporter", daemon=True
+        )
+        self.thread.start()
+
+    def export(self, trace: Trace) -> None:
+        self.traces.put(trace)
+
+    def shutdown(self) -> None:
+        self.traces.put(None)
+        self.thread.join()
+
+    def _line(self, trace: Trace) -> str:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": self.resource,
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "daruka"},
+                            "spans": [span.to_otlp() for span in trace.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        return json.dumps(request, separators=(",", ":")) + "\n"
+
+    def _run(self) -> None:
+        output = (
+            sys.stdout
+            if self.target == "stdout"
+            else open(self.target, "a", encoding="utf-8")
+        )
+        try:
+            while True:
+                trace = self.traces.get()
+                if trace is None:
+                    return
+                output.write(self._line(trace))
+                output.flush()
+        finally:
+            if output is not sys.stdout:
+                output.close()
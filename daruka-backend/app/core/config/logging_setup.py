@@ -0,0 +1,112 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.common.request_context import request_id
+from app.core.config.settings import Settings
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s"
+
+# attributes every LogRecord has; anything else was passed with `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "request_id"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _RequestIdFilter(logging.Filter):
+    # runs in the caller's thread, before the record is queued, so the
+    # request's context is still current
+    def filter(self, record: logging.LogRecord) -> bool:
+        current = request_id()
+        if current is not None and not hasattr(record, "request_id"):
+            record.request_id = current
+        return True
+
+
+class _NonBlockingHandler(QueueHandler):
+    """
+    Hands records to the listener thread. Unlike QueueHandler.prepare this
+    keeps the traceback apart from the message, so JSON output can put it
+    in its own field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(settings: Settings) -> None:
+    """
+    Route all logging (uvicorn's included) through a queue to stdout, so
+    request handlers never wait on I/O to log. Safe to call again.
+    """
+    global _listener
+    stop_logging()
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter(TEXT_FORMAT, defaults={"request_id": "-"})
+        )
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = _NonBlockingHandler(records)
+    handler.addFilter(_RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.log_level)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(records, output)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,257 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import BaseSettings, root_validator, validator
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+
+DEFAULT_JWT_SECRET = "supersecretkey123"
+
+# Presets selected with APP_ENV. They only change defaults: anything set in
+# the environment or .env still wins.
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "development": {},
+    "test": {
+        "db_pool_size": 2,
+        "db_max_overflow": 0,
+        "site_counter_reconcile_seconds": 0,
+        "site_tombstone_prune_seconds": 0,
+        "realtime_coalesce_ms": 0,
+        "rate_limit_per_minute": 6000,
+        "rate_limit_burst": 1000,
+    },
+    "production": {
+        # schema comes from `alembic upgrade head`, see serve.py
+        "db_auto_create": False,
+        # several workers: events and rate limits have to cross processes
+        "realtime_backend": "postgres",
+        "rate_limit_backend": "postgres",
+        "gzip_compress_level": 6,
+        "log_format": "json",
+    },
+}
+
+
+class Settings(BaseSettings):
+    """
+    Every tunable of the backend, read once from the environment and
+    `.env` (field name upper-cased, e.g. DB_POOL_SIZE).
+    """
+
+    app_env: str = "development"
+
+    # Database
+    database_url: Optional[str] = None
+    # statement-caching-hostile pooler (PgBouncer/Supavisor) in front of
+    # Postgres; None -> detected from a Supabase pooler host
+    db_pooler: Optional[bool] = None
+    # per process; None -> 5/10 behind the Supabase pooler, 10/20 direct
+    db_pool_size: Optional[int] = None
+    db_max_overflow: Optional[int] = None
+    db_pool_recycle: int = 280  # seconds
+    db_statement_timeout_ms: int = 15000
+    db_max_statements_per_request: int = 50  # 0 disables the limit
+    db_max_rows_per_request: int = 50000  # 0 disables the limit
+    # create missing tables on startup (development convenience)
+    db_auto_create: bool = True
+
+    # Auth
+    jwt_secret: str = DEFAULT_JWT_SECRET
+    access_token_expire_minutes: int = 15
+    refresh_token_expire_days: int = 7
+    # per-process user lookups by id/email (UserRepo); 0 disables. Other
+    # workers see profile changes after at most this long.
+    user_cache_ttl_seconds: float = 60
+    # unknown emails (failed sign-ins), kept short so a new signup is
+    # visible to every worker soon
+    user_cache_negative_ttl_seconds: float = 10
+    user_cache_size: int = 10_000
+    # how often each worker picks up sessions revoked by the others
+    revoked_sessions_sync_seconds: int = 5
+
+    # HTTP
+    cors_origin: str = "*"
+    gzip_minimum_size: int = 1024  # bytes
+    gzip_compress_level: int = 5
+    # "memory" (per process) or "postgres" (shared by all workers/nodes)
+    rate_limit_backend: str = "memory"
+    rate_limit_per_minute: float = 120
+    rate_limit_burst: int = 30
+    # keep under the DB pool size (pool_size + max_overflow) so excess
+    # requests are shed instead of queueing for a connection
+    route_max_concurrency: int = 20
+    rate_limit_max_keys: int = 100_000
+
+    # Realtime
+    realtime_backend: str = "memory"
+    realtime_max_pending: int = 256
+    realtime_coalesce_ms: int = 100
+
+    # Sites
+    site_counter_shards: int = 8
+    site_counter_reconcile_seconds: int = 3600  # 0 disables
+    # deleted sites stay visible to incremental sync this long; clients with
+    # an older cursor get a full sync
+    site_tombstone_retention_days: int = 30
+    site_tombstone_prune_seconds: int = 86400  # 0 disables
+    max_site_vertices: int = 1000
+    site_index_cache_size: int = 128  # projects per tenant
+    site_index_cache_tenants: int = 64
+    geometry_batch_size: int = 500
+    zonal_block_rows: int = 1024
+    zonal_chunk_size: int = 16
+
+    # Logging
+    log_level: str = "INFO"
+    log_format: str = "text"  # "json" for log shippers
+    # fraction of requests whose SQL statements are logged with durations
+    log_sql_sample_rate: float = 0.0
+    log_sql_max_length: int = 1000  # characters per logged statement
+    log_slow_request_ms: int = 1000  # slower requests are logged as warnings
+
+    # Tracing (OTLP/JSON lines; "none" installs nothing)
+    trace_exporter: str = "none"  # "none", "stdout" or "file"
+    trace_file: str = "traces.jsonl"
+    trace_sample_rate: float = 1.0  # of requests without a traceparent
+    trace_service_name: str = "daruka-backend"
+
+    # Profiling: admin routes under /api/v1/admin, loop lag monitor and
+    # slow request sampler (off by default)
+    profiling_enabled: bool = False
+    # comma-separated user ids allowed on the admin routes. Set by the
+    # operator: a user's role is theirs to pick (every signup owns its org)
+    admin_user_ids: str = ""
+    profile_max_seconds: int = 60
+    profile_interval_ms: float = 5
+    loop_lag_interval_ms: int = 100
+    loop_lag_warn_ms: int = 100
+    slow_request_profile_ms: int = 1000  # 0 disables the sampler
+    slow_request_profiles_kept: int = 20
+
+    # Process (serve.py)
+    host: str = "0.0.0.0"
+    port: int = 8000
+    web_concurrency: Optional[int] = None  # None -> CPU count
+    db_connection_budget: int = 60
+    forwarded_allow_ips: str = "127.0.0.1"
+    keep_alive_seconds: int = 5
+    graceful_shutdown_seconds: int = 30
+
+    class Config:
+        env_file = BASE_DIR / ".env"
+
+        @classmethod
+        def customise_sources(cls, init_settings, env_settings, file_secret_settings):
+            def profile_settings(settings: BaseSettings) -> Dict[str, Any]:
+                values = {**env_settings(settings), **init_settings(settings)}
+                app_env = values.get("app_env", "development")
+                if app_env not in PROFILES:
+                    raise ValueError(
+                        f"Unknown APP_ENV {app_env!r}, expected one of: "
+                        + ", ".join(PROFILES)
+                    )
+                return PROFILES[app_env]
+
+            return init_settings, env_settings, file_secret_settings, profile_settings
+
+    @validator("realtime_backend", "rate_limit_backend")
+    def _backend(cls, value):
+        if value not in ("memory", "postgres"):
+            raise ValueError("must be 'memory' or 'postgres'")
+        return value
+
+    @validator("log_format")
+    def _log_format(cls, value):
+        if value not in ("text", "json"):
+            raise ValueError("must be 'text' or 'json'")
+        return value
+
+    @validator("log_level")
+    def _log_level(cls, value):
+        value = value.upper()
+        if value not in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+            raise ValueError("must be a logging level name, e.g. INFO")
+        return value
+
+    @validator("trace_exporter")
+    def _trace_exporter(cls, value):
+        if value not in ("none", "stdout", "file"):
+            raise ValueError("must be 'none', 'stdout' or 'file'")
+        return value
+
+    @validator("log_sql_sample_rate", "trace_sample_rate")
+    def _sample_rate(cls, value):
+        if not 0 <= value <= 1:
+            raise ValueError("must be between 0 and 1")
+        return value
+
+    @validator("user_cache_ttl_seconds", "user_cache_negative_ttl_seconds")
+    def _non_negative(cls, value):
+        if value < 0:
+            raise ValueError("must be 0 or more")
+        return value
+
+    @validator("gzip_compress_level")
+    def _compress_level(cls, value):
+        if not 1 <= value <= 9:
+            raise ValueError("must be between 1 and 9")
+        return value
+
+    @validator(
+        "db_pool_recycle",
+        "site_counter_shards",
+        "site_tombstone_retention_days",
+        "site_index_cache_size",
+        "site_index_cache_tenants",
+        "user_cache_size",
+        "revoked_sessions_sync_seconds",
+        "geometry_batch_size",
+        "zonal_block_rows",
+        "zonal_chunk_size",
+        "db_connection_budget",
+        "log_sql_max_length",
+        "profile_max_seconds",
+        "profile_interval_ms",
+        "loop_lag_interval_ms",
+        "slow_request_profiles_kept",
+    )
+    def _positive(cls, value):
+        if value < 1:
+            raise ValueError("must be at least 1")
+        return value
+
+    @validator("max_site_vertices")
+    def _max_site_vertices(cls, value):
+        # outlines are simplified down to this; a ring can't have fewer
+        if value < 3:
+            raise ValueError("must be at least 3")
+        return value
+
+    @root_validator(skip_on_failure=True)
+    def _production_secrets(cls, values):
+        if (
+            values["app_env"] == "production"
+            and values["jwt_secret"] == DEFAULT_JWT_SECRET
+        ):
+            raise ValueError("JWT_SECRET must be set in production")
+        return values
+
+    @property
+    def cors_origins(self) -> List[str]:
+        if self.cors_origin == "*":
+            return ["*"]
+        return [origin.strip() for origin in self.cors_origin.split(",")]
+
+    @property
+    def admin_ids(self) -> Set[str]:
+        return {i.strip() for i in self.admin_user_ids.split(",") if i.strip()}
+
+
+@lru_cache()
+def get_settings() -> Settings:
+    """
+    Settings for this process, loaded on first use. Also the FastAPI
+    dependency: `settings: Settings = Depends(get_settings)`.
+    """
+    return Settings()
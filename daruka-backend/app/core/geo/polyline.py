@@ -0,0 +1,30 @@
+import numpy as np
+
+# enough 5-bit chunks for any delta of lat/lon scaled by 1e5 (< 2**30)
+_CHUNKS = 7
+_SHIFTS = 5 * np.arange(_CHUNKS, dtype=np.int64)
+
+
+def encode_polyline(latlon: np.ndarray, precision: int = 5) -> str:
+    """
+    Google encoded polyline for an (n, 2) array of (lat, lon), vectorized:
+    every value is split into 5-bit chunks at once instead of looping per
+    coordinate in Python.
+    """
+    latlon = np.asarray(latlon, dtype=np.float64).reshape(-1, 2)
+    if len(latlon) == 0:
+        return ""
+
+    scaled = np.round(latlon * 10**precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), np.int64)).ravel()
+    # zig-zag sign encoding
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    chunks = (values[:, None] >> _SHIFTS) & 0x1F
+    # a value needs at least one chunk, plus one per remaining non-zero 5 bits
+    used = np.maximum(((values[:, None] >> _SHIFTS) > 0).sum(axis=1), 1)
+    keep = np.arange(_CHUNKS) < used[:, None]
+    more = np.arange(_CHUNKS) < (used - 1)[:, None]
+
+    chars = (chunks | np.where(more, 0x20, 0)) + 63
+    return chars[keep].astype(np.uint8).tobytes().decode("ascii")
@@ -0,0 +1,140 @@
+import copy
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+# metres per degree of latitude; longitude degrees shrink with cos(latitude)
+M_PER_DEG = 111_320.0
+
+
+def area_m2(geometries) -> np.ndarray:
+    """
+    Approximate area in m² of lon/lat geometries (equirectangular projection
+    at each geometry's centroid; fine at parcel scale).
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    lat = shapely.get_y(shapely.centroid(geometries))
+    area = shapely.area(geometries) * M_PER_DEG**2 * np.cos(np.radians(lat))
+    return np.nan_to_num(area)
+
+
+class SiteIndex:
+    """
+    STRtree over a project's site outlines. Sites written after the tree was
+    built are masked out of it and kept in a small side list, so the index
+    can follow writes without a rebuild until that list grows (`stale`).
+    """
+
+    # rebuild at least this often, and once this share of sites changed
+    MAX_AGE_SECONDS = 300
+    MAX_PENDING_RATIO = 0.1
+
+    def __init__(
+        self, ids: Sequence[str], geometries: Sequence[bytes], version, cursor
+    ):
+        self.ids = np.asarray(ids, dtype=object)
+        self.geoms = shapely.from_wkb(np.asarray(geometries, dtype=object))
+        self.tree = shapely.STRtree(self.geoms)
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.positions = {site_id: i for i, site_id in enumerate(ids)}
+        # site_id -> outline written since the tree was built
+        self.pending: Dict[str, shapely.Geometry] = {}
+        self.version = version
+        self.cursor = cursor
+        self.built_at = time.monotonic()
+
+    @property
+    def stale(self) -> bool:
+        too_many = len(self.pending) > max(64, len(self.ids) * self.MAX_PENDING_RATIO)
+        return too_many or time.monotonic() - self.built_at > self.MAX_AGE_SECONDS
+
+    def copy(self) -> "SiteIndex":
+        """Shares the (read-only) tree; the mask and side list are its own"""
+        other = copy.copy(self)
+        other.alive = self.alive.copy()
+        other.pending = dict(self.pending)
+        return other
+
+    def apply(
+        self,
+        changed: Iterable[Tuple[str, Optional[bytes]]],
+        deleted: Iterable[str],
+        version,
+        cursor,
+    ) -> None:
+        """Fold in sites written (id, wkb) or deleted since `self.cursor`"""
+        changed = list(changed)
+        for site_id in [*deleted, *(site_id for site_id, _ in changed)]:
+            position = self.positions.get(site_id)
+            if position is not None:
+                self.alive[position] = False
+            self.pending.pop(site_id, None)
+        for site_id, geometry in changed:
+            if geometry:
+                self.pending[site_id] = shapely.from_wkb(geometry)
+        self.version = version
+        self.cursor = cursor
+
+    def _live(self) -> Tuple[np.ndarray, np.ndarray]:
+        ids = np.concatenate(
+            [self.ids[self.alive], np.array(list(self.pending), dtype=object)]
+        )
+        geoms = np.concatenate(
+            [
+                self.geoms[self.alive],
+                np.array(list(self.pending.values()), dtype=object),
+            ]
+        )
+        return ids, geoms
+
+    def _report(self, ids, geoms, geometry) -> List[dict]:
+        overlap = area_m2(shapely.intersection(geoms, geometry))
+        return [
+            {
+                "site_id": site_id,
+                "relation": "overlaps" if area > 0 else "touches",
+                "overlap_area": round(float(area), 2),
+            }
+            for site_id, area in zip(ids, overlap)
+        ]
+
+    def conflicts(self, geometry: bytes, exclude_id: str = None) -> List[dict]:
+        """Sites intersecting one outline: a tree lookup plus the pending few"""
+        geometry = shapely.from_wkb(geometry)
+        hits = self.tree.query(geometry, predicate="intersects")
+        hits = hits[self.alive[hits]]
+        ids, geoms = self.ids[hits], self.geoms[hits]
+
+        if self.pending:
+            pending_ids = np.array(list(self.pending), dtype=object)
+            pending_geoms = np.array(list(self.pending.values()), dtype=object)
+            touching = shapely.intersects(pending_geoms, geometry)
+            ids = np.concatenate([ids, pending_ids[touching]])
+            geoms = np.concatenate([geoms, pending_geoms[touching]])
+
+        keep = ids != exclude_id
+        return self._report(ids[keep], geoms[keep], geometry)
+
+    def all_conflicts(self) -> List[dict]:
+        """Every intersecting pair of sites, from one bulk tree query"""
+        if self.pending or not self.alive.all():
+            ids, geoms = self._live()
+            tree = shapely.STRtree(geoms)
+        else:
+            ids, geoms, tree = self.ids, self.geoms, self.tree
+
+        left, right = tree.query(geoms, predicate="intersects")
+        pairs = left < right
+        left, right = left[pairs], right[pairs]
+
+        overlap = area_m2(shapely.intersection(geoms[left], geoms[right]))
+        return [
+            {
+                "site_ids": [ids[a], ids[b]],
+                "relation": "overlaps" if area > 0 else "touches",
+                "overlap_area": round(float(area), 2),
+            }
+            for a, b, area in zip(left.tolist(), right.tolist(), overlap)
+        ]
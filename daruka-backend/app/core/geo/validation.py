@@ -0,0 +1,108 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+from app.core.config.settings import get_settings
+
+
+class GeometryError(ValueError):
+    """Outline that can't be turned into a usable polygon."""
+
+
+def _dedupe(coords: np.ndarray) -> np.ndarray:
+    """Drop consecutive repeated vertices and an explicit closing vertex"""
+    keep = np.ones(len(coords), dtype=bool)
+    keep[1:] = np.any(coords[1:] != coords[:-1], axis=1)
+    coords = coords[keep]
+    if len(coords) > 1 and np.array_equal(coords[0], coords[-1]):
+        coords = coords[:-1]
+    return coords
+
+
+def _polygons(geometry):
+    for part in shapely.get_parts(geometry):
+        if part.geom_type == "Polygon":
+            yield part
+        elif part.geom_type in ("MultiPolygon", "GeometryCollection"):
+            yield from _polygons(part)
+
+
+def _simplify(polygon, max_vertices: int):
+    """
+    Simplify with a growing tolerance until the ring fits the cap. Past the
+    outline's own size a bigger tolerance removes nothing more (a ring stays
+    at least a triangle), so the search ends there whatever the cap.
+    """
+    minx, miny, maxx, maxy = polygon.bounds
+    size = max(maxx - minx, maxy - miny)
+    tolerance = size * 1e-5
+    while len(polygon.exterior.coords) - 1 > max_vertices and tolerance <= 2 * size:
+        polygon = shapely.simplify(polygon, tolerance, preserve_topology=True)
+        tolerance *= 2
+    return polygon
+
+
+def clean_outline(
+    coords: np.ndarray, max_vertices: Optional[int] = None
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Validate and repair an (n, 2) (lon, lat) outline; outlines with more than
+    max_vertices (MAX_SITE_VERTICES) are simplified.
+    Returns the cleaned ring (unclosed) and a list of the repairs made;
+    raises GeometryError when there is no polygon to be had.
+    """
+    max_vertices = max_vertices or get_settings().max_site_vertices
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if not np.isfinite(coords).all():
+        raise GeometryError("Site outline has non-numeric coordinates")
+    if (np.abs(coords[:, 0]) > 180).any() or (np.abs(coords[:, 1]) > 90).any():
+        raise GeometryError("Site outline is outside lat/lon bounds")
+
+    repairs = []
+    ring = _dedupe(coords)
+    closed = len(coords) > 1 and np.array_equal(coords[0], coords[-1])
+    if len(ring) < len(coords) - closed:
+        repairs.append("removed duplicate vertices")
+    if len(ring) < 3:
+        raise GeometryError("Site outline needs at least 3 distinct vertices")
+
+    polygon = shapely.Polygon(ring)
+    if not polygon.is_valid:
+        # e.g. a self-intersecting "bow tie" becomes two triangles; keep the
+        # largest piece, since a site has one outline
+        polygon = max(
+            _polygons(shapely.make_valid(polygon)), default=None, key=lambda p: p.area
+        )
+        if polygon is None or polygon.area == 0:
+            raise GeometryError("Site outline has no area")
+        repairs.append("repaired invalid polygon")
+    if polygon.interiors:
+        # the outline format has no holes
+        polygon = shapely.Polygon(polygon.exterior)
+        repairs.append("dropped holes")
+
+    if len(polygon.exterior.coords) - 1 > max_vertices:
+        polygon = _simplify(polygon, max_vertices)
+        repairs.append(f"simplified to {len(polygon.exterior.coords) - 1} vertices")
+
+    return np.asarray(polygon.exterior.coords)[:-1], repairs
+
+
+def needs_repair(
+    geometries: Sequence[bytes], max_vertices: Optional[int] = None
+) -> np.ndarray:
+    """
+    Vectorized check over many WKB outlines at once: True where
+    clean_outline would change (or reject) the stored geometry.
+    """
+    max_vertices = max_vertices or get_settings().max_site_vertices
+    geoms = shapely.from_wkb(np.asarray(geometries, dtype=object), on_invalid="ignore")
+    counts = shapely.get_num_coordinates(geoms)
+    return (
+        (shapely.get_type_id(geoms) != shapely.GeometryType.POLYGON)
+        | ~shapely.is_valid(geoms)
+        | (shapely.get_num_interior_rings(geoms) > 0)
+        | (counts - 1 > max_vertices)
+        | (shapely.get_num_coordinates(shapely.remove_repeated_points(geoms)) < counts)
+    )
@@ -0,0 +1,77 @@
+import struct
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Well-known binary for the handful of shapes a site outline can be.
+# Coordinates are (x, y) = (lon, lat) float64, as in WKB/GeoJSON.
+POINT, LINESTRING, POLYGON = 1, 2, 3
+
+_HEADER = struct.Struct("<BI")  # byte order (1 = little endian), type
+
+
+def points_to_array(points: Optional[List[Dict[str, float]]]) -> np.ndarray:
+    """[{"lat", "lon"}, ...] -> (n, 2) array of (lon, lat)"""
+    if not points:
+        return np.empty((0, 2))
+    return np.array([(p["lon"], p["lat"]) for p in points], dtype=np.float64)
+
+
+def array_to_points(coords: np.ndarray) -> List[Dict[str, float]]:
+    """(n, 2) array of (lon, lat) -> [{"lat", "lon"}, ...]"""
+    return [{"lat": lat, "lon": lon} for lon, lat in coords.tolist()]
+
+
+def encode(coords: np.ndarray) -> bytes:
+    """
+    Encode an (n, 2) coordinate array: one vertex is a Point, two a
+    LineString, three or more a Polygon (the ring is closed if it isn't).
+    """
+    coords = np.ascontiguousarray(coords, dtype="<f8").reshape(-1, 2)
+    if len(coords) == 0:
+        raise ValueError("Cannot encode an empty geometry")
+    if len(coords) == 1:
+        return _HEADER.pack(1, POINT) + coords.tobytes()
+    if len(coords) == 2:
+        return _HEADER.pack(1, LINESTRING) + struct.pack("<I", 2) + coords.tobytes()
+
+    if not np.array_equal(coords[0], coords[-1]):
+        coords = np.vstack([coords, coords[:1]])
+    return (
+        _HEADER.pack(1, POLYGON) + struct.pack("<II", 1, len(coords)) + coords.tobytes()
+    )
+
+
+def decode(data: bytes) -> np.ndarray:
+    """
+    Decode WKB written by `encode` (or any 2D Point/LineString/Polygon; only
+    a polygon's outer ring is returned, without the closing vertex).
+    """
+    data = bytes(data)
+    order = "<" if data[0] == 1 else ">"
+    (geometry_type,) = struct.unpack_from(order + "I", data, 1)
+    dtype = np.dtype(order + "f8")
+
+    if geometry_type == POINT:
+        offset, count = 5, 1
+    elif geometry_type == LINESTRING:
+        offset, (count,) = 9, struct.unpack_from(order + "I", data, 5)
+    elif geometry_type == POLYGON:
+        offset, (count,) = 13, struct.unpack_from(order + "I", data, 9)
+    else:
+        raise ValueError(f"Unsupported WKB geometry type {geometry_type}")
+
+    coords = np.frombuffer(data, dtype=dtype, count=count * 2, offset=offset)
+    coords = coords.reshape(-1, 2).astype(np.float64)
+    if geometry_type == POLYGON and count > 1:
+        coords = coords[:-1]
+    return coords
+
+
+def site_coordinates(geometry: Optional[bytes], legacy=None) -> Optional[np.ndarray]:
+    """Coordinates from WKB, falling back to legacy lat/lon JSON"""
+    if geometry:
+        return decode(geometry)
+    if legacy:
+        return points_to_array(legacy)
+    return None
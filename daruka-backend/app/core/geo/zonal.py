@@ -0,0 +1,120 @@
+import json
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+from app.core.config.settings import get_settings
+
+
+class Raster:
+    """
+    A (bands, rows, cols) or (rows, cols) `.npy` grid, memory-mapped, plus a
+    `<name>.json` sidecar:
+        {"transform": [x0, dx, 0, y0, 0, dy],   # GDAL geotransform, lon/lat
+         "nodata": -9999, "bands": ["ndvi"], "units": ["index"]}
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        data = np.load(self.path, mmap_mode="r")
+        self.data = data[None] if data.ndim == 2 else data
+
+        meta = json.loads(self.path.with_suffix(".json").read_text())
+        x0, dx, rx, y0, ry, dy = meta["transform"]
+        if rx or ry:
+            raise ValueError("Rotated rasters are not supported")
+        self.x0, self.dx, self.y0, self.dy = x0, dx, y0, dy
+        self.nodata = meta.get("nodata")
+
+        count = self.data.shape[0]
+        self.bands = meta.get("bands") or [f"band_{i + 1}" for i in range(count)]
+        self.units = meta.get("units") or [""] * count
+        if len(self.bands) != count or len(self.units) != count:
+            raise ValueError("Sidecar band names/units don't match the raster")
+
+    def window(self, bounds) -> Optional[Tuple[slice, slice]]:
+        """Row/col slices covering lon/lat bounds, clipped to the raster"""
+        minx, miny, maxx, maxy = bounds
+        cols = sorted(((minx - self.x0) / self.dx, (maxx - self.x0) / self.dx))
+        rows = sorted(((maxy - self.y0) / self.dy, (miny - self.y0) / self.dy))
+        _, height, width = self.data.shape
+        c0, c1 = max(math.floor(cols[0]), 0), min(math.ceil(cols[1]), width)
+        r0, r1 = max(math.floor(rows[0]), 0), min(math.ceil(rows[1]), height)
+        if c0 >= c1 or r0 >= r1:
+            return None
+        return slice(r0, r1), slice(c0, c1)
+
+
+@lru_cache(maxsize=4)
+def open_raster(path: str) -> Raster:
+    # cached per process, so pool workers map each file once
+    return Raster(path)
+
+
+def zonal_stats(
+    path: str, geometry: bytes, block_rows: Optional[int] = None
+) -> Optional[Dict[str, dict]]:
+    """
+    mean/min/max/sum/count per band of the pixels whose centres fall in the
+    outline. Only the outline's bounding window is read from disk, in blocks
+    of rows. None when the outline misses the raster or every pixel is nodata.
+    """
+    # rows of the window masked at a time, bounds the per-site memory use
+    block_rows = block_rows or get_settings().zonal_block_rows
+    raster = open_raster(path)
+    polygon = shapely.from_wkb(geometry)
+    window = raster.window(polygon.bounds)
+    if window is None:
+        return None
+    shapely.prepare(polygon)
+
+    rows, cols = window
+    bands = raster.data.shape[0]
+    total = np.zeros(bands)
+    count = np.zeros(bands, dtype=np.int64)
+    low = np.full(bands, np.inf)
+    high = np.full(bands, -np.inf)
+
+    xs = raster.x0 + (np.arange(cols.start, cols.stop) + 0.5) * raster.dx
+    for start in range(rows.start, rows.stop, block_rows):
+        stop = min(start + block_rows, rows.stop)
+        ys = raster.y0 + (np.arange(start, stop) + 0.5) * raster.dy
+        inside = shapely.contains_xy(polygon, xs[None, :], ys[:, None])
+        if not inside.any():
+            continue
+
+        block = np.asarray(raster.data[:, start:stop, cols], dtype=np.float64)
+        values = block[:, inside]
+        valid = np.isfinite(values)
+        if raster.nodata is not None:
+            valid &= values != raster.nodata
+
+        total += np.where(valid, values, 0).sum(axis=1)
+        count += valid.sum(axis=1)
+        low = np.minimum(low, np.where(valid, values, np.inf).min(axis=1))
+        high = np.maximum(high, np.where(valid, values, -np.inf).max(axis=1))
+
+    if not count.any():
+        return None
+    return {
+        band: {
+            "unit": raster.units[i],
+            "count": int(count[i]),
+            "sum": float(total[i]),
+            "mean": float(total[i] / count[i]) if count[i] else None,
+            "min": float(low[i]) if count[i] else None,
+            "max": float(high[i]) if count[i] else None,
+        }
+        for i, band in enumerate(raster.bands)
+    }
+
+
+def zonal_stats_batch(
+    path: str, outlines: Sequence[Tuple[str, bytes]]
+) -> List[Tuple[str, Optional[Dict[str, dict]]]]:
+    """Process pool entry point: stats for a chunk of (site_id, wkb)."""
+    return [(site_id, zonal_stats(path, geometry)) for site_id, geometry in outlines]
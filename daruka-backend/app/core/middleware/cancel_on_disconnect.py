@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class CancelOnDisconnectMiddleware:
+    """
+    Cancel the handler task when the client goes away, so in-flight queries
+    are cancelled (asyncpg sends a cancel request to the server) instead of
+    holding a pooled connection for a response nobody will read.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queue: "asyncio.Queue[Message]" = asyncio.Queue()
+        response_started = disconnected = False
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                # response complete; the server reports a disconnect from now
+                # on, which must not cancel the handler's remaining work
+                watcher.cancel()
+
+        async def watch_disconnect():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                await queue.put(message)
+                if message["type"] == "http.disconnect":
+                    # once the response has started, let it finish (commit,
+                    # after_commit callbacks); streaming bodies stop on their own
+                    if not response_started:
+                        disconnected = True
+                        handler.cancel()
+                    return
+
+        handler = asyncio.create_task(self.app(scope, queue.get, tracking_send))
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not disconnected:
+                raise  # we were cancelled ourselves (e.g. shutdown)
+            logger.info(
+                "Client disconnected, cancelled %s %s", scope["method"], scope["path"]
+            )
+        finally:
+            watcher.cancel()
@@ -0,0 +1,90 @@
+import logging
+import random
+import re
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.common.request_context import RequestContext, current_request
+from app.core.config.settings import Settings
+
+logger = logging.getLogger("app.access")
+
+# accept a caller's id (e.g. from the load balancer) only if it looks like one
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestLoggingMiddleware:
+    """
+    Give every request an id (X-Request-ID, echoed back) that all its log
+    lines carry, and log one access line with the time spent per phase:
+    auth, db, serialize. A LOG_SQL_SAMPLE_RATE fraction of requests also
+    logs each SQL statement with its duration.
+    """
+
+    def __init__(self, app: ASGIApp, settings: Settings):
+        self.app = app
+        self.sql_sample_rate = settings.log_sql_sample_rate
+        self.slow_request_ms = settings.log_slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        context = RequestContext(
+            incoming if _REQUEST_ID.match(incoming) else uuid.uuid4().hex,
+            trace_sql=random.random() < self.sql_sample_rate,
+        )
+        token = current_request.set(context)
+        status = 499  # client closed the connection before a response started
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if context.handler_done is not None:
+                    context.add(
+                        "serialize", (time.perf_counter() - context.handler_done) * 1000
+                    )
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", context.request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            duration_ms = context.elapsed_ms()
+            timings = {phase: round(ms, 2) for phase, ms in context.timings.items()}
+            level = (
+                logging.WARNING
+                if status >= 500 or duration_ms >= self.slow_request_ms
+                else logging.INFO
+            )
+            logger.log(
+                level,
+                "%s %s %d %.1fms %s",
+                scope["method"],
+                scope["path"],
+                status,
+                duration_ms,
+                " ".join(f"{phase}={ms}" for phase, ms in timings.items()) or "-",
+                extra={
+                    "http": {
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "duration_ms": round(duration_ms, 2),
+                        "timings": timings,
+                        "db_statements": context.db_statements,
+                    }
+                },
+            )
+            current_request.reset(token)
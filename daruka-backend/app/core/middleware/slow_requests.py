@@ -0,0 +1,26 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.common.profiler import SlowRequestSampler
+from app.core.common.request_context import request_id
+
+
+class SlowRequestMiddleware:
+    """
+    Registers each request's task with the SlowRequestSampler. Must run
+    inside CancelOnDisconnectMiddleware, in the task that runs the handler.
+    """
+
+    def __init__(self, app: ASGIApp, sampler: SlowRequestSampler):
+        self.app = app
+        self.sampler = sampler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.sampler.begin(request_id() or "-", scope["method"], scope["path"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.sampler.end()
@@ -0,0 +1,72 @@
+import random
+import re
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.common.request_context import request_id
+from app.core.common.tracing import SERVER, Span, Trace, TraceExporter, current_span
+
+# W3C trace context: version-traceid-parentid-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class TracingMiddleware:
+    """
+    Open the root span of each sampled request and export the finished
+    trace. A `traceparent` header from the caller continues its trace and
+    its sampling decision; otherwise TRACE_SAMPLE_RATE of requests are
+    traced. Only installed when TRACE_EXPORTER is set.
+    """
+
+    def __init__(self, app: ASGIApp, exporter: TraceExporter, sample_rate: float):
+        self.app = app
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = dict(scope["headers"]).get(b"traceparent", b"").decode("latin-1")
+        parent = _TRACEPARENT.match(header)
+        if parent:
+            trace_id, parent_id, flags = parent.groups()
+            sampled = int(flags, 16) & 1
+        else:
+            trace_id = parent_id = None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        # renamed after the matched route by TimedRoute
+        root = Span(
+            Trace(trace_id),
+            f"{scope['method']} {scope['path']}",
+            parent_id,
+            SERVER,
+            {
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+                "request.id": request_id(),
+            },
+        )
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["http.response.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    root.error = f"HTTP {message['status']}"
+            await send(message)
+
+        token = current_span.set(root)
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            root.fail(e)
+            raise
+        finally:
+            current_span.reset(token)
+            root.end()
+            self.exporter.export(root.trace)
@@ -1,6 +1,9 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from app.core.common.request_context import timed
+from app.core.config.settings import Settings, get_settings
+from app.integration.db.tenancy import current_tenant
 from app.integration.jwt.jwt_handler import JWTHandler
 
 security = HTTPBearer()
@@ -10,16 +13,36 @@ async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
     """
-    Extracts and verifies JWT access token.
+    Extracts and verifies JWT access token, and scopes the request's
+    queries to the user's organization.
     Returns decoded payload (user info).
     """
     token = credentials.credentials
     try:
-        payload = JWTHandler.verify_token(token, token_type="access")
-        return payload  # includes user_id, user_name, user_email, user_role
+        with timed("auth"):
+            payload = JWTHandler.verify_token(token, token_type="access")
+        if not payload.get("org_id"):
+            raise Exception("Token has no organization, sign in again")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e),
             headers={"WWW-Authenticate": "Bearer"},
         )
+    current_tenant.set(payload["org_id"])
+    return payload  # includes user_id, user_name, user_email, role, org_id
+
+
+async def require_admin(
+    current_user: dict = Depends(get_current_user),
+    settings: Settings = Depends(get_settings),
+):
+    """
+    get_current_user, restricted to the operator's ADMIN_USER_IDS. Not the
+    token's role: users pick that themselves at signup.
+    """
+    if current_user["user_id"] not in settings.admin_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return current_user
@@ -0,0 +1,165 @@
+import abc
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config.settings import Settings, get_settings
+from app.integration.jwt.jwt_handler import JWTHandler
+
+optional_bearer = HTTPBearer(auto_error=False)
+
+
+class RateLimitBackend(abc.ABC):
+    """
+    Token bucket storage, picked with RATE_LIMIT_BACKEND: "memory" limits
+    each process on its own (a caller gets the limit once per worker),
+    "postgres" shares the buckets across workers and nodes. Other stores
+    (e.g. Redis) plug in with `set_rate_limit_backend`.
+    """
+
+    @abc.abstractmethod
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; return 0 if allowed, else seconds until one frees up."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = 100_000):
+        self._max_keys = max_keys
+        # key -> (tokens, last refill time); ordered by last use so idle
+        # buckets are evicted first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, stamp = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - stamp) * rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class ConcurrencyLimiter:
+    """
+    Non-blocking in-flight counter; callers shed load when it's full.
+    Per process on purpose: it protects this process's connection pool.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.limit:
+            return False
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+
+
+_backend: Optional[RateLimitBackend] = None
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+def _get_backend(settings: Settings) -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        if settings.rate_limit_backend == "postgres":
+            from app.integration.db.rate_limits import PostgresRateLimitBackend
+
+            _backend = PostgresRateLimitBackend()
+        else:
+            _backend = InMemoryRateLimitBackend(settings.rate_limit_max_keys)
+    return _backend
+
+
+def _identity(
+    request: Request, credentials: Optional[HTTPAuthorizationCredentials]
+) -> str:
+    """JWT user_id when a valid token is sent, client IP otherwise."""
+    if credentials:
+        try:
+            payload = JWTHandler.verify_token(credentials.credentials)
+            return f"user:{payload['user_id']}"
+        except Exception:
+            pass
+    client = request.client.host if request.client else "unknown"
+    return f"ip:{client}"
+
+
+def rate_limit(
+    name: str = "default",
+    per_minute: Optional[float] = None,
+    burst: Optional[int] = None,
+    max_concurrent: Optional[int] = None,
+):
+    """
+    Dependency factory: token bucket per (limit name, route, caller) and an
+    optional per-route cap on in-flight requests.
+    Over the rate -> 429, over the concurrency cap -> 503.
+    Unset limits come from the RATE_LIMIT_* / ROUTE_MAX_CONCURRENCY settings,
+    which apply to every route of a router; routes stack stricter limits on
+    top (e.g. signin, heavy list endpoints). max_concurrent=0 disables the cap.
+    """
+
+    async def dependency(
+        request: Request,
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
+        settings: Settings = Depends(get_settings),
+    ):
+        route = request.scope.get("route")
+        route_key = f"{request.method} {route.path if route else request.url.path}"
+
+        wait = await _get_backend(settings).consume(
+            f"{name}|{route_key}|{_identity(request, credentials)}",
+            (per_minute or settings.rate_limit_per_minute) / 60,
+            burst or settings.rate_limit_burst,
+        )
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+        limit = (
+            settings.route_max_concurrency if max_concurrent is None else max_concurrent
+        )
+        if not limit:
+            yield
+            return
+
+        limiter_key = f"{name}|{route_key}"
+        limiter = _limiters.get(limiter_key)
+        if limiter is None:
+            limiter = _limiters[limiter_key] = ConcurrencyLimiter(limit)
+        if not limiter.try_acquire():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return dependency
@@ -0,0 +1,37 @@
+import time
+from typing import Dict, Optional
+
+
+class RevokedSessions:
+    """
+    Refresh token families (sessions) revoked recently enough that access
+    tokens issued to them may still be unexpired. Checked on every
+    authenticated request, so it is a dict lookup and never a query; it
+    stays small because an entry is only needed for one access token
+    lifetime after the revocation.
+    """
+
+    def __init__(self):
+        # family id -> unix time after which its access tokens have expired
+        self._until: Dict[str, float] = {}
+
+    def add(self, family_id: str, until: float) -> None:
+        self._until[family_id] = max(until, self._until.get(family_id, 0))
+
+    def is_revoked(self, family_id: Optional[str]) -> bool:
+        return family_id is not None and family_id in self._until
+
+    def prune(self) -> int:
+        now = time.time()
+        expired = [family for family, until in self._until.items() if until <= now]
+        for family in expired:
+            del self._until[family]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._until)
+
+
+# this process's view; revocations made by other workers arrive through
+# app/modules/users/jobs/syncRevokedSessions.py
+revoked_sessions = RevokedSessions()
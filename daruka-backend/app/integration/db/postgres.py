@@ -1,76 +1,286 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
-
-# Load env vars
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("❌ DATABASE_URL not set in environment variables")
-
-# Detect Supabase session pooler
-IS_POOLER = "pooler.supabase.com" in DATABASE_URL
-
-if IS_POOLER:
-    # Force disable prepared statements at the URL level
-    if "?" in DATABASE_URL:
-        DATABASE_URL += "&prepared_statement_cache_size=0"
-    else:
-        DATABASE_URL += "?prepared_statement_cache_size=0"
-
-# Engine config
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,  # True for debugging
-    future=True,
-    pool_size=5 if IS_POOLER else 10,    # small for pooler, bigger for direct DB
-    max_overflow=10 if IS_POOLER else 20,
-    pool_pre_ping=True,
-    pool_recycle=280,  # recycle connections every ~5 minutes
-    connect_args=(
-        {"prepared_statement_cache_size": 0, "prepared_statement_name_func": None}
-        if IS_POOLER else {}
-    ),
-)
+import inspect
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
-# Session factory
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
+from app.core.config.settings import Settings, get_settings
+from app.integration.db.query_budget import (
+    QueryBudget,
+    current_budget,
+    install_query_budget,
 )
+from app.integration.db.sql_trace import install_sql_trace
+
+logger = logging.getLogger(__name__)
+
+# Built on first use (app startup, a job, alembic), not on import
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[sessionmaker] = None
+
+
+def uses_pooler(settings: Settings) -> bool:
+    """PgBouncer-style pooler in front of Postgres: DB_POOLER, else detect Supabase's"""
+    if settings.db_pooler is not None:
+        return settings.db_pooler
+    return "pooler.supabase.com" in (settings.database_url or "")
+
+
+def database_url(settings: Optional[Settings] = None) -> str:
+    """Engine URL from the DATABASE_URL setting."""
+    settings = settings or get_settings()
+    url = settings.database_url
+    if not url:
+        raise RuntimeError("❌ DATABASE_URL not set in environment variables")
+
+    if uses_pooler(settings):
+        # Force disable prepared statements at the URL level
+        url += "&" if "?" in url else "?"
+        url += "prepared_statement_cache_size=0"
+    return url
+
+
+def init_engine(settings: Optional[Settings] = None) -> AsyncEngine:
+    """Create this process's engine and session factory if not done yet."""
+    global _engine, _session_factory
+    if _engine is not None:
+        return _engine
+
+    settings = settings or get_settings()
+    url = database_url(settings)
+    pooler = uses_pooler(settings)
+    # Pool size is per process; serve.py splits DB_CONNECTION_BUDGET across
+    # workers and sets these (small for pooler, bigger for direct DB by default)
+    pool_size = settings.db_pool_size
+    max_overflow = settings.db_max_overflow
+    _engine = create_async_engine(
+        url,
+        echo=False,  # True for debugging
+        future=True,
+        pool_size=(5 if pooler else 10) if pool_size is None else pool_size,
+        max_overflow=(10 if pooler else 20) if max_overflow is None else max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=(
+            {
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": None,
+            }
+            if pooler
+            # server-side cap for any single statement; routes can tighten it
+            else {
+                "server_settings": {
+                    "statement_timeout": str(settings.db_statement_timeout_ms)
+                }
+            }
+        ),
+    )
+    install_query_budget(_engine.sync_engine)
+    install_sql_trace(_engine.sync_engine, settings.log_sql_max_length)
+
+    _session_factory = sessionmaker(
+        bind=_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+        # a pooler rejects (or doesn't keep to one backend) startup
+        # parameters, so sessions cap statements with SET LOCAL instead
+        info=(
+            {"statement_timeout_ms": settings.db_statement_timeout_ms} if pooler else {}
+        ),
+    )
+    return _engine
+
+
+def get_engine() -> AsyncEngine:
+    return init_engine()
+
+
+def new_session() -> AsyncSession:
+    """Session from the process-wide factory; `async with new_session() as s:`"""
+    if _session_factory is None:
+        init_engine()
+    return _session_factory()
+
 
 # Base model
 Base = declarative_base()
 
-# Dependency
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    # SET LOCAL only lives for this transaction, so pooled connections
+    # never leak a per-route timeout to the next request
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+# Unit of work: repos only flush; whoever opened the session commits once.
+# Side effects that must only happen once the data is visible (realtime
+# events, cache invalidation) are queued with after_commit().
+def after_commit(session: AsyncSession, callback: Callable) -> None:
+    """Call `callback()` (may be async) after `session` commits; dropped on rollback"""
+    session.info.setdefault("after_commit", []).append(callback)
+
+
+async def commit(session: AsyncSession) -> None:
+    """Commit, then run the after_commit callbacks (failures are only logged)"""
+    await session.commit()
+    for callback in session.info.pop("after_commit", []):
+        try:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception("after_commit callback failed")
+
+
+async def rollback(session: AsyncSession) -> None:
+    session.info.pop("after_commit", None)
+    await session.rollback()
+
+
+@asynccontextmanager
+async def unit_of_work():
+    """
+    Session committed when the block exits normally, rolled back if it
+    raises; for jobs and other code outside a request.
+    """
+    async with new_session() as session:
+        try:
+            yield session
+        except BaseException:
+            await rollback(session)
+            raise
+        await commit(session)
+
+
+# sessions of the request being handled, finished by finish_request()
+_request_sessions: ContextVar[Optional[List[AsyncSession]]] = ContextVar(
+    "request_sessions", default=None
+)
+
+
+async def finish_request(failed: bool = False) -> None:
+    """
+    Commit the request's unit of work (roll it back if `failed`) and hand
+    its connection back to the pool. Called by TimedRoute as soon as the
+    endpoint returns, so response serialization doesn't hold a connection;
+    the dependency does it otherwise.
+    """
+    sessions = _request_sessions.get() or []
+    while sessions:
+        session = sessions.pop()
+        try:
+            if failed:
+                await rollback(session)
+            else:
+                await commit(session)
+        finally:
+            await session.close()
+
+
+# Dependencies
+def db_session(
+    statement_timeout_ms: Optional[int] = None,
+    max_statements: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    label: str = "request",
+):
+    """
+    Session dependency with a per-route statement timeout and query budget
+    (the DB_MAX_* settings unless given; 0 disables a limit).
+    Going over the budget raises QueryBudgetExceeded; usage is logged.
+    The session is the request's unit of work: committed once when the
+    endpoint returns (see finish_request), rolled back if it raises or
+    returns a failed ApiResponse. Repos never commit or roll back.
+    """
+
+    async def dependency(settings: Settings = Depends(get_settings)):
+        budget = QueryBudget(
+            label,
+            settings.db_max_statements_per_request
+            if max_statements is None
+            else max_statements,
+            settings.db_max_rows_per_request if max_rows is None else max_rows,
+        )
+        token = current_budget.set(budget)
+        sessions = _request_sessions.get()
+        if sessions is None:
+            sessions = []
+            _request_sessions.set(sessions)
+        try:
+            async with new_session() as session:
+                if statement_timeout_ms:
+                    session.info["statement_timeout_ms"] = statement_timeout_ms
+                sessions.append(session)
+                try:
+                    yield session
+                except BaseException:
+                    if session in sessions:
+                        sessions.remove(session)
+                        await rollback(session)
+                    raise
+                await finish_request()
+        finally:
+            current_budget.reset(token)
+            budget.report()
+
+    return dependency
+
+
+get_db = db_session()
+
 
 # Startup
-async def connect_to_postgres():
+async def connect_to_postgres(settings: Optional[Settings] = None):
+    settings = settings or get_settings()
     try:
+        engine = init_engine(settings)
         async with engine.begin() as conn:
-            # Create tables if they don’t exist
-            await conn.run_sync(Base.metadata.create_all)
-
             from sqlalchemy import text
+
+            # Dev convenience; production runs `alembic upgrade head` once
+            # instead (serve.py) and turns DB_AUTO_CREATE off
+            if settings.db_auto_create:
+                # trigram search indexes need pg_trgm; without it they are
+                # skipped and search falls back to full-text matching only
+                try:
+                    async with conn.begin_nested():
+                        await conn.execute(
+                            text("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                        )
+                except Exception as e:
+                    logger.warning("pg_trgm unavailable, fuzzy search disabled: %s", e)
+
+                # Create tables if they don’t exist
+                await conn.run_sync(Base.metadata.create_all)
+
             result = await conn.execute(text("SELECT 1"))
             row = result.fetchone()
-            print(f"✅ PostgreSQL connected successfully (test result: {row[0]})")
-
-            env_type = "Supabase Pooler" if IS_POOLER else "Direct/Postgres"
-            print(f"🔗 Using connection: {env_type}")
-    except Exception as e:
-        print(f"❌ PostgreSQL connection failed: {e}")
+            env_type = "Supabase Pooler" if uses_pooler(settings) else "Direct/Postgres"
+            logger.info(
+                "PostgreSQL connected (test result: %s, connection: %s)",
+                row[0],
+                env_type,
+            )
+    except Exception:
+        logger.exception("PostgreSQL connection failed")
         raise
 
+
 # Shutdown
 async def close_postgres_connection():
-    await engine.dispose()
-    print("🔌 PostgreSQL connection closed")
+    global _engine, _session_factory
+    if _engine is None:
+        return
+    await _engine.dispose()
+    _engine = _session_factory = None
+    logger.info("PostgreSQL connection closed")
@@ -0,0 +1,72 @@
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class QueryBudget:
+    """Statement / row allowance for one request."""
+
+    def __init__(self, label: str, max_statements: int, max_rows: int):
+        self.label = label
+        self.max_statements = max_statements
+        self.max_rows = max_rows
+        self.statements = 0
+        self.rows = 0
+
+    def on_statement(self) -> None:
+        self.statements += 1
+        if self.max_statements and self.statements > self.max_statements:
+            raise QueryBudgetExceeded(
+                f"{self.label}: more than {self.max_statements} statements"
+            )
+
+    def on_rows(self, count: int) -> None:
+        if count > 0:
+            self.rows += count
+        if self.max_rows and self.rows > self.max_rows:
+            raise QueryBudgetExceeded(f"{self.label}: more than {self.max_rows} rows")
+
+    def report(self) -> None:
+        exhausted = (self.max_statements and self.statements > self.max_statements) or (
+            self.max_rows and self.rows > self.max_rows
+        )
+        logger.log(
+            logging.WARNING if exhausted else logging.DEBUG,
+            "query budget %s: %d/%d statements, %d/%d rows",
+            self.label,
+            self.statements,
+            self.max_statements,
+            self.rows,
+            self.max_rows,
+        )
+
+
+current_budget: ContextVar[Optional[QueryBudget]] = ContextVar(
+    "current_budget", default=None
+)
+
+
+def install_query_budget(engine: Engine) -> None:
+    """Count statements and rows against the budget of the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        budget = current_budget.get()
+        if budget is not None:
+            budget.on_statement()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        budget = current_budget.get()
+        if budget is not None:
+            # asyncpg reports the row count of SELECTs too ("SELECT n")
+            budget.on_rows(cursor.rowcount)
@@ -0,0 +1,78 @@
+import time
+
+from sqlalchemy import Column, Float, String, text
+
+from app.core.security.rate_limit import RateLimitBackend
+from app.integration.db.postgres import Base, get_engine
+
+
+class RateLimitBucket(Base):
+    """
+    One caller's limit on one route, shared by every worker and node.
+    Unlogged: no WAL for the hottest writes in the app, and losing the
+    table on a crash only resets the limits.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key = Column(String, primary_key=True)
+    # theoretical arrival time (GCRA), epoch seconds: when the bucket will
+    # be full again. A token bucket with one timestamp instead of two values.
+    tat = Column(Float, nullable=False)
+
+
+# Take a token: push the arrival time one interval out, unless that would
+# put it more than the burst ahead of now. No row back means limited.
+_CONSUME = text(
+    """
+    INSERT INTO rate_limit_buckets AS b (key, tat)
+    VALUES (:key, extract(epoch FROM clock_timestamp()) + :interval)
+    ON CONFLICT (key) DO UPDATE
+    SET tat = greatest(b.tat, excluded.tat - :interval) + :interval
+    WHERE greatest(b.tat, excluded.tat - :interval)
+        - (excluded.tat - :interval) <= :tolerance
+    RETURNING 1
+    """
+)
+_AHEAD = text(
+    "SELECT tat - extract(epoch FROM clock_timestamp())"
+    " FROM rate_limit_buckets WHERE key = :key"
+)
+# buckets whose arrival time has passed are full, same as no row at all
+_PRUNE = text(
+    "DELETE FROM rate_limit_buckets"
+    " WHERE tat < extract(epoch FROM clock_timestamp()) - 60"
+)
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in Postgres, so a limit holds across workers and nodes
+    (RATE_LIMIT_BACKEND=postgres). One autocommitted statement per check,
+    on a pooled connection outside the request's unit of work.
+    """
+
+    PRUNE_SECONDS = 60
+
+    def __init__(self):
+        self._last_prune = time.monotonic()
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        interval = 1 / rate
+        params = {"key": key, "interval": interval}
+        async with get_engine().begin() as connection:
+            allowed = await connection.execute(
+                _CONSUME, {**params, "tolerance": (burst - 1) * interval}
+            )
+            if allowed.first():
+                wait = 0.0
+            else:
+                ahead = await connection.execute(_AHEAD, {"key": key})
+                # until the arrival time is back within the burst
+                wait = max(ahead.scalar_one() - (burst - 1) * interval, 0.001)
+
+            if time.monotonic() - self._last_prune > self.PRUNE_SECONDS:
+                self._last_prune = time.monotonic()
+                await connection.execute(_PRUNE)
+        return wait
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Computed, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+# text search configuration used for both the stored vectors and the queries
+TS_CONFIG = "english"
+
+
+def search_vector_column(*weighted_columns) -> Column:
+    """
+    Stored tsvector generated from (column, weight) pairs, e.g.
+    search_vector_column(("name", "A"), ("description", "B")).
+    """
+    parts = " || ".join(
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    )
+    return Column(TSVECTOR, Computed(parts, persisted=True))
+
+
+def has_pg_trgm(bind) -> bool:
+    """Whether the pg_trgm extension is installed on the connected database."""
+    return bool(
+        bind.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).scalar()
+    )
+
+
+def _has_pg_trgm(ddl, target, bind, **kw) -> bool:
+    return has_pg_trgm(bind)
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """GIN trigram index, only created where the pg_trgm extension is installed"""
+    index = Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    )
+    index.info["trigram"] = True
+    index.ddl_if(dialect="postgresql", callable_=_has_pg_trgm)
+    return index
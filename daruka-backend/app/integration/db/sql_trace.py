@@ -0,0 +1,78 @@
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.common.request_context import current_request
+from app.core.common.tracing import CLIENT, current_span
+
+logger = logging.getLogger(__name__)
+
+
+def install_sql_trace(engine: Engine, max_length: int) -> None:
+    """
+    Add statement time to the current request's "db" timing, log each
+    statement (cut to `max_length` characters) with its duration for
+    requests sampled for SQL tracing, and trace it as a span when the
+    request is traced. How long the request held a pooled connection is
+    reported as its "conn" timing.
+    """
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        if current_request.get() is not None:
+            connection_record.info["checked_out"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out", None)
+        request = current_request.get()
+        if request is not None and started is not None:
+            request.add("conn", (time.perf_counter() - started) * 1000)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if current_request.get() is not None:
+            conn.info["statement_started"] = time.perf_counter()
+        parent = current_span.get()
+        if parent is not None:
+            conn.info["statement_span"] = parent.child(
+                statement.split(None, 1)[0].upper(),
+                CLIENT,
+                **{
+                    "db.system": "postgresql",
+                    "db.statement": " ".join(statement.split())[:max_length],
+                },
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        if exception_context.connection is None:
+            return
+        statement_span = exception_context.connection.info.pop("statement_span", None)
+        if statement_span is not None:
+            statement_span.fail(exception_context.original_exception)
+            statement_span.end()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        statement_span = conn.info.pop("statement_span", None)
+        if statement_span is not None:
+            statement_span.attributes["db.response.returned_rows"] = cursor.rowcount
+            statement_span.end()
+
+        request = current_request.get()
+        started = conn.info.pop("statement_started", None)
+        if request is None or started is None:
+            return
+        ms = (time.perf_counter() - started) * 1000
+        request.add("db", ms)
+        request.db_statements += 1
+        if request.trace_sql:
+            logger.info(
+                "%.2fms %s",
+                ms,
+                " ".join(statement.split())[:max_length],
+                extra={"sql": {"duration_ms": round(ms, 2), "rows": cursor.rowcount}},
+            )
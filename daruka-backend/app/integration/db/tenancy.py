@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import Column, ForeignKey, String, event
+from sqlalchemy.orm import Session, declared_attr, with_loader_criteria
+
+# Organization of the request being handled; set by get_current_user from
+# the token's org_id claim. None (jobs, public routes) means unscoped.
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+
+class TenantScoped:
+    """
+    Mixin for models owned by an organization. While a tenant is set, every
+    ORM SELECT/UPDATE/DELETE through a Session only sees that tenant's rows,
+    and new rows are stamped with it.
+    """
+
+    @declared_attr
+    def org_id(cls):
+        # indexed through the models' tenant-leading composite indexes
+        return Column(String, ForeignKey("organizations.id"), nullable=False)
+
+
+@contextmanager
+def tenant_scope(org_id: Optional[str]):
+    """Run the block as `org_id` (e.g. a websocket or a per-tenant job)."""
+    token = current_tenant.set(org_id)
+    try:
+        yield
+    finally:
+        current_tenant.reset(token)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_tenant(execute_state):
+    org_id = current_tenant.get()
+    if (
+        org_id is None
+        or not (
+            execute_state.is_select
+            or execute_state.is_update
+            or execute_state.is_delete
+        )
+        or execute_state.is_column_load
+        or execute_state.is_relationship_load
+        or execute_state.execution_options.get("all_tenants", False)
+    ):
+        # relationship loads inherit the criteria of the statement that
+        # loaded their parents
+        return
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(
+            TenantScoped,
+            lambda cls: cls.org_id == org_id,
+            include_aliases=True,
+        )
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_tenant(session, flush_context, instances):
+    org_id = current_tenant.get()
+    if org_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, TenantScoped) and obj.org_id is None:
+            obj.org_id = org_id
@@ -1,55 +1,62 @@
-import os
 from datetime import datetime, timedelta
 from typing import Any, Dict
 
 import jwt
-from dotenv import load_dotenv
 
-# 🔐 Load environment variables
-load_dotenv()
+from app.core.config.settings import get_settings
+from app.core.security.revocation import revoked_sessions
 
-# Get values from .env (with safe defaults where possible)
-JWT_SECRET = os.getenv(
-    "JWT_SECRET", "supersecretkey123"
-)  # must override in .env for prod
+# secret and expiries come from settings (JWT_SECRET must be set in production)
 JWT_ALGORITHM = "HS256"  # always SHA-256
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
-REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
 
 
 class JWTHandler:
     @staticmethod
-    def create_tokens(user_data: Dict[str, Any]) -> Dict[str, str]:
+    def create_tokens(
+        user_data: Dict[str, Any], session_id: str, token_id: str
+    ) -> Dict[str, str]:
         """
         Generate both access and refresh tokens for a user.
         user_data should NOT contain sensitive info like password.
+        `session_id` is the refresh token family both tokens belong to and
+        `token_id` identifies this refresh token within it (see SessionService).
         """
+        settings = get_settings()
 
         payload = {
             "user_id": user_data.get("user_id"),
             "user_name": user_data.get("user_name"),
             "user_email": user_data.get("user_email"),
             "role": user_data.get("role"),
+            # tenant every query of the request is scoped to
+            "org_id": user_data.get("org_id"),
+            # revoking the session rejects its access tokens too
+            "sid": session_id,
         }
 
         # Access Token
         access_token_payload = {
             **payload,
-            "exp": datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+            "exp": datetime.utcnow()
+            + timedelta(minutes=settings.access_token_expire_minutes),
             "type": "access",
         }
         access_token = jwt.encode(
-            access_token_payload, JWT_SECRET, algorithm=JWT_ALGORITHM
+            access_token_payload, settings.jwt_secret, algorithm=JWT_ALGORITHM
         )
 
         # Refresh Token
         refresh_token_payload = {
             "user_id": user_data.get("user_id"),
-            "exp": datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            "org_id": user_data.get("org_id"),
+            "sid": session_id,
+            "jti": token_id,
+            "exp": datetime.utcnow()
+            + timedelta(days=settings.refresh_token_expire_days),
             "type": "refresh",
         }
         refresh_token = jwt.encode(
-            refresh_token_payload, JWT_SECRET, algorithm=JWT_ALGORITHM
+            refresh_token_payload, settings.jwt_secret, algorithm=JWT_ALGORITHM
         )
 
         return {"access_token": access_token, "refresh_token": refresh_token}
@@ -59,39 +66,19 @@ class JWTHandler:
         """
         Verify token and return payload.
         Raises jwt.ExpiredSignatureError or jwt.InvalidTokenError if invalid.
+        Access tokens of revoked sessions are rejected; whether a refresh
+        token is still usable is decided by SessionService.refresh.
         """
         try:
-            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+            payload = jwt.decode(
+                token, get_settings().jwt_secret, algorithms=[JWT_ALGORITHM]
+            )
             if payload.get("type") != token_type:
                 raise jwt.InvalidTokenError("Invalid token type")
-            return payload
         except jwt.ExpiredSignatureError:
             raise Exception("Token expired")
         except jwt.InvalidTokenError:
             raise Exception("Invalid token")
-
-    @staticmethod
-    def refresh_access_token(refresh_token: str) -> str:
-        """
-        Use refresh token to generate a new access token.
-        """
-        try:
-            payload = jwt.decode(refresh_token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-            if payload.get("type") != "refresh":
-                raise jwt.InvalidTokenError("Not a refresh token")
-
-            new_access_payload = {
-                "user_id": payload["user_id"],
-                "exp": datetime.utcnow()
-                + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
-                "type": "access",
-            }
-            new_access_token = jwt.encode(
-                new_access_payload, JWT_SECRET, algorithm=JWT_ALGORITHM
-            )
-            return new_access_token
-
-        except jwt.ExpiredSignatureError:
-            raise Exception("Refresh token expired")
-        except jwt.InvalidTokenError:
-            raise Exception("Invalid refresh token")
+        if token_type == "access" and revoked_sessions.is_revoked(payload.get("sid")):
+            raise Exception("Session revoked")
+        return payload
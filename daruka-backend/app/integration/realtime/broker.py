@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.core.config.settings import Settings, get_settings
+from app.integration.db.postgres import get_engine
+
+logger = logging.getLogger(__name__)
+
+# REALTIME_BACKEND "memory" fans out inside this process only; "postgres"
+# goes through LISTEN/NOTIFY so every worker/node sees every event
+REALTIME_CHANNEL = "darukaa_events"
+# SQLAlchemy/asyncpg-dialect options asyncpg.connect() doesn't understand
+_ENGINE_ONLY_QUERY = ("prepared_statement_cache_size",)
+# listener reconnect backoff, and how often an idle listener is probed
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30
+LISTENER_PING_SECONDS = 30
+
+
+class Subscription:
+    """
+    Per-connection event buffer.
+    Events for the same (type, site) replace each other instead of queueing,
+    and the buffer is bounded: a slow client loses the oldest events and is
+    told to resync rather than growing memory without limit.
+    """
+
+    def __init__(self, max_pending: int, coalesce_ms: int = 0):
+        # max distinct pending events before the oldest are dropped
+        self._max_pending = max_pending
+        # how long to wait to batch up rapid updates before sending
+        self._coalesce_ms = coalesce_ms
+        self._pending: "OrderedDict[Tuple[str, Any], Dict[str, Any]]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self._overflowed = False
+
+    def push(self, event: Dict[str, Any]) -> None:
+        key = (event.get("type"), event.get("site_id"))
+        if key in self._pending:
+            self._pending.pop(key)
+        elif len(self._pending) >= self._max_pending:
+            self._pending.popitem(last=False)
+            self._overflowed = True
+        self._pending[key] = event
+        self._ready.set()
+
+    async def next_batch(self) -> List[Dict[str, Any]]:
+        await self._ready.wait()
+        if self._coalesce_ms:
+            await asyncio.sleep(self._coalesce_ms / 1000)
+
+        batch = list(self._pending.values())
+        if self._overflowed:
+            batch.insert(0, {"type": "resync"})
+            self._overflowed = False
+        self._pending.clear()
+        self._ready.clear()
+        return batch
+
+
+class RealtimeHub:
+    """Project-scoped pub/sub feeding the websocket channels."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._dsn: Optional[str] = None
+        # dedicated to LISTEN: asyncpg runs one operation per connection at a
+        # time, so nothing else is ever executed on it
+        self._listener: Optional[asyncpg.Connection] = None
+        # set once the current listener connection is closed or lost
+        self._listener_lost: Optional[asyncio.Event] = None
+        self._supervisor: Optional[asyncio.Task] = None
+
+    def subscribe(self, project_id: str) -> Subscription:
+        settings = get_settings()
+        subscription = Subscription(
+            settings.realtime_max_pending, settings.realtime_coalesce_ms
+        )
+        self._subscribers[project_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, project_id: str, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(project_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[project_id]
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        """Hand an event to every local subscriber of its project."""
+        for subscription in self._subscribers.get(event.get("project_id"), ()):
+            subscription.push(event)
+
+    def resync_all(self) -> None:
+        """Tell every local subscriber it may have missed events."""
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.push({"type": "resync"})
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        """Publish an event; never raises, a lost event must not fail a write."""
+        if self._dsn is None:
+            self.dispatch(event)
+            return
+        try:
+            # a pooled connection per publish, so concurrent requests don't
+            # queue on (or collide over) a single connection
+            async with get_engine().begin() as connection:
+                await connection.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": REALTIME_CHANNEL, "payload": json.dumps(event)},
+                )
+        except Exception:
+            logger.exception("Failed to publish realtime event")
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            self.dispatch(json.loads(payload))
+        except ValueError:
+            logger.warning("Dropping malformed realtime payload")
+
+    async def _listen(self) -> None:
+        listener = await asyncpg.connect(self._dsn)
+        lost = asyncio.Event()
+        listener.add_termination_listener(lambda _: lost.set())
+        await listener.add_listener(REALTIME_CHANNEL, self._on_notify)
+        self._listener, self._listener_lost = listener, lost
+
+    async def _listener_alive(self) -> bool:
+        """Wait up to LISTENER_PING_SECONDS for a drop, then probe the link"""
+        try:
+            await asyncio.wait_for(self._listener_lost.wait(), LISTENER_PING_SECONDS)
+            return False
+        except asyncio.TimeoutError:
+            pass
+        try:
+            # idle here, so this can't overlap another operation
+            await self._listener.execute("SELECT 1", timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def _keep_listening(self) -> None:
+        """Reconnect with backoff and LISTEN again whenever the link drops."""
+        while True:
+            if await self._listener_alive():
+                continue
+            logger.warning("Realtime listener connection lost, reconnecting")
+            self._listener.terminate()
+            delay = RECONNECT_MIN_SECONDS
+            while True:
+                try:
+                    await self._listen()
+                    break
+                except Exception as e:
+                    logger.warning(
+                        "Realtime listener reconnect failed (retry in %.1fs): %s",
+                        delay,
+                        e,
+                    )
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+            logger.info("Realtime listener reconnected")
+            # notifications sent while disconnected were never received
+            self.resync_all()
+
+    async def start(self, settings: Optional[Settings] = None) -> None:
+        settings = settings or get_settings()
+        if settings.realtime_backend != "postgres":
+            return
+        # asyncpg wants a plain DSN: no "+asyncpg" driver and no engine-only
+        # options, but connection params such as ?host=/socket/dir must stay
+        url = (
+            make_url(settings.database_url)
+            .set(drivername="postgresql")
+            .difference_update_query(_ENGINE_ONLY_QUERY)
+        )
+        self._dsn = url.render_as_string(hide_password=False)
+        await self._listen()
+        self._supervisor = asyncio.create_task(self._keep_listening())
+
+    async def stop(self) -> None:
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            try:
+                await self._supervisor
+            except asyncio.CancelledError:
+                pass
+            self._supervisor = None
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+        self._dsn = None
+
+
+hub = RealtimeHub()
+
+
+def site_event(event_type: str, site) -> Dict[str, Any]:
+    """Small, id-only event; clients fetch details (or /changes) as needed."""
+    return {
+        "type": event_type,
+        "project_id": site.project_id,
+        "site_id": site.id,
+        "updated_at": site.updated_at.isoformat() if site.updated_at else None,
+    }
@@ -0,0 +1,95 @@
+# app/modules/admin/routes/adminRouter.py
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+
+from app.core.common.profiler import Profile, profile_thread
+from app.core.common.request_context import TimedRoute
+from app.core.config.settings import Settings, get_settings
+from app.core.security.auth_dependency import require_admin
+from app.core.security.rate_limit import rate_limit
+
+# Only included when PROFILING_ENABLED is set, and only open to
+# ADMIN_USER_IDS. Each route reports on the worker process that happens to
+# serve it.
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin), Depends(rate_limit())],
+    route_class=TimedRoute,
+)
+
+# one on-demand profile per worker at a time
+_profiling = asyncio.Lock()
+
+
+def speedscope_response(profile: Profile, name: str) -> JSONResponse:
+    return JSONResponse(
+        profile.to_speedscope(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.speedscope.json"'
+        },
+    )
+
+
+@router.get("/profile", status_code=status.HTTP_200_OK)
+async def profile_worker(
+    seconds: float = Query(10, gt=0),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000),
+    settings: Settings = Depends(get_settings),
+):
+    """Sample this worker's event loop for `seconds`; speedscope JSON (admin)"""
+    if seconds > settings.profile_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be at most {settings.profile_max_seconds}",
+        )
+    if _profiling.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with _profiling:
+        profile = await asyncio.to_thread(
+            profile_thread,
+            threading.get_ident(),  # the event loop thread
+            seconds,
+            interval_ms or settings.profile_interval_ms,
+        )
+    return speedscope_response(profile, f"profile-{int(time.time())}")
+
+
+@router.get("/loop-lag", status_code=status.HTTP_200_OK)
+async def loop_lag(request: Request):
+    """Recent event loop lag of this worker (admin)"""
+    return request.app.state.loop_lag.stats()
+
+
+@router.get("/slow-requests", status_code=status.HTTP_200_OK)
+async def slow_requests(request: Request):
+    """Recent slow requests of this worker with sampled stacks (admin)"""
+    sampler = request.app.state.slow_requests
+    if sampler is None:
+        return []
+    return [
+        {
+            **{key: value for key, value in entry.items() if key != "profile"},
+            "samples": len(entry["profile"].samples),
+            "hottest": [
+                {"frame": frame, "ms": round(ms, 1)}
+                for frame, ms in entry["profile"].hottest(5)
+            ],
+        }
+        for entry in reversed(sampler.recent)
+    ]
+
+
+@router.get("/slow-requests/{request_id}/profile", status_code=status.HTTP_200_OK)
+async def slow_request_profile(request_id: str, request: Request):
+    """Stacks sampled during one slow request, as speedscope JSON (admin)"""
+    sampler = request.app.state.slow_requests
+    entry = sampler.find(request_id) if sampler is not None else None
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No samples for this request")
+    return speedscope_response(entry["profile"], f"slow-{request_id}")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, String
+from sqlalchemy.sql import func
+
+from app.core.common.id_generator import generate_org_id
+from app.integration.db.postgres import Base
+
+
+class Organization(Base):
+    """Tenant: users, projects and sites all belong to exactly one."""
+
+    __tablename__ = "organizations"
+
+    id = Column(String, primary_key=True, default=generate_org_id)
+    name = Column(String(255), nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
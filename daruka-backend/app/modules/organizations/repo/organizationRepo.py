@@ -0,0 +1,24 @@
+# app/modules/organizations/repo/organizationRepo.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.common.tracing import traced
+from app.modules.organizations.models.organizationModel import Organization
+
+
+@traced
+class OrganizationRepo:
+    @staticmethod
+    async def create_organization(session: AsyncSession, name: str):
+        """Add an organization; committed together with its first user"""
+        organization = Organization(name=name)
+        session.add(organization)
+        await session.flush()
+        return organization
+
+    @staticmethod
+    async def get_organization_by_id(session: AsyncSession, org_id: str):
+        result = await session.execute(
+            select(Organization).where(Organization.id == org_id)
+        )
+        return result.scalar_one_or_none()
@@ -1,6 +1,10 @@
 # app/modules/projects/controller/projectController.py
+import logging
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.common.error_log import log_failure
+from app.core.common.tracing import traced
 from app.modules.project.models.projectModel import Project
 from app.modules.project.models.projectSchemas import (
     ProjectCreateRequest,
@@ -8,10 +12,30 @@ from app.modules.project.models.projectSchemas import (
     ProjectUpdateRequest,
 )
 from app.modules.project.service.projectService import ProjectService
-from app.modules.sites.models.siteSchemas import SiteResponse
+from app.modules.sites.controller.siteController import SiteController
+from app.modules.sites.models.siteSchemas import GeometryFormat
+from app.modules.users.models.userModel import UserSummary
+
+logger = logging.getLogger(__name__)
 
 
+@traced
 class ProjectController:
+    @staticmethod
+    def project_payload(project, include=(), stats=None):
+        payload = ProjectResponse.from_orm(project).dict()
+        if stats is not None:
+            payload["sites_added_total"] = stats["total"]
+            payload["site_stats"] = stats
+        for name in include or ():
+            # eager loaded by the repo, so this never hits the database
+            if name == "sites":
+                payload["sites"] = SiteController.serialize_sites(project.sites)
+                continue
+            related = getattr(project, name)
+            payload[name] = UserSummary.from_orm(related) if related else None
+        return payload
+
     @staticmethod
     async def create_project(
         session: AsyncSession, request: ProjectCreateRequest, created_by: str
@@ -25,25 +49,88 @@ class ProjectController:
             )
             return ProjectResponse.from_orm(project)
         except Exception as e:
+            log_failure(logger, "Creating project", e)
             raise ValueError(f"Error creating project: {str(e)}")
 
     @staticmethod
-    async def get_project(p_id: str, session: AsyncSession):
+    async def get_project(
+        p_id: str,
+        session: AsyncSession,
+        fields=None,
+        include=(),
+        geometry_format=GeometryFormat.OBJECTS,
+    ):
         try:
-            data = await ProjectService.get_project(session, p_id)
+            data = await ProjectService.get_project(session, p_id, fields, include)
+            sites = SiteController.serialize_sites(
+                data["sites"], fields, geometry_format=geometry_format
+            )
             return {
-                "project": ProjectResponse.from_orm(data["project"]),
-                "sites": [SiteResponse.from_orm(s) for s in data["sites"]],
+                "project": ProjectController.project_payload(
+                    data["project"], include, data["stats"]
+                ),
+                "sites": sites,
             }
         except Exception as e:
+            log_failure(logger, "Fetching project", e)
             raise ValueError(f"Error fetching project: {str(e)}")
 
     @staticmethod
-    async def get_projects(session: AsyncSession, user_id: str = None):
+    async def get_project_version(p_id: str, session: AsyncSession):
+        return await ProjectService.get_project_version(session, p_id)
+
+    @staticmethod
+    async def get_changes(p_id: str, session: AsyncSession, cursor: str = None):
+        """None if the project doesn't exist; ValueError for a bad cursor"""
+        try:
+            data = await ProjectService.get_changes(session, p_id, cursor)
+        except Exception as e:
+            log_failure(logger, "Fetching project changes", e)
+            raise
+        if data is None:
+            return None
+        return {
+            "sites": SiteController.serialize_sites(data["sites"]),
+            "deleted": [t.site_id for t in data["deleted"]],
+            "full": data["full"],
+            "cursor": data["cursor"],
+        }
+
+    @staticmethod
+    async def get_overlaps(p_id: str, session: AsyncSession):
+        """None if the project doesn't exist"""
+        try:
+            overlaps = await ProjectService.get_overlaps(session, p_id)
+        except Exception as e:
+            log_failure(logger, "Checking overlaps", e)
+            raise
+        if overlaps is None:
+            return None
+        return {"overlaps": overlaps, "count": len(overlaps)}
+
+    @staticmethod
+    async def get_projects(
+        session: AsyncSession, user_id: str = None, fields=None, include=()
+    ):
         try:
-            projects = await ProjectService.list_projects(session, user_id)
-            return [ProjectResponse.from_orm(p) for p in projects]
+            projects = await ProjectService.list_projects(
+                session, user_id, fields, include
+            )
+            stats = await ProjectService.get_site_stats(
+                session, [p["p_id"] if fields else p.p_id for p in projects]
+            )
+            if fields:
+                rows = [dict(p) for p in projects]
+                if "sites_added_total" in fields:
+                    for row in rows:
+                        row["sites_added_total"] = stats[row["p_id"]]["total"]
+                return rows
+            return [
+                ProjectController.project_payload(p, include, stats[p.p_id])
+                for p in projects
+            ]
         except Exception as e:
+            log_failure(logger, "Fetching projects", e)
             raise ValueError(f"Error fetching projects: {str(e)}")
 
     @staticmethod
@@ -54,8 +141,10 @@ class ProjectController:
             project = await ProjectService.update_project(
                 session, p_id, updated_by=updated_by, **request.dict(exclude_unset=True)
             )
-            return ProjectResponse.from_orm(project)
+            stats = await ProjectService.get_site_stats(session, [p_id])
+            return ProjectController.project_payload(project, stats=stats[p_id])
         except Exception as e:
+            log_failure(logger, "Updating project", e)
             raise ValueError(f"Error updating project: {str(e)}")
 
     @staticmethod
@@ -64,4 +153,5 @@ class ProjectController:
             project = await ProjectService.delete_project(session, p_id)
             return ProjectResponse.from_orm(project)
         except Exception as e:
+            log_failure(logger, "Deleting project", e)
             raise ValueError(f"Error deleting project: {str(e)}")
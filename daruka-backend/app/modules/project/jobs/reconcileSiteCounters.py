@@ -0,0 +1,43 @@
+# app/modules/project/jobs/reconcileSiteCounters.py
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config.logging_setup import configure_logging
+from app.core.config.settings import get_settings
+from app.integration.db.postgres import unit_of_work
+from app.modules.project.repo.projectRepo import ProjectRepo
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile_once(p_id: str = None):
+    """Correct counter drift against COUNT(*) over sites."""
+    async with unit_of_work() as session:
+        fixed = await ProjectRepo.reconcile_site_counters(session, p_id)
+    if fixed is None:
+        logger.info("Site counter reconciliation already running elsewhere")
+    elif fixed:
+        logger.warning("Corrected site counter drift on %d project(s)", fixed)
+    return fixed
+
+
+async def reconcile_forever(interval: Optional[int] = None):
+    """Reconcile now (this also backfills counters for older projects), then
+    every `interval` seconds (SITE_COUNTER_RECONCILE_SECONDS by default;
+    0 there disables the in-process loop, e.g. when run from cron instead)."""
+    interval = interval or get_settings().site_counter_reconcile_seconds
+    while True:
+        try:
+            await reconcile_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Site counter reconciliation failed")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    # one-off run: python -m app.modules.project.jobs.reconcileSiteCounters
+    configure_logging(get_settings())
+    asyncio.run(reconcile_once())
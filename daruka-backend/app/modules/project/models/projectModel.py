@@ -1,13 +1,21 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
 from app.core.common.id_generator import generate_project_id
 from app.integration.db.postgres import Base
+from app.integration.db.search import search_vector_column, trigram_index
+from app.integration.db.tenancy import TenantScoped
 
 
-class Project(Base):
+class Project(TenantScoped, Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # a tenant's projects, optionally by creator (?user_id=)
+        Index("ix_projects_org_created_by", "org_id", "created_by"),
+        Index("ix_projects_search_vector", "search_vector", postgresql_using="gin"),
+        trigram_index("ix_projects_name_trgm", "name"),
+    )
 
     p_id = Column(String, primary_key=True, default=generate_project_id, index=True)
     name = Column(String(255), nullable=False)
@@ -16,8 +24,15 @@ class Project(Base):
     created_by = Column(String, ForeignKey("users.id"), nullable=False)
     updated_by = Column(String, ForeignKey("users.id"), nullable=True)
 
+    # legacy column, no longer maintained; the live figure is the sum of the
+    # project's ProjectSiteCounter shards
     sites_added_total = Column(Integer, default=0)
 
+    # maintained by Postgres; never loaded with the row
+    search_vector = deferred(
+        search_vector_column(("name", "A"), ("description", "B")), raiseload=True
+    )
+
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -28,7 +43,34 @@ class Project(Base):
         nullable=False,
     )
 
-    # relationships (optional, useful later)
-    creator = relationship("User", foreign_keys=[created_by])
-    updater = relationship("User", foreign_keys=[updated_by])
-    sites = relationship("Site", back_populates="project", cascade="all, delete-orphan")
+    # relationships never lazy load (that would be hidden per-row queries,
+    # or an error under AsyncSession); repos eager load them on request
+    creator = relationship("User", foreign_keys=[created_by], lazy="raise_on_sql")
+    updater = relationship("User", foreign_keys=[updated_by], lazy="raise_on_sql")
+    sites = relationship(
+        "Site",
+        back_populates="project",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql",
+    )
+
+
+class ProjectSiteCounter(Base):
+    """
+    One shard of a project's site counters; the totals are the shard sums.
+    Concurrent site writes pick one of SITE_COUNTER_SHARDS at random so they
+    rarely wait on each other's row lock.
+    """
+
+    __tablename__ = "project_site_counters"
+
+    project_id = Column(
+        String, ForeignKey("projects.p_id", ondelete="CASCADE"), primary_key=True
+    )
+    shard = Column(Integer, primary_key=True)
+
+    sites_total = Column(Integer, nullable=False, default=0)
+    active_sites = Column(Integer, nullable=False, default=0)
+    inactive_sites = Column(Integer, nullable=False, default=0)
+    area_total = Column(Float, nullable=False, default=0)
@@ -13,7 +13,12 @@ class ProjectCreateRequest(BaseModel):
 class ProjectUpdateRequest(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
-    sites_added_total: Optional[int] = None
+
+
+class ProjectSiteStats(BaseModel):
+    total: int = 0
+    by_status: Dict[str, int] = {}
+    total_area: float = 0.0
 
 
 class ProjectResponse(BaseModel):
@@ -23,6 +28,7 @@ class ProjectResponse(BaseModel):
     created_by: str
     updated_by: Optional[str]
     sites_added_total: Optional[int]
+    site_stats: Optional[ProjectSiteStats] = None
     created_at: datetime
     updated_at: datetime
 
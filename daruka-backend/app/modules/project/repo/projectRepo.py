@@ -1,31 +1,96 @@
 # app/modules/projects/repo/projectRepo.py
-from sqlalchemy import delete, update
+import random
+
+from sqlalchemy import delete, func, literal, or_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.core.common.tracing import traced
+from app.core.config.settings import get_settings
+from app.modules.project.models.projectModel import Project, ProjectSiteCounter
+from app.modules.sites.models.siteModal import Site, SiteAnalyticsHistory, SiteStatus
 
-from app.modules.project.models.projectModel import Project
+COUNTER_COLUMNS = ("sites_total", "active_sites", "inactive_sites", "area_total")
+# pg_try_advisory_xact_lock key, so only one worker reconciles at a time
+RECONCILE_LOCK_KEY = 0x5173C0
 
 
+@traced
 class ProjectRepo:
+    # columns a client may ask for with ?fields=
+    FIELDS = tuple(
+        name for name in Project.__table__.columns.keys() if name != "search_vector"
+    )
+    # relationships a client may expand with ?include=. Users are joined
+    # into the main SELECT, sites come in one extra SELECT ... IN (...), so
+    # the query count is fixed whatever the number of rows
+    INCLUDES = {
+        "creator": lambda: joinedload(Project.creator),
+        "updater": lambda: joinedload(Project.updater),
+        "sites": lambda: selectinload(Project.sites),
+    }
+
+    @staticmethod
+    def _load_options(include=()):
+        return [ProjectRepo.INCLUDES[name]() for name in include or ()]
+
     @staticmethod
     async def create_project(session: AsyncSession, project: Project):
         session.add(project)
-        await session.commit()
+        await session.flush()
         await session.refresh(project)
         return project
 
     @staticmethod
-    async def get_project_by_id(session: AsyncSession, p_id: str):
-        result = await session.execute(select(Project).where(Project.p_id == p_id))
+    async def get_project_by_id(session: AsyncSession, p_id: str, include=()):
+        result = await session.execute(
+            select(Project)
+            .options(*ProjectRepo._load_options(include))
+            .where(Project.p_id == p_id)
+        )
         return result.scalar_one_or_none()
 
     @staticmethod
-    async def get_all_projects(session: AsyncSession, user_id: str = None):
-        query = select(Project)
+    async def project_exists(session: AsyncSession, p_id: str) -> bool:
+        result = await session.execute(select(Project.p_id).where(Project.p_id == p_id))
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def get_project_version(session: AsyncSession, p_id: str):
+        """
+        Validator for a project together with its sites, in one round-trip.
+        None if the project doesn't exist.
+        """
+        site_count = (
+            select(func.count(Site.id)).where(Site.project_id == p_id).scalar_subquery()
+        )
+        sites_updated_at = (
+            select(func.max(Site.updated_at))
+            .where(Site.project_id == p_id)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            select(Project.updated_at, site_count, sites_updated_at).where(
+                Project.p_id == p_id
+            )
+        )
+        row = result.one_or_none()
+        return (p_id, *row) if row else None
+
+    @staticmethod
+    async def get_all_projects(
+        session: AsyncSession, user_id: str = None, fields=None, include=()
+    ):
+        if fields:
+            query = select(*(getattr(Project, name) for name in fields))
+        else:
+            query = select(Project).options(*ProjectRepo._load_options(include))
         if user_id:
             query = query.where(Project.created_by == user_id)
         result = await session.execute(query)
-        return result.scalars().all()
+        return result.mappings().all() if fields else result.scalars().all()
 
     @staticmethod
     async def update_project(session: AsyncSession, p_id: str, **kwargs):
@@ -36,13 +101,153 @@ class ProjectRepo:
             .execution_options(synchronize_session="fetch")
         )
         await session.execute(query)
-        await session.commit()
         return await ProjectRepo.get_project_by_id(session, p_id)
 
     @staticmethod
     async def delete_project(session: AsyncSession, p_id: str):
-        project = await ProjectRepo.get_project_by_id(session, p_id)
-        if project:
-            await session.delete(project)
-            await session.commit()
-        return project
+        """
+        Delete a project and everything under it with set-based statements.
+        Children are removed first so this also works on databases created
+        before the foreign keys had ON DELETE CASCADE.
+        """
+        await session.execute(
+            delete(SiteAnalyticsHistory)
+            .where(SiteAnalyticsHistory.project_id == p_id)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(
+            delete(Site)
+            .where(Site.project_id == p_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(
+            delete(Project)
+            .where(Project.p_id == p_id)
+            .returning(Project)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    def _accumulate(stmt):
+        """Upsert that adds the inserted values onto an existing shard row"""
+        return stmt.on_conflict_do_update(
+            index_elements=[ProjectSiteCounter.project_id, ProjectSiteCounter.shard],
+            set_={
+                name: getattr(ProjectSiteCounter, name) + getattr(stmt.excluded, name)
+                for name in COUNTER_COLUMNS
+            },
+        )
+
+    @staticmethod
+    async def bump_site_counters(
+        session: AsyncSession,
+        project_id: str,
+        sites: int = 0,
+        active: int = 0,
+        inactive: int = 0,
+        area: float = 0.0,
+    ):
+        """
+        Add deltas to one randomly picked counter shard of the project.
+        Runs in the caller's transaction, which is responsible for committing.
+        """
+        if not (sites or active or inactive or area):
+            return
+
+        stmt = insert(ProjectSiteCounter).values(
+            project_id=project_id,
+            shard=random.randrange(get_settings().site_counter_shards),
+            sites_total=sites,
+            active_sites=active,
+            inactive_sites=inactive,
+            area_total=area,
+        )
+        await session.execute(ProjectRepo._accumulate(stmt))
+
+    @staticmethod
+    async def get_site_stats(session: AsyncSession, p_ids):
+        """Sum the counter shards of the given projects: {p_id: {column: total}}"""
+        if not p_ids:
+            return {}
+        result = await session.execute(
+            select(
+                ProjectSiteCounter.project_id,
+                *(
+                    func.sum(getattr(ProjectSiteCounter, name)).label(name)
+                    for name in COUNTER_COLUMNS
+                ),
+            )
+            .where(ProjectSiteCounter.project_id.in_(list(p_ids)))
+            .group_by(ProjectSiteCounter.project_id)
+        )
+        return {row.project_id: row._asdict() for row in result}
+
+    @staticmethod
+    async def reconcile_site_counters(session: AsyncSession, p_id: str = None):
+        """
+        Compare the counters against COUNT(*) over sites and write the
+        difference into shard 0 as one more delta. Everything is read from a
+        single statement snapshot and applied additively, so site writes
+        running at the same time are neither lost nor counted twice.
+        Returns the number of projects corrected, or None if another
+        reconciliation is already running.
+        """
+        locked = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_KEY))
+        )
+        if not locked:
+            return None
+
+        exact = select(
+            Site.project_id.label("project_id"),
+            func.count().label("sites_total"),
+            func.count().filter(Site.status == SiteStatus.ACTIVE).label("active_sites"),
+            func.count()
+            .filter(Site.status == SiteStatus.INACTIVE)
+            .label("inactive_sites"),
+            func.coalesce(func.sum(Site.area), 0.0).label("area_total"),
+        ).group_by(Site.project_id)
+        counted = select(
+            ProjectSiteCounter.project_id.label("project_id"),
+            *(
+                func.sum(getattr(ProjectSiteCounter, name)).label(name)
+                for name in COUNTER_COLUMNS
+            ),
+        ).group_by(ProjectSiteCounter.project_id)
+        projects = select(Project.p_id)
+        if p_id:
+            exact = exact.where(Site.project_id == p_id)
+            counted = counted.where(ProjectSiteCounter.project_id == p_id)
+            projects = projects.where(Project.p_id == p_id)
+        exact, counted, projects = (
+            exact.subquery(),
+            counted.subquery(),
+            projects.subquery(),
+        )
+
+        drift = {
+            name: func.coalesce(getattr(exact.c, name), 0)
+            - func.coalesce(getattr(counted.c, name), 0)
+            for name in COUNTER_COLUMNS
+        }
+        drifted = (
+            select(projects.c.p_id, literal(0), *drift.values())
+            .outerjoin(exact, exact.c.project_id == projects.c.p_id)
+            .outerjoin(counted, counted.c.project_id == projects.c.p_id)
+            .where(
+                or_(
+                    drift["sites_total"] != 0,
+                    drift["active_sites"] != 0,
+                    drift["inactive_sites"] != 0,
+                    # float sums of +/- deltas pick up rounding noise
+                    func.abs(drift["area_total"]) > 1e-6,
+                )
+            )
+        )
+
+        stmt = insert(ProjectSiteCounter).from_select(
+            ["project_id", "shard", *COUNTER_COLUMNS], drifted
+        )
+        result = await session.execute(ProjectRepo._accumulate(stmt))
+        return result.rowcount
@@ -1,11 +1,15 @@
 # app/modules/projects/routes/projectRouter.py
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.common.conditional import check_not_modified
+from app.core.common.projection import fields_query
+from app.core.common.request_context import TimedRoute
 from app.core.security.auth_dependency import get_current_user
-from app.integration.db.postgres import get_db
+from app.core.security.rate_limit import rate_limit
+from app.integration.db.postgres import db_session, get_db
 from app.modules.project.controller.projectController import ProjectController
 from app.modules.project.models.projectSchemas import (
     ApiResponse,
@@ -13,19 +17,41 @@ from app.modules.project.models.projectSchemas import (
     ProjectResponse,
     ProjectUpdateRequest,
 )
+from app.modules.project.repo.projectRepo import ProjectRepo
+from app.modules.sites.repo.siteRepo import SiteRepo
+from app.modules.sites.routes.siteRouter import geometry_format_query
+
+router = APIRouter(
+    prefix="/projects",
+    tags=["projects"],
+    dependencies=[Depends(rate_limit())],
+    route_class=TimedRoute,
+)
 
-router = APIRouter(prefix="/projects", tags=["projects"])
+project_fields = fields_query(ProjectRepo.FIELDS, always=("p_id",))
+site_fields = fields_query(SiteRepo.FIELDS, always=("id",))
+project_include = fields_query(ProjectRepo.INCLUDES, alias="include")
+# sites are always embedded in the single-project response
+project_detail_include = fields_query(("creator", "updater"), alias="include")
+# reads that embed every site of a project
+project_read_db = db_session(
+    statement_timeout_ms=5000, max_rows=20000, label="projects.read"
+)
 
 
 @router.get("/", response_model=ApiResponse, status_code=status.HTTP_200_OK)
 async def fetch_projects(
     user_id: Optional[str] = Query(None, description="Filter projects by user_id"),
+    fields=Depends(project_fields),
+    include=Depends(project_include),
     session: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
     """Fetch all projects or projects for a given user"""
     try:
-        projects = await ProjectController.get_projects(session, user_id)
+        projects = await ProjectController.get_projects(
+            session, user_id, fields, include
+        )
         return ApiResponse(
             success=True,
             message="Projects fetched successfully",
@@ -59,15 +85,32 @@ async def create_project(
         raise HTTPException(status_code=500, detail=f"Error creating project: {str(e)}")
 
 
-@router.get("/{p_id}", response_model=ApiResponse, status_code=status.HTTP_200_OK)
+@router.get(
+    "/{p_id}",
+    response_model=ApiResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("heavy", per_minute=60, max_concurrent=8))],
+)
 async def get_project(
     p_id: str,
-    session: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    fields=Depends(site_fields),
+    include=Depends(project_detail_include),
+    geometry_format=Depends(geometry_format_query),
+    session: AsyncSession = Depends(project_read_db),
     current_user: dict = Depends(get_current_user),
 ):
-    """Get project by project ID (with its sites)"""
+    """Get project by project ID (with its sites, optionally projected)"""
     try:
-        project_data = await ProjectController.get_project(p_id, session)
+        version = await ProjectController.get_project_version(p_id, session)
+        not_modified = check_not_modified(request, response, version)
+        if not_modified:
+            return not_modified
+
+        project_data = await ProjectController.get_project(
+            p_id, session, fields, include, geometry_format
+        )
 
         if not project_data:
             raise HTTPException(status_code=404, detail="Project not found")
@@ -87,6 +130,79 @@ async def get_project(
         )
 
 
+@router.get(
+    "/{p_id}/changes", response_model=ApiResponse, status_code=status.HTTP_200_OK
+)
+async def get_project_changes(
+    p_id: str,
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the previous sync; omit for a full sync"
+    ),
+    session: AsyncSession = Depends(project_read_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Sites created, updated or deleted in a project since the given cursor.
+    When "full" is true the response lists every site: replace, don't merge.
+    """
+    try:
+        changes = await ProjectController.get_changes(p_id, session, cursor)
+        if changes is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return ApiResponse(
+            success=True,
+            message="Project changes fetched successfully",
+            data=changes,
+        )
+    except HTTPException as e:
+        raise e
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching project changes: {str(e)}",
+        )
+
+
+@router.get(
+    "/{p_id}/overlaps",
+    response_model=ApiResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("heavy", per_minute=30, max_concurrent=8))],
+)
+async def get_project_overlaps(
+    p_id: str,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(project_read_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Pairs of sites in a project that overlap or touch, with overlap area (m²)"""
+    try:
+        version = await ProjectController.get_project_version(p_id, session)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        not_modified = check_not_modified(request, response, version)
+        if not_modified:
+            return not_modified
+
+        overlaps = await ProjectController.get_overlaps(p_id, session)
+        if overlaps is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return ApiResponse(
+            success=True,
+            message="Project overlaps fetched successfully",
+            data=overlaps,
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error checking overlaps: {str(e)}"
+        )
+
+
 @router.put("/{p_id}", response_model=ApiResponse, status_code=status.HTTP_200_OK)
 async def update_project(
     p_id: str,
@@ -1,12 +1,20 @@
 # app/modules/projects/service/projectService.py
+from datetime import datetime, timedelta, timezone
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.common.cursor import decode_cursor, encode_cursor
 from app.core.common.id_generator import generate_project_id
+from app.core.common.tracing import traced
+from app.core.config.settings import get_settings
 from app.modules.project.models.projectModel import Project
 from app.modules.project.repo.projectRepo import ProjectRepo
+from app.modules.sites.models.siteModal import SiteStatus
 from app.modules.sites.repo.siteRepo import SiteRepo
+from app.modules.sites.service.siteService import SiteService
 
 
+@traced
 class ProjectService:
     @staticmethod
     async def create_project(
@@ -25,23 +33,99 @@ class ProjectService:
         return await ProjectRepo.create_project(session, project)
 
     @staticmethod
-    async def get_project(session: AsyncSession, p_id: str):
-        # fetch project
-        project = await ProjectRepo.get_project_by_id(session, p_id)
-        if not project:
-            raise ValueError("Project not found")
-
-        # fetch related sites
-        sites = await SiteRepo.get_sites_by_project(session, project_id=p_id)
+    async def get_project(session: AsyncSession, p_id: str, fields=None, include=()):
+        if fields:
+            # projected sites are a column-only SELECT of their own
+            project = await ProjectRepo.get_project_by_id(session, p_id, include)
+            if not project:
+                raise ValueError("Project not found")
+            sites = await SiteRepo.get_sites_by_project(
+                session, project_id=p_id, fields=fields
+            )
+        else:
+            # project (+ joined users) and all of its sites in two queries
+            project = await ProjectRepo.get_project_by_id(
+                session, p_id, include={*(include or ()), "sites"}
+            )
+            if not project:
+                raise ValueError("Project not found")
+            sites = project.sites
 
         return {
             "project": project,
             "sites": sites,
+            "stats": (await ProjectService.get_site_stats(session, [p_id]))[p_id],
         }
 
     @staticmethod
-    async def list_projects(session: AsyncSession, user_id: str = None):
-        return await ProjectRepo.get_all_projects(session, user_id)
+    async def get_site_stats(session: AsyncSession, p_ids):
+        """Site count, counts by status and total area per project."""
+        totals = await ProjectRepo.get_site_stats(session, p_ids)
+        stats = {}
+        for p_id in p_ids:
+            row = totals.get(p_id, {})
+            stats[p_id] = {
+                "total": row.get("sites_total", 0),
+                "by_status": {
+                    SiteStatus.ACTIVE.value: row.get("active_sites", 0),
+                    SiteStatus.INACTIVE.value: row.get("inactive_sites", 0),
+                },
+                "total_area": row.get("area_total", 0.0),
+            }
+        return stats
+
+    @staticmethod
+    async def get_project_version(session: AsyncSession, p_id: str):
+        return await ProjectRepo.get_project_version(session, p_id)
+
+    @staticmethod
+    async def get_changes(session: AsyncSession, p_id: str, cursor: str = None):
+        """
+        Sites written and deleted since `cursor` (all sites if None), or None
+        if the project doesn't exist. A cursor older than the tombstone
+        retention gets a full sync ("full": True), as deletes may be pruned.
+        Sites changed around the cursor may be handed out again.
+        """
+        now = int(datetime.now(timezone.utc).timestamp())
+        # (sync horizon, unix time the cursor was issued)
+        since, issued_at = decode_cursor(cursor, 2) or (None, now)
+        if not all(isinstance(value, int) for value in (since or 0, issued_at)):
+            raise ValueError("Invalid cursor")
+        retention = timedelta(days=get_settings().site_tombstone_retention_days)
+        if now - issued_at > retention.total_seconds():
+            since = None
+
+        if not await ProjectRepo.project_exists(session, p_id):
+            return None
+        # before the reads, so nothing committed meanwhile can be skipped
+        horizon = await SiteRepo.get_sync_horizon(session)
+        sites = await SiteRepo.get_sites_changed_since(session, p_id, since)
+        deleted = (
+            await SiteRepo.get_tombstones_since(session, p_id, since)
+            if since is not None
+            else []
+        )
+
+        return {
+            "sites": sites,
+            "deleted": deleted,
+            "full": since is None,
+            "cursor": encode_cursor(horizon, now),
+        }
+
+    @staticmethod
+    async def get_overlaps(session: AsyncSession, p_id: str):
+        """Every pair of intersecting sites, or None if there's no such project"""
+        if not await ProjectRepo.project_exists(session, p_id):
+            return None
+        index = await SiteService.project_index(session, p_id)
+        return index.all_conflicts()
+
+    @staticmethod
+    async def list_projects(
+        session: AsyncSession, user_id: str = None, fields=None, include=()
+    ):
+        return await ProjectRepo.get_all_projects(session, user_id, fields, include)
 
     @staticmethod
     async def update_project(
@@ -0,0 +1,59 @@
+# app/modules/realtime/routes/realtimeRouter.py
+import asyncio
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+
+from app.integration.db.postgres import new_session
+from app.integration.db.tenancy import tenant_scope
+from app.integration.jwt.jwt_handler import JWTHandler
+from app.integration.realtime.broker import hub
+from app.modules.project.repo.projectRepo import ProjectRepo
+
+router = APIRouter(prefix="/ws", tags=["realtime"])
+
+
+@router.websocket("/projects/{p_id}")
+async def project_events(
+    websocket: WebSocket,
+    p_id: str,
+    token: str = Query(..., description="Access token (browsers can't set headers)"),
+):
+    """Push site and analytics change events for a project (protected)"""
+    try:
+        payload = JWTHandler.verify_token(token, token_type="access")
+        if not payload.get("org_id"):
+            raise ValueError("Token has no organization")
+        # only projects of the caller's organization
+        with tenant_scope(payload["org_id"]):
+            async with new_session() as session:
+                if not await ProjectRepo.project_exists(session, p_id):
+                    raise ValueError("Project not found")
+    except Exception:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = hub.subscribe(p_id)
+
+    async def pump():
+        try:
+            while True:
+                batch = await subscription.next_batch()
+                await websocket.send_json({"events": batch})
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            return  # client went away mid-send
+
+    async def drain():
+        # we don't expect client messages; this just notices the disconnect
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(drain())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(p_id, subscription)
@@ -0,0 +1,26 @@
+# app/modules/search/controller/searchController.py
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.common.tracing import traced
+from app.modules.search.models.searchSchemas import SearchHit
+from app.modules.search.service.searchService import SearchService
+
+
+@traced
+class SearchController:
+    @staticmethod
+    async def search(
+        session: AsyncSession,
+        q: str,
+        project_id: str = None,
+        user_id: str = None,
+        limit: int = 20,
+        cursor: str = None,
+    ):
+        data = await SearchService.search(
+            session, q, project_id, user_id, limit, cursor
+        )
+        return {
+            "results": [SearchHit(**hit).dict() for hit in data["hits"]],
+            "next_cursor": data["next_cursor"],
+        }
@@ -0,0 +1,22 @@
+# app/modules/search/models/searchSchemas.py
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    kind: str  # "site" or "project"
+    id: str
+    name: str
+    description: Optional[str]
+    project_id: str
+    rank: float
+
+    class Config:
+        orm_mode = True
+
+
+class ApiResponse(BaseModel):
+    success: bool
+    message: str
+    data: Optional[Dict] = None
@@ -0,0 +1,98 @@
+# app/modules/search/repo/searchRepo.py
+from sqlalchemy import and_, func, literal, or_, text, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.common.tracing import traced
+from app.integration.db.search import TS_CONFIG
+from app.modules.project.models.projectModel import Project
+from app.modules.sites.models.siteModal import Site
+
+
+@traced
+class SearchRepo:
+    # whether pg_trgm is installed; looked up once per process
+    _trigram = None
+
+    @staticmethod
+    async def has_trigram(session: AsyncSession) -> bool:
+        if SearchRepo._trigram is None:
+            SearchRepo._trigram = bool(
+                await session.scalar(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                )
+            )
+        return SearchRepo._trigram
+
+    @staticmethod
+    def _ranked(model, q: str, tsquery, fuzzy: bool):
+        """Match condition and rank: full-text, plus name similarity if enabled"""
+        match = model.search_vector.op("@@")(tsquery)
+        rank = func.ts_rank(model.search_vector, tsquery)
+        if fuzzy:
+            # `%` is served by the trigram index on name
+            match = or_(match, model.name.op("%")(q))
+            rank = func.greatest(rank, func.similarity(model.name, q))
+        return match, rank
+
+    @staticmethod
+    async def search(
+        session: AsyncSession,
+        q: str,
+        project_id: str = None,
+        user_id: str = None,
+        limit: int = 20,
+        after=None,
+    ):
+        """
+        Sites and projects matching `q`, best first, keyset paginated on
+        (rank, kind, id). `after` is the key of the last row already seen.
+        Each side of the union is an index scan on its search indexes, so
+        the cost follows the number of matches, not the table size.
+        """
+        fuzzy = await SearchRepo.has_trigram(session)
+        tsquery = func.websearch_to_tsquery(TS_CONFIG, q)
+
+        site_match, site_rank = SearchRepo._ranked(Site, q, tsquery, fuzzy)
+        sites = select(
+            literal("site").label("kind"),
+            Site.id.label("id"),
+            Site.name.label("name"),
+            Site.description.label("description"),
+            Site.project_id.label("project_id"),
+            site_rank.label("rank"),
+        ).where(site_match)
+
+        project_match, project_rank = SearchRepo._ranked(Project, q, tsquery, fuzzy)
+        projects = select(
+            literal("project").label("kind"),
+            Project.p_id.label("id"),
+            Project.name.label("name"),
+            Project.description.label("description"),
+            Project.p_id.label("project_id"),
+            project_rank.label("rank"),
+        ).where(project_match)
+
+        if project_id:
+            sites = sites.where(Site.project_id == project_id)
+            projects = projects.where(Project.p_id == project_id)
+        if user_id:
+            sites = sites.where(Site.created_by == user_id)
+            projects = projects.where(Project.created_by == user_id)
+
+        hits = union_all(sites, projects).subquery("hits")
+        query = select(hits).order_by(hits.c.rank.desc(), hits.c.kind, hits.c.id)
+        if after:
+            rank, kind, id_ = after
+            query = query.where(
+                or_(
+                    hits.c.rank < rank,
+                    and_(
+                        hits.c.rank == rank,
+                        tuple_(hits.c.kind, hits.c.id) > tuple_(kind, id_),
+                    ),
+                )
+            )
+
+        result = await session.execute(query.limit(limit))
+        return result.mappings().all()
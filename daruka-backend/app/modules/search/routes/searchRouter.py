@@ -0,0 +1,48 @@
+# app/modules/search/routes/searchRouter.py
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.common.error_log import log_failure
+from app.core.common.request_context import TimedRoute
+from app.core.security.auth_dependency import get_current_user
+from app.core.security.rate_limit import rate_limit
+from app.integration.db.postgres import db_session
+from app.modules.search.controller.searchController import SearchController
+from app.modules.search.models.searchSchemas import ApiResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/search",
+    tags=["search"],
+    dependencies=[Depends(rate_limit())],
+    route_class=TimedRoute,
+)
+
+search_db = db_session(statement_timeout_ms=3000, max_rows=5000, label="search")
+
+
+@router.get("/", response_model=ApiResponse, status_code=status.HTTP_200_OK)
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    project_id: Optional[str] = Query(None, description="Only within this project"),
+    user_id: Optional[str] = Query(None, description="Only items created by user"),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor of previous page"),
+    session: AsyncSession = Depends(search_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Full-text and fuzzy search over sites and projects"""
+    try:
+        data = await SearchController.search(
+            session, q, project_id, user_id, limit, cursor
+        )
+        return ApiResponse(success=True, message="Search results", data=data)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        log_failure(logger, "Searching", e)
+        raise HTTPException(status_code=500, detail=f"Error searching: {str(e)}")
@@ -0,0 +1,36 @@
+# app/modules/search/service/searchService.py
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.common.cursor import decode_cursor, encode_cursor
+from app.core.common.tracing import traced
+from app.modules.search.repo.searchRepo import SearchRepo
+
+
+@traced
+class SearchService:
+    @staticmethod
+    async def search(
+        session: AsyncSession,
+        q: str,
+        project_id: str = None,
+        user_id: str = None,
+        limit: int = 20,
+        cursor: str = None,
+    ):
+        q = (q or "").strip()
+        if len(q) < 2:
+            raise ValueError("Search query must be at least 2 characters long")
+
+        after = decode_cursor(cursor, 3)
+        # one extra row tells us whether there is a next page
+        hits = await SearchRepo.search(
+            session, q, project_id, user_id, limit + 1, after
+        )
+
+        next_cursor = None
+        if len(hits) > limit:
+            hits = hits[:limit]
+            last = hits[-1]
+            next_cursor = encode_cursor(last["rank"], last["kind"], last["id"])
+
+        return {"hits": hits, "next_cursor": next_cursor}
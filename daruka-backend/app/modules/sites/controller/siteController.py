@@ -1,22 +1,94 @@
+import logging
+
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.common.error_log import log_failure
+from app.core.common.request_context import timed
+from app.core.common.tracing import traced
 from app.core.security.auth_dependency import get_current_user
 from app.integration.db.postgres import get_db
+from app.modules.project.models.projectSchemas import ProjectResponse
 from app.modules.sites.models.siteSchemas import (
     ApiResponse,
     ChartMetric,
     ChartMetricPoint,
+    GeometryFormat,
     SiteAnalyticsHistoryResponse,
     SiteAnalyticsRecord,
     SiteCreate,
-    SiteResponse,
+    SiteRecord,
     SiteUpdate,
 )
 from app.modules.sites.service.siteService import SiteService
+from app.modules.users.models.userModel import UserSummary
+
+logger = logging.getLogger(__name__)
+
+# schema used for each ?include= expansion
+INCLUDE_SCHEMAS = {
+    "creator": UserSummary,
+    "updater": UserSummary,
+    "project": ProjectResponse,
+}
 
 
+@traced
 class SiteController:
+    @staticmethod
+    def encode_geometry(coords, geometry_format=GeometryFormat.OBJECTS):
+        """(lon, lat) array -> the representation asked for with ?geometry_format="""
+        if coords is None:
+            return None
+        from app.core.geo import wkb
+        from app.core.geo.polyline import encode_polyline
+
+        if geometry_format == GeometryFormat.POLYLINE:
+            return encode_polyline(coords[:, ::-1])
+        if geometry_format == GeometryFormat.FLAT:
+            return coords[:, ::-1].ravel().tolist()
+        return wkb.array_to_points(coords)
+
+    @staticmethod
+    def site_payload(site, include=(), geometry_format=GeometryFormat.OBJECTS):
+        # the outline skips pydantic: it is decoded straight from WKB
+        payload = SiteRecord.from_orm(site).dict()
+        payload["geolocation"] = SiteController.encode_geometry(
+            site.coordinates, geometry_format
+        )
+        for name in include or ():
+            # eager loaded by the repo, so this never hits the database
+            related = getattr(site, name)
+            payload[name] = (
+                INCLUDE_SCHEMAS[name].from_orm(related).dict() if related else None
+            )
+        return payload
+
+    @staticmethod
+    def serialize_sites(
+        sites, fields=None, include=(), geometry_format=GeometryFormat.OBJECTS
+    ):
+        """Projected rows are already plain column mappings; skip the schema"""
+        with timed("serialize"):
+            if not fields:
+                return [
+                    SiteController.site_payload(site, include, geometry_format)
+                    for site in sites
+                ]
+
+            rows = [dict(row) for row in sites]
+            if "geolocation" in fields:
+                from app.core.geo import wkb
+
+                for row in rows:
+                    coords = wkb.site_coordinates(
+                        row.pop("geometry"), row.pop("legacy_geolocation")
+                    )
+                    row["geolocation"] = SiteController.encode_geometry(
+                        coords, geometry_format
+                    )
+            return rows
+
     @staticmethod
     async def create_site(
         session: AsyncSession, data: SiteCreate, current_user_id: str
@@ -26,9 +98,13 @@ class SiteController:
             return ApiResponse(
                 success=True,
                 message="Site created successfully",
-                data={"site": SiteResponse.from_orm(site).dict()},
+                data={
+                    "site": SiteController.site_payload(site),
+                    "overlaps": await SiteService.site_overlaps(session, site),
+                },
             )
         except Exception as e:
+            log_failure(logger, "Creating site", e)
             return ApiResponse(success=False, message=f"Error creating site: {str(e)}")
 
     @staticmethod
@@ -39,12 +115,14 @@ class SiteController:
             site = await SiteService.update_site(
                 session, site_id, data, current_user_id
             )
+            payload = {"site": SiteController.site_payload(site)}
+            if data.geolocation:
+                payload["overlaps"] = await SiteService.site_overlaps(session, site)
             return ApiResponse(
-                success=True,
-                message="Site updated successfully",
-                data={"site": SiteResponse.from_orm(site).dict()},
+                success=True, message="Site updated successfully", data=payload
             )
         except Exception as e:
+            log_failure(logger, "Updating site", e)
             return ApiResponse(success=False, message=f"Error updating site: {str(e)}")
 
     @staticmethod
@@ -57,42 +135,89 @@ class SiteController:
                 data={"site_id": site_id},
             )
         except Exception as e:
+            log_failure(logger, "Deleting site", e)
             return ApiResponse(success=False, message=f"Error deleting site: {str(e)}")
 
     @staticmethod
-    async def get_site_by_id(session: AsyncSession, site_id: str):
+    async def get_site_by_id(
+        session: AsyncSession,
+        site_id: str,
+        include=(),
+        geometry_format=GeometryFormat.OBJECTS,
+    ):
         try:
-            site = await SiteService.get_site_by_id(session, site_id)
+            site = await SiteService.get_site_by_id(session, site_id, include)
             return ApiResponse(
                 success=True,
                 message="Site fetched successfully",
-                data={"site": SiteResponse.from_orm(site).dict()},
+                data={
+                    "site": SiteController.site_payload(site, include, geometry_format)
+                },
             )
         except Exception as e:
+            log_failure(logger, "Fetching site", e)
             return ApiResponse(success=False, message=f"Error fetching site: {str(e)}")
 
     @staticmethod
-    async def get_sites_by_project(session: AsyncSession, project_id: str):
+    async def get_site_version(session: AsyncSession, site_id: str):
+        return await SiteService.get_site_version(session, site_id)
+
+    @staticmethod
+    async def get_project_sites_version(session: AsyncSession, project_id: str):
+        return await SiteService.get_project_sites_version(session, project_id)
+
+    @staticmethod
+    async def get_site_analytics_history_version(session: AsyncSession, site_id: str):
+        return await SiteService.get_site_analytics_history_version(session, site_id)
+
+    @staticmethod
+    async def get_sites_by_project(
+        session: AsyncSession,
+        project_id: str,
+        fields=None,
+        include=(),
+        geometry_format=GeometryFormat.OBJECTS,
+    ):
         try:
-            sites = await SiteService.get_sites_by_project(session, project_id)
+            sites = await SiteService.get_sites_by_project(
+                session, project_id, fields, include
+            )
             return ApiResponse(
                 success=True,
                 message="Sites fetched successfully",
-                data={"sites": [SiteResponse.from_orm(site).dict() for site in sites]},
+                data={
+                    "sites": SiteController.serialize_sites(
+                        sites, fields, include, geometry_format
+                    )
+                },
             )
         except Exception as e:
+            log_failure(logger, "Fetching sites", e)
             return ApiResponse(success=False, message=f"Error fetching sites: {str(e)}")
 
     @staticmethod
-    async def get_sites_by_user(session: AsyncSession, user_id: str):
+    async def get_sites_by_user(
+        session: AsyncSession,
+        user_id: str,
+        fields=None,
+        include=(),
+        geometry_format=GeometryFormat.OBJECTS,
+    ):
         try:
-            sites = await SiteService.get_sites_by_user(session, user_id)
+            sites = await SiteService.get_sites_by_user(
+                session, user_id, fields, include
+            )
             return ApiResponse(
                 success=True,
                 message="Sites fetched successfully",
-                data={"sites": [SiteResponse.from_orm(site).dict() for site in sites]},
+                data={
+                    "sites": SiteController.serialize_sites(
+                        sites, fields, include, geometry_format
+                    )
+                },
             )
         except Exception as e:
+            log_failure(logger, "Fetching sites", e)
             return ApiResponse(success=False, message=f"Error fetching sites: {str(e)}")
 
     @staticmethod
@@ -109,24 +234,63 @@ class SiteController:
                 data=response_data.dict(),
             )
         except Exception as e:
+            log_failure(logger, "Fetching analytics history", e)
             return ApiResponse(
                 success=False,
                 message=f"Error fetching analytics history: {str(e)}",
             )
 
+    @staticmethod
+    async def query_sites(
+        session: AsyncSession,
+        filters=None,
+        sort=(),
+        skip: int = 0,
+        limit: int = 10,
+        fields=None,
+        include=(),
+        geometry_format=GeometryFormat.OBJECTS,
+    ):
+        try:
+            sites = await SiteService.query_sites(
+                session, filters, sort, skip, limit, fields, include
+            )
+            return ApiResponse(
+                success=True,
+                message="Sites fetched successfully",
+                data={
+                    "sites": SiteController.serialize_sites(
+                        sites, fields, include, geometry_format
+                    )
+                },
+            )
+        except Exception as e:
+            log_failure(logger, "Fetching sites", e)
+            return ApiResponse(success=False, message=f"Error fetching sites: {str(e)}")
+
     @staticmethod
     async def get_all_sites(
-        session: AsyncSession, skip: int = 0, limit: int = 10, current_user=None
+        session: AsyncSession,
+        skip: int = 0,
+        limit: int = 10,
+        current_user=None,
+        fields=None,
+        include=(),
+        geometry_format=GeometryFormat.OBJECTS,
     ):
         try:
             sites = await SiteService.get_all_sites(
-                session=session, skip=skip, limit=limit
+                session=session, skip=skip, limit=limit, fields=fields, include=include
             )
-            site_records = [SiteResponse.from_orm(site) for site in sites]
             return ApiResponse(
                 success=True,
                 message="Sites fetched successfully",
-                data={"sites": [s.dict() for s in site_records]},
+                data={
+                    "sites": SiteController.serialize_sites(
+                        sites, fields, include, geometry_format
+                    )
+                },
             )
         except Exception as e:
+            log_failure(logger, "Fetching sites", e)
             return ApiResponse(success=False, message=f"Error fetching sites: {str(e)}")
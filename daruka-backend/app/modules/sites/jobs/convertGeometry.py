@@ -0,0 +1,31 @@
+# app/modules/sites/jobs/convertGeometry.py
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config.logging_setup import configure_logging
+from app.core.config.settings import get_settings
+from app.integration.db.postgres import unit_of_work
+from app.modules.sites.repo.siteRepo import SiteRepo
+
+logger = logging.getLogger(__name__)
+
+
+async def convert_all(batch_size: Optional[int] = None):
+    """Move every legacy JSON outline into the WKB geometry column."""
+    batch_size = batch_size or get_settings().geometry_batch_size
+    total = 0
+    while True:
+        async with unit_of_work() as session:
+            converted = await SiteRepo.convert_legacy_geolocation(session, batch_size)
+        if not converted:
+            break
+        total += converted
+        logger.info("Converted %d site outlines to WKB", total)
+    return total
+
+
+if __name__ == "__main__":
+    # python -m app.modules.sites.jobs.convertGeometry
+    configure_logging(get_settings())
+    asyncio.run(convert_all())
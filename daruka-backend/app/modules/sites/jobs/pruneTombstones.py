@@ -0,0 +1,48 @@
+# app/modules/sites/jobs/pruneTombstones.py
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.config.logging_setup import configure_logging
+from app.core.config.settings import get_settings
+from app.integration.db.postgres import unit_of_work
+from app.modules.sites.repo.siteRepo import SiteRepo
+
+logger = logging.getLogger(__name__)
+
+# kept a day past the retention: a delete's deleted_at is taken when its
+# transaction starts, which can be a little before the horizon of a cursor
+# that still needs it
+_MARGIN = timedelta(days=1)
+
+
+async def prune_once() -> int:
+    """Delete tombstones no unexpired sync cursor can still need."""
+    retention = timedelta(days=get_settings().site_tombstone_retention_days)
+    before = datetime.now(timezone.utc) - retention - _MARGIN
+    async with unit_of_work() as session:
+        pruned = await SiteRepo.prune_tombstones(session, before)
+    if pruned:
+        logger.info("Pruned %d site tombstone(s)", pruned)
+    return pruned
+
+
+async def prune_forever(interval: Optional[int] = None):
+    """Prune now, then every `interval` seconds (SITE_TOMBSTONE_PRUNE_SECONDS;
+    0 there disables the in-process loop, e.g. when run from cron instead)."""
+    interval = interval or get_settings().site_tombstone_prune_seconds
+    while True:
+        try:
+            await prune_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Site tombstone pruning failed")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    # one-off run: python -m app.modules.sites.jobs.pruneTombstones
+    configure_logging(get_settings())
+    asyncio.run(prune_once())
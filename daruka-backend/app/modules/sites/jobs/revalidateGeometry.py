@@ -0,0 +1,57 @@
+# app/modules/sites/jobs/revalidateGeometry.py
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config.logging_setup import configure_logging
+from app.core.config.settings import get_settings
+from app.core.geo import wkb
+from app.core.geo.validation import clean_outline, needs_repair
+from app.integration.db.postgres import unit_of_work
+from app.modules.sites.repo.siteRepo import SiteRepo
+
+logger = logging.getLogger(__name__)
+
+
+async def revalidate_all(batch_size: Optional[int] = None):
+    """
+    Run stored outlines through the same validation as site writes.
+    Each batch is checked in one vectorized pass; only the outlines that
+    need it are repaired and written back.
+    """
+    batch_size = batch_size or get_settings().geometry_batch_size
+    checked = repaired = 0
+    after_id = None
+    while True:
+        async with unit_of_work() as session:
+            rows = await SiteRepo.get_geometries(session, after_id, batch_size)
+            if not rows:
+                break
+            after_id = rows[-1].id
+            checked += len(rows)
+
+            flagged = needs_repair([row.geometry for row in rows])
+            values = []
+            for row, flag in zip(rows, flagged):
+                if not flag:
+                    continue
+                try:
+                    coords, repairs = clean_outline(wkb.decode(row.geometry))
+                except Exception as e:
+                    logger.warning("Site %s outline left as is: %s", row.id, e)
+                    continue
+                logger.info("Site %s outline: %s", row.id, ", ".join(repairs))
+                values.append({"site_id": row.id, "geometry": wkb.encode(coords)})
+
+            if values:
+                await SiteRepo.set_geometries(session, values)
+                repaired += len(values)
+
+    logger.info("Checked %d site outlines, repaired %d", checked, repaired)
+    return checked, repaired
+
+
+if __name__ == "__main__":
+    # python -m app.modules.sites.jobs.revalidateGeometry
+    configure_logging(get_settings())
+    asyncio.run(revalidate_all())
@@ -0,0 +1,102 @@
+# app/modules/sites/jobs/zonalStatistics.py
+import argparse
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config.logging_setup import configure_logging
+from app.core.config.settings import get_settings
+from app.core.geo.zonal import open_raster, zonal_stats_batch
+from app.integration.db.postgres import new_session, unit_of_work
+from app.modules.project.repo.projectRepo import ProjectRepo
+from app.modules.sites.repo.siteRepo import SiteRepo
+from app.modules.sites.service.siteService import SiteService
+
+logger = logging.getLogger(__name__)
+
+STATS = ("mean", "min", "max", "sum")
+
+
+def to_analytics(stats):
+    """Band stats -> the {"metric": {"value", "unit"}} shape of site analytics"""
+    analytics = {}
+    for band, values in stats.items():
+        for stat in STATS:
+            analytics[f"{band}_{stat}"] = {
+                "value": values[stat],
+                "unit": values["unit"],
+            }
+        analytics[f"{band}_pixels"] = {"value": values["count"], "unit": "px"}
+    return analytics
+
+
+async def recompute_project(
+    project_id: str, raster_path: str, workers: int = None, user_id: str = None
+):
+    """
+    Zonal statistics of every site in a project against one raster, spread
+    over a process pool, written as one batch of analytics history rows.
+    """
+    raster_path = os.path.abspath(raster_path)
+    open_raster(raster_path)  # fail fast on a bad file or sidecar
+
+    async with new_session() as session:
+        project = await ProjectRepo.get_project_by_id(session, project_id)
+        if not project:
+            raise ValueError("Project not found")
+        rows = await SiteRepo.get_project_geometries(session, project_id)
+    outlines = [(i, g) for i, g in SiteService.outline_rows(rows) if g]
+    # sites handed to a worker at a time
+    size = get_settings().zonal_chunk_size
+    chunks = [outlines[i : i + size] for i in range(0, len(outlines), size)]
+
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, zonal_stats_batch, raster_path, chunk)
+                for chunk in chunks
+            )
+        )
+
+    author = user_id or project.created_by
+    records = [
+        {
+            "site_id": site_id,
+            "project_id": project_id,
+            "org_id": project.org_id,
+            "created_by": author,
+            "updated_by": author,
+            "analytics": to_analytics(stats),
+        }
+        for chunk in results
+        for site_id, stats in chunk
+        if stats
+    ]
+    async with unit_of_work() as session:
+        await SiteRepo.add_analytics_history_bulk(session, records)
+
+    logger.info(
+        "Zonal statistics for project %s: %d/%d sites covered by %s",
+        project_id,
+        len(records),
+        len(outlines),
+        raster_path,
+    )
+    return len(records), len(outlines)
+
+
+if __name__ == "__main__":
+    # python -m app.modules.sites.jobs.zonalStatistics <project_id> <raster.npy>
+    parser = argparse.ArgumentParser(description=recompute_project.__doc__)
+    parser.add_argument("project_id")
+    parser.add_argument("raster", help=".npy grid with a .json geotransform sidecar")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--user-id", default=None, help="author of the history rows")
+    args = parser.parse_args()
+
+    configure_logging(get_settings())
+    asyncio.run(
+        recompute_project(args.project_id, args.raster, args.workers, args.user_id)
+    )
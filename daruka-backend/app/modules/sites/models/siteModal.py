@@ -1,9 +1,31 @@
-from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, String, Enum, func
-from sqlalchemy.orm import relationship
 import enum
-from app.modules.project.models.projectModel import Project
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    LargeBinary,
+    String,
+    func,
+    text,
+)
+from sqlalchemy.orm import deferred, relationship
+
 from app.core.common.id_generator import generate_site_analytics_id, generate_site_id
 from app.integration.db.postgres import Base
+from app.integration.db.search import search_vector_column, trigram_index
+from app.integration.db.tenancy import TenantScoped
+from app.modules.project.models.projectModel import Project
+
+# Id of the writing transaction. Sync cursors are transaction horizons
+# (SiteRepo.get_sync_horizon): unlike a timestamp taken when a transaction
+# starts, they can't skip a change that commits after the cursor was issued.
+CURRENT_XID = text("pg_current_xact_id()::text::bigint")
 
 
 class SiteStatus(str, enum.Enum):
@@ -11,14 +33,38 @@ class SiteStatus(str, enum.Enum):
     INACTIVE = "inactive"
 
 
-class Site(Base):
+class Site(TenantScoped, Base):
     __tablename__ = "sites"
+    __table_args__ = (
+        # Queries always carry the tenant predicate (see TenantScoped), so the
+        # btree indexes lead with org_id: a tenant's entries are contiguous.
+        # serves the incremental sync query (changes in a project since a cursor)
+        Index("ix_sites_org_project_change_xid", "org_id", "project_id", "change_xid"),
+        # a project's outlines written since its spatial index was synced
+        Index("ix_sites_org_project_updated_at", "org_id", "project_id", "updated_at"),
+        # filtered/sorted listing (SiteRepo.query_sites)
+        Index("ix_sites_org_project_status", "org_id", "project_id", "status"),
+        Index("ix_sites_org_project_created_at", "org_id", "project_id", "created_at"),
+        Index(
+            "ix_sites_org_created_by_created_at", "org_id", "created_by", "created_at"
+        ),
+        # paging through all of a tenant's sites (SiteRepo.get_all_sites)
+        Index("ix_sites_org_id_id", "org_id", "id"),
+        # full-text and typo tolerant search (see app/modules/search)
+        Index("ix_sites_search_vector", "search_vector", postgresql_using="gin"),
+        trigram_index("ix_sites_name_trgm", "name"),
+    )
 
     id = Column(String, primary_key=True, default=generate_site_id, index=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
 
-    project_id = Column(String, ForeignKey("projects.p_id"), nullable=False)
+    project_id = Column(
+        String,
+        ForeignKey("projects.p_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
 
     created_by = Column(String, ForeignKey("users.id"), nullable=False)
     updated_by = Column(String, ForeignKey("users.id"), nullable=True)
@@ -28,9 +74,19 @@ class Site(Base):
     status = Column(Enum(SiteStatus), default=SiteStatus.ACTIVE, nullable=False)
 
     location = Column(String, nullable=True)
-    geolocation = Column(JSON, nullable=True)
+    # outline as WKB, (lon, lat) float64; see app/core/geo/wkb.py
+    geometry = Column(LargeBinary, nullable=True)
+    # [{"lat", "lon"}, ...] JSON of rows written before `geometry` existed;
+    # only read as a fallback and cleared on the next write
+    legacy_geolocation = Column("geolocation", JSON, nullable=True)
     analytics = Column(JSON, nullable=True)
 
+    # maintained by Postgres; never loaded with the row
+    search_vector = deferred(
+        search_vector_column(("name", "A"), ("location", "B"), ("description", "C")),
+        raiseload=True,
+    )
+
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -40,21 +96,50 @@ class Site(Base):
         onupdate=func.now(),
         nullable=False,
     )
+    # transaction of the last write; what sync cursors compare against
+    change_xid = Column(
+        BigInteger, server_default=CURRENT_XID, onupdate=CURRENT_XID, nullable=False
+    )
+
+    @property
+    def coordinates(self):
+        """Outline as an (n, 2) array of (lon, lat), or None"""
+        from app.core.geo import wkb  # numpy; only loaded once outlines are read
+
+        return wkb.site_coordinates(self.geometry, self.legacy_geolocation)
 
-    project = relationship("Project", back_populates="sites")
-    creator = relationship("User", foreign_keys=[created_by])
-    updater = relationship("User", foreign_keys=[updated_by])
+    @property
+    def geolocation(self):
+        from app.core.geo import wkb
+
+        coords = self.coordinates
+        return None if coords is None else wkb.array_to_points(coords)
+
+    # no lazy loading; see SiteRepo.INCLUDES for the eager load options
+    project = relationship("Project", back_populates="sites", lazy="raise_on_sql")
+    creator = relationship("User", foreign_keys=[created_by], lazy="raise_on_sql")
+    updater = relationship("User", foreign_keys=[updated_by], lazy="raise_on_sql")
 
     analytics_history = relationship(
         "SiteAnalyticsHistory",
         back_populates="site",
         cascade="all, delete-orphan",
         passive_deletes=True,
+        lazy="raise_on_sql",
     )
 
 
-class SiteAnalyticsHistory(Base):
+class SiteAnalyticsHistory(TenantScoped, Base):
     __tablename__ = "site_analytics_history"
+    __table_args__ = (
+        # a site's history window (SiteRepo.get_site_analytics_history)
+        Index(
+            "ix_site_analytics_history_org_site_created_at",
+            "org_id",
+            "site_id",
+            "created_at",
+        ),
+    )
 
     id = Column(String, primary_key=True, default=generate_site_analytics_id)
     site_id = Column(
@@ -62,7 +147,12 @@ class SiteAnalyticsHistory(Base):
         ForeignKey("sites.id", ondelete="CASCADE"),
         nullable=False,
     )
-    project_id = Column(String, ForeignKey("projects.p_id"), nullable=False)
+    project_id = Column(
+        String,
+        ForeignKey("projects.p_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
 
     created_by = Column(String, ForeignKey("users.id"), nullable=False)
     updated_by = Column(String, ForeignKey("users.id"), nullable=True)
@@ -73,4 +163,29 @@ class SiteAnalyticsHistory(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
-    site = relationship("Site", back_populates="analytics_history")
+    site = relationship("Site", back_populates="analytics_history", lazy="raise_on_sql")
+
+
+class SiteTombstone(TenantScoped, Base):
+    """Marker left behind when a site is deleted, so sync clients can drop it."""
+
+    __tablename__ = "site_tombstones"
+    __table_args__ = (
+        Index(
+            "ix_site_tombstones_org_project_change_xid",
+            "org_id",
+            "project_id",
+            "change_xid",
+        ),
+        # pruning (SiteRepo.prune_tombstones) runs across tenants
+        Index("ix_site_tombstones_deleted_at", "deleted_at"),
+    )
+
+    site_id = Column(String, primary_key=True)
+    project_id = Column(
+        String, ForeignKey("projects.p_id", ondelete="CASCADE"), nullable=False
+    )
+    deleted_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    change_xid = Column(BigInteger, server_default=CURRENT_XID, nullable=False)
@@ -1,38 +1,55 @@
-from datetime import datetime
-from typing import Any, Dict, List, Optional
 import enum
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
 from pydantic import BaseModel, Field, validator
 
+
 class SiteStatus(str, enum.Enum):  # ← KEY FIX: inherit from str and enum.Enum
     ACTIVE = "active"
     INACTIVE = "inactive"
 
-class SiteBase(BaseModel):
+
+class GeometryFormat(str, enum.Enum):
+    OBJECTS = "objects"  # [{"lat": .., "lon": ..}, ...]
+    FLAT = "flat"  # [lat, lon, lat, lon, ...]
+    POLYLINE = "polyline"  # Google encoded polyline string
+
+
+class SiteAttributes(BaseModel):
     name: str = Field(..., min_length=3, max_length=100)
     description: Optional[str] = None
     site_type: Optional[str] = None
     area: Optional[float] = None
     status: SiteStatus = SiteStatus.ACTIVE
     location: Optional[str] = None
-    geolocation: Optional[List[Dict[str, float]]] = None
     analytics: Optional[Dict[str, Any]] = None
-    
+
     # Validator to handle string input for status
-    @validator('status', pre=True)
+    @validator("status", pre=True)
     def validate_status(cls, v):
         if isinstance(v, str):
             return SiteStatus(v)
         return v
 
+
+class SiteBase(SiteAttributes):
+    geolocation: Optional[List[Dict[str, float]]] = None
+
+
 class SiteCreate(SiteBase):
     project_id: str
 
+
 class SiteUpdate(SiteBase):
     # Make all fields optional for updates
     name: Optional[str] = Field(None, min_length=3, max_length=100)
     status: Optional[SiteStatus] = None
 
-class SiteResponse(SiteBase):
+
+class SiteRecord(SiteAttributes):
+    """Stored site without its outline; the controller encodes that separately"""
+
     id: str
     project_id: str
     created_by: str
@@ -43,13 +60,19 @@ class SiteResponse(SiteBase):
     class Config:
         orm_mode = True
         use_enum_values = True  # This ensures enums are serialized as their values
-        
+
         # JSON encoders for proper serialization
         json_encoders = {
             datetime: lambda v: v.isoformat(),
-            SiteStatus: lambda v: v.value
+            SiteStatus: lambda v: v.value,
         }
 
+
+class SiteResponse(SiteRecord):
+    # shape depends on ?geometry_format= (see GeometryFormat)
+    geolocation: Optional[Union[List[Dict[str, float]], List[float], str]] = None
+
+
 class SiteAnalyticsRecord(BaseModel):
     id: str
     site_id: str
@@ -60,14 +83,17 @@ class SiteAnalyticsRecord(BaseModel):
     class Config:
         orm_mode = True
 
+
 class ChartMetricPoint(BaseModel):
     x: str
     y: float
 
+
 class ChartMetric(BaseModel):
     unit: str
     values: List[ChartMetricPoint]
 
+
 class SiteAnalyticsHistoryResponse(BaseModel):
     history: List[SiteAnalyticsRecord]
     chart: Dict[str, ChartMetric]
@@ -75,7 +101,8 @@ class SiteAnalyticsHistoryResponse(BaseModel):
     class Config:
         orm_mode = True
 
+
 class ApiResponse(BaseModel):
     success: bool
     message: str
-    data: Optional[Dict] = None
\ No newline at end of file
+    data: Optional[Dict] = None
@@ -1,91 +1,381 @@
 from datetime import datetime, timedelta
 
-from sqlalchemy import update
+from sqlalchemy import bindparam, delete, func, text, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.modules.project.models.projectModel import Project
+from sqlalchemy.orm import joinedload
+
 from app.core.common.id_generator import generate_site_analytics_id, generate_site_id
-from app.modules.sites.models.siteModal import Site, SiteAnalyticsHistory
+from app.core.common.tracing import traced
+from app.modules.project.repo.projectRepo import ProjectRepo
+from app.modules.sites.models.siteModal import (
+    CURRENT_XID,
+    Site,
+    SiteAnalyticsHistory,
+    SiteStatus,
+    SiteTombstone,
+)
 
 
+@traced
 class SiteRepo:
+    # columns a client may ask for with ?fields=
+    FIELDS = tuple(
+        name
+        for name in Site.__table__.columns.keys()
+        if name not in ("search_vector", "geometry")
+    )
+    # ?fields= names backed by something other than the same-named column
+    FIELD_COLUMNS = {"geolocation": (Site.geometry, Site.legacy_geolocation)}
+    # relationships a client may expand with ?include=; all many-to-one, so
+    # joined into the same SELECT (one query regardless of row count)
+    INCLUDES = {
+        "creator": Site.creator,
+        "updater": Site.updater,
+        "project": Site.project,
+    }
+
+    # ?filter=value -> predicate. Queries must be scoped by one of SCOPES,
+    # whose composite indexes (see Site.__table_args__) serve the rest
+    FILTERS = {
+        "project_id": lambda v: Site.project_id == v,
+        "created_by": lambda v: Site.created_by == v,
+        "status": lambda v: Site.status == SiteStatus(v),
+        "site_type": lambda v: Site.site_type == v,
+        "min_area": lambda v: Site.area >= v,
+        "max_area": lambda v: Site.area <= v,
+        "created_after": lambda v: Site.created_at > v,
+    }
+    SCOPES = ("project_id", "created_by")
+    # columns a client may ?sort= on
+    SORTS = {
+        "created_at": Site.created_at,
+        "updated_at": Site.updated_at,
+        "area": Site.area,
+        "name": Site.name,
+    }
+
+    @staticmethod
+    def _select_sites(fields=None, include=()):
+        """Full entities, or only the requested columns when projecting"""
+        if fields:
+            columns = []
+            for name in fields:
+                columns.extend(
+                    SiteRepo.FIELD_COLUMNS.get(name) or [getattr(Site, name)]
+                )
+            return select(*columns)
+        return select(Site).options(
+            *(joinedload(SiteRepo.INCLUDES[name]) for name in include or ())
+        )
+
+    @staticmethod
+    async def _fetch_sites(session: AsyncSession, query, fields=None):
+        result = await session.execute(query)
+        return result.mappings().all() if fields else result.scalars().all()
+
+    @staticmethod
+    def _geometry_values(values: dict):
+        """Swap a [{"lat", "lon"}, ...] geolocation for its WKB column value"""
+        if "geolocation" in values:
+            from app.core.geo import wkb
+
+            points = values.pop("geolocation")
+            values["geometry"] = (
+                wkb.encode(wkb.points_to_array(points)) if points else None
+            )
+        if "geometry" in values:
+            values["legacy_geolocation"] = None
+        return values
+
+    @staticmethod
+    def _counter_delta(status, area, sign: int = 1):
+        """What one site contributes to its project's counters."""
+        active = SiteStatus(status or SiteStatus.ACTIVE) == SiteStatus.ACTIVE
+        return {
+            "sites": sign,
+            "active": sign if active else 0,
+            "inactive": 0 if active else sign,
+            "area": sign * (area or 0.0),
+        }
+
     @staticmethod
     async def create_site(session: AsyncSession, **kwargs):
         try:
+            SiteRepo._geometry_values(kwargs)
+            kwargs["status"] = SiteStatus(kwargs.get("status") or SiteStatus.ACTIVE)
             site = Site(**kwargs)
             session.add(site)
 
-            await session.execute(
-                update(Project)
-                .where(Project.p_id == site.project_id)
-                .values(sites_added_total=Project.sites_added_total + 1)
+            await ProjectRepo.bump_site_counters(
+                session,
+                site.project_id,
+                **SiteRepo._counter_delta(site.status, site.area),
             )
 
-            await session.commit()
+            await session.flush()
             return site
         except Exception as e:
-            await session.rollback()
             raise RuntimeError(f"DB Error creating site: {str(e)}")
 
     @staticmethod
-    async def get_site_by_id(session: AsyncSession, site_id: str):
-        result = await session.execute(select(Site).where(Site.id == site_id))
+    async def get_site_by_id(session: AsyncSession, site_id: str, include=()):
+        result = await session.execute(
+            SiteRepo._select_sites(include=include).where(Site.id == site_id)
+        )
         return result.scalar_one_or_none()
 
     @staticmethod
-    async def get_sites_by_project(session: AsyncSession, project_id: str):
+    async def get_sites_by_project(
+        session: AsyncSession, project_id: str, fields=None, include=()
+    ):
+        query = SiteRepo._select_sites(fields, include).where(
+            Site.project_id == project_id
+        )
+        return await SiteRepo._fetch_sites(session, query, fields)
+
+    @staticmethod
+    async def get_sites_by_user(
+        session: AsyncSession, user_id: str, fields=None, include=()
+    ):
+        query = SiteRepo._select_sites(fields, include).where(
+            Site.created_by == user_id
+        )
+        return await SiteRepo._fetch_sites(session, query, fields)
+
+    @staticmethod
+    async def get_site_version(session: AsyncSession, site_id: str):
+        """Cheap validator for a single site (None if it doesn't exist)"""
+        result = await session.execute(
+            select(Site.updated_at).where(Site.id == site_id)
+        )
+        updated_at = result.scalar_one_or_none()
+        return (site_id, updated_at) if updated_at else None
+
+    @staticmethod
+    async def get_project_sites_version(session: AsyncSession, project_id: str):
+        """Row count + newest updated_at; changes whenever the site list does"""
         result = await session.execute(
-            select(Site).where(Site.project_id == project_id)
+            select(func.count(Site.id), func.max(Site.updated_at)).where(
+                Site.project_id == project_id
+            )
+        )
+        return tuple(result.one())
+
+    @staticmethod
+    async def get_sync_horizon(session: AsyncSession) -> int:
+        """
+        Oldest transaction still running: everything written by earlier
+        transactions is visible to reads that follow. Read it before the
+        changes it will be the next cursor for; changes at or past it may be
+        handed out twice, never skipped.
+        """
+        result = await session.execute(
+            text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
         )
+        return result.scalar_one()
+
+    @staticmethod
+    async def get_sites_changed_since(
+        session: AsyncSession, project_id: str, since: int = None
+    ):
+        """Sites in a project written from horizon `since` on (all if None)"""
+        query = select(Site).where(Site.project_id == project_id)
+        if since is not None:
+            query = query.where(Site.change_xid >= since)
+        result = await session.execute(query.order_by(Site.change_xid))
         return result.scalars().all()
 
     @staticmethod
-    async def get_sites_by_user(session: AsyncSession, user_id: str):
-        result = await session.execute(select(Site).where(Site.created_by == user_id))
+    async def get_project_geometries(
+        session: AsyncSession, project_id: str, since: int = None
+    ):
+        """Outline columns only, of a project's sites (written from `since` on)"""
+        query = select(Site.id, Site.geometry, Site.legacy_geolocation).where(
+            Site.project_id == project_id
+        )
+        if since is not None:
+            query = query.where(Site.change_xid >= since)
+        result = await session.execute(query)
+        return result.all()
+
+    @staticmethod
+    async def get_tombstones_since(session: AsyncSession, project_id: str, since: int):
+        """Sites deleted from a project from horizon `since` on"""
+        result = await session.execute(
+            select(SiteTombstone)
+            .where(
+                SiteTombstone.project_id == project_id,
+                SiteTombstone.change_xid >= since,
+            )
+            .order_by(SiteTombstone.change_xid)
+        )
         return result.scalars().all()
 
+    @staticmethod
+    async def prune_tombstones(session: AsyncSession, before: datetime) -> int:
+        """Delete tombstones of sites deleted before `before`; returns how many"""
+        result = await session.execute(
+            delete(SiteTombstone)
+            .where(SiteTombstone.deleted_at < before)
+            .execution_options(synchronize_session=False, all_tenants=True)
+        )
+        return result.rowcount
+
     @staticmethod
     async def update_site(session: AsyncSession, site_id: str, **kwargs):
         try:
+            SiteRepo._geometry_values(kwargs)
+            if "status" in kwargs or "area" in kwargs:
+                if kwargs.get("status"):
+                    kwargs["status"] = SiteStatus(kwargs["status"])
+                # lock the row so the counter delta is taken against the
+                # values this update actually replaces
+                result = await session.execute(
+                    select(Site.project_id, Site.status, Site.area)
+                    .where(Site.id == site_id)
+                    .with_for_update()
+                )
+                old = result.one_or_none()
+                if old:
+                    before = SiteRepo._counter_delta(old.status, old.area)
+                    after = SiteRepo._counter_delta(
+                        kwargs.get("status") or old.status, kwargs.get("area", old.area)
+                    )
+                    await ProjectRepo.bump_site_counters(
+                        session,
+                        old.project_id,
+                        **{name: after[name] - before[name] for name in after},
+                    )
+
             await session.execute(
                 update(Site)
                 .where(Site.id == site_id)
                 .values(**kwargs)
                 .execution_options(synchronize_session="fetch")
             )
-            await session.commit()
             return await SiteRepo.get_site_by_id(session, site_id)
         except Exception as e:
-            await session.rollback()
             raise RuntimeError(f"DB Error updating site: {str(e)}")
 
+    @staticmethod
     async def delete_site(session: AsyncSession, site_id: str):
         try:
             site = await SiteRepo.get_site_by_id(session, site_id)
             if site:
-                # decrement project counter
-                await session.execute(
-                    update(Project)
-                    .where(Project.p_id == site.project_id)
-                    .values(sites_added_total=Project.sites_added_total - 1)
+                # counters are adjusted from the row as it was deleted, and a
+                # concurrent delete that got there first leaves them alone
+                result = await session.execute(
+                    delete(Site)
+                    .where(Site.id == site_id)
+                    .returning(Site.status, Site.area)
+                    .execution_options(synchronize_session=False)
+                )
+                deleted = result.one_or_none()
+                if not deleted:
+                    return None
+                await ProjectRepo.bump_site_counters(
+                    session,
+                    site.project_id,
+                    **SiteRepo._counter_delta(deleted.status, deleted.area, sign=-1),
                 )
 
-                await session.delete(site)
-                await session.commit()
+                # leave a tombstone so incremental sync clients see the delete
+                tombstone = insert(SiteTombstone).values(
+                    site_id=site.id, project_id=site.project_id, org_id=site.org_id
+                )
+                await session.execute(
+                    tombstone.on_conflict_do_update(
+                        index_elements=[SiteTombstone.site_id],
+                        set_={
+                            "project_id": tombstone.excluded.project_id,
+                            "org_id": tombstone.excluded.org_id,
+                            "deleted_at": func.now(),
+                            "change_xid": CURRENT_XID,
+                        },
+                    )
+                )
             return site
         except Exception as e:
-            await session.rollback()
             raise RuntimeError(f"DB Error deleting site: {str(e)}")
 
+    @staticmethod
+    async def convert_legacy_geolocation(session: AsyncSession, batch_size: int):
+        """
+        Rewrite up to `batch_size` JSON outlines as WKB; returns how many.
+        updated_at is left alone, this is a storage change only.
+        """
+        result = await session.execute(
+            select(Site.id, Site.legacy_geolocation)
+            .where(Site.geometry.is_(None), Site.legacy_geolocation.isnot(None))
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+
+        from app.core.geo import wkb
+
+        values = []
+        for site_id, points in rows:
+            coords = wkb.points_to_array(points)
+            geometry = wkb.encode(coords) if len(coords) else None
+            values.append({"site_id": site_id, "geometry": geometry})
+        await SiteRepo.set_geometries(session, values, touch=False)
+        return len(rows)
+
+    @staticmethod
+    async def get_geometries(session: AsyncSession, after_id: str = None, limit=500):
+        """(id, geometry) of stored outlines, in id order from `after_id`"""
+        query = select(Site.id, Site.geometry).where(Site.geometry.isnot(None))
+        if after_id:
+            query = query.where(Site.id > after_id)
+        result = await session.execute(query.order_by(Site.id).limit(limit))
+        return result.all()
+
+    @staticmethod
+    async def set_geometries(session: AsyncSession, values, touch: bool = True):
+        """
+        Bulk write [{"site_id", "geometry"}] in one executemany.
+        `touch` marks the sites changed so sync clients refetch the outline.
+        """
+        table = Site.__table__
+        extra = (
+            {}
+            if touch
+            else {"updated_at": table.c.updated_at, "change_xid": table.c.change_xid}
+        )
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam("site_id"))
+            .values(geometry=bindparam("geometry"), geolocation=None, **extra),
+            values,
+        )
+
     @staticmethod
     async def add_analytics_history(session: AsyncSession, **kwargs):
         try:
             history = SiteAnalyticsHistory(**kwargs)
             session.add(history)
-            await session.commit()
+            await session.flush()
             return history
         except Exception as e:
-            await session.rollback()
+            raise RuntimeError(f"DB Error adding analytics history: {str(e)}")
+
+    @staticmethod
+    async def add_analytics_history_bulk(session: AsyncSession, records):
+        """Insert many history rows (dicts of column values) in one statement"""
+        if not records:
+            return 0
+        try:
+            await session.execute(
+                insert(SiteAnalyticsHistory),
+                [{"id": generate_site_analytics_id(), **r} for r in records],
+            )
+            return len(records)
+        except Exception as e:
             raise RuntimeError(f"DB Error adding analytics history: {str(e)}")
 
     @staticmethod
@@ -103,7 +393,63 @@ class SiteRepo:
         return result.scalars().all()
 
     @staticmethod
-    async def get_all_sites(session: AsyncSession, skip: int = 0, limit: int = 10):
-        result = await session.execute(select(Site).offset(skip).limit(limit))
-        sites = result.scalars().all()
-        return sites
+    async def get_site_analytics_history_version(
+        session: AsyncSession, site_id: str, days: int = 7
+    ):
+        """Validator for the analytics history window of a site"""
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        result = await session.execute(
+            select(
+                func.count(SiteAnalyticsHistory.id),
+                func.max(SiteAnalyticsHistory.created_at),
+            ).where(
+                SiteAnalyticsHistory.site_id == site_id,
+                SiteAnalyticsHistory.created_at >= cutoff_date,
+            )
+        )
+        return (site_id, days, *result.one())
+
+    @staticmethod
+    async def get_all_sites(
+        session: AsyncSession, skip: int = 0, limit: int = 10, fields=None, include=()
+    ):
+        # id order walks the tenant's (org_id, id) index
+        query = (
+            SiteRepo._select_sites(fields, include)
+            .order_by(Site.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return await SiteRepo._fetch_sites(session, query, fields)
+
+    @staticmethod
+    async def query_sites(
+        session: AsyncSession,
+        filters=None,
+        sort=(),
+        skip: int = 0,
+        limit: int = 10,
+        fields=None,
+        include=(),
+    ):
+        """Sites matching whitelisted filters, in a whitelisted order"""
+        query = SiteRepo.query_sites_statement(
+            filters, sort, skip, limit, fields, include
+        )
+        return await SiteRepo._fetch_sites(session, query, fields)
+
+    @staticmethod
+    def query_sites_statement(
+        filters=None, sort=(), skip: int = 0, limit: int = 10, fields=None, include=()
+    ):
+        """The SELECT behind query_sites (tests EXPLAIN it)"""
+        query = SiteRepo._select_sites(fields, include)
+        for name, value in (filters or {}).items():
+            query = query.where(SiteRepo.FILTERS[name](value))
+
+        order = []
+        for name, descending in sort or ():
+            column = SiteRepo.SORTS[name]
+            order.append((column.desc() if descending else column.asc()).nulls_last())
+        # id breaks ties so offset paging is stable
+        return query.order_by(*order, Site.id).offset(skip).limit(limit)
@@ -1,12 +1,48 @@
-from fastapi import APIRouter, Depends, status
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.common.conditional import check_not_modified
+from app.core.common.projection import fields_query, sort_query
+from app.core.common.request_context import TimedRoute
 from app.core.security.auth_dependency import get_current_user
-from app.integration.db.postgres import get_db
+from app.core.security.rate_limit import rate_limit
+from app.integration.db.postgres import db_session, get_db
 from app.modules.sites.controller.siteController import SiteController
-from app.modules.sites.models.siteSchemas import ApiResponse, SiteCreate, SiteUpdate
+from app.modules.sites.models.siteSchemas import (
+    ApiResponse,
+    GeometryFormat,
+    SiteCreate,
+    SiteStatus,
+    SiteUpdate,
+)
+from app.modules.sites.repo.siteRepo import SiteRepo
+
+router = APIRouter(
+    prefix="/sites",
+    tags=["Sites"],
+    dependencies=[Depends(rate_limit())],
+    route_class=TimedRoute,
+)
+
+site_fields = fields_query(SiteRepo.FIELDS, always=("id",))
+site_include = fields_query(SiteRepo.INCLUDES, alias="include")
+site_sort = sort_query(SiteRepo.SORTS, default="-created_at")
+
+
+def geometry_format_query(
+    geometry_format: GeometryFormat = Query(
+        GeometryFormat.OBJECTS,
+        description="Outline encoding: objects, flat [lat, lon, ...] or polyline",
+    ),
+) -> GeometryFormat:
+    return geometry_format
 
-router = APIRouter(prefix="/sites", tags=["Sites"])
+
+# list endpoints scale with data size; bound how long/much they may query
+list_db = db_session(statement_timeout_ms=5000, max_rows=20000, label="sites.list")
 
 
 @router.post("/", response_model=ApiResponse, status_code=status.HTTP_201_CREATED)
@@ -18,15 +54,65 @@ async def create_site(
     return await SiteController.create_site(session, data, current_user["user_id"])
 
 
-@router.get("/all", response_model=ApiResponse)
+@router.get(
+    "/",
+    response_model=ApiResponse,
+    dependencies=[Depends(rate_limit("heavy", per_minute=30, max_concurrent=8))],
+)
+async def query_sites(
+    project_id: Optional[str] = None,
+    created_by: Optional[str] = None,
+    status: Optional[SiteStatus] = None,
+    site_type: Optional[str] = None,
+    min_area: Optional[float] = Query(None, ge=0),
+    max_area: Optional[float] = Query(None, ge=0),
+    created_after: Optional[datetime] = None,
+    sort=Depends(site_sort),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    fields=Depends(site_fields),
+    include=Depends(site_include),
+    geometry_format=Depends(geometry_format_query),
+    session: AsyncSession = Depends(list_db),
+    current_user=Depends(get_current_user),
+):
+    """Filter and sort sites; project_id or created_by is required"""
+    filters = {
+        "project_id": project_id,
+        "created_by": created_by,
+        "status": status,
+        "site_type": site_type,
+        "min_area": min_area,
+        "max_area": max_area,
+        "created_after": created_after,
+    }
+    return await SiteController.query_sites(
+        session, filters, sort, skip, limit, fields, include, geometry_format
+    )
+
+
+@router.get(
+    "/all",
+    response_model=ApiResponse,
+    dependencies=[Depends(rate_limit("heavy", per_minute=30, max_concurrent=8))],
+)
 async def get_all_sites(
-    skip: int = 0,
-    limit: int = 10,
-    session: AsyncSession = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    fields=Depends(site_fields),
+    include=Depends(site_include),
+    geometry_format=Depends(geometry_format_query),
+    session: AsyncSession = Depends(list_db),
     current_user=Depends(get_current_user),
 ):
     return await SiteController.get_all_sites(
-        session=session, skip=skip, limit=limit, current_user=current_user
+        session=session,
+        skip=skip,
+        limit=limit,
+        current_user=current_user,
+        fields=fields,
+        include=include,
+        geometry_format=geometry_format,
     )
 
 
@@ -54,36 +140,72 @@ async def delete_site(
 @router.get("/{site_id}", response_model=ApiResponse)
 async def get_site(
     site_id: str,
+    request: Request,
+    response: Response,
+    include=Depends(site_include),
+    geometry_format=Depends(geometry_format_query),
     session: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    return await SiteController.get_site_by_id(session, site_id)
+    version = await SiteController.get_site_version(session, site_id)
+    not_modified = check_not_modified(request, response, version)
+    if not_modified:
+        return not_modified
+    return await SiteController.get_site_by_id(
+        session, site_id, include, geometry_format
+    )
 
 
-@router.get("/project/{project_id}", response_model=ApiResponse)
+@router.get(
+    "/project/{project_id}",
+    response_model=ApiResponse,
+    dependencies=[Depends(rate_limit("heavy", per_minute=60, max_concurrent=8))],
+)
 async def get_sites_by_project(
     project_id: str,
-    session: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    fields=Depends(site_fields),
+    include=Depends(site_include),
+    geometry_format=Depends(geometry_format_query),
+    session: AsyncSession = Depends(list_db),
     current_user=Depends(get_current_user),
 ):
-    return await SiteController.get_sites_by_project(session, project_id)
+    version = await SiteController.get_project_sites_version(session, project_id)
+    not_modified = check_not_modified(request, response, (project_id, *version))
+    if not_modified:
+        return not_modified
+    return await SiteController.get_sites_by_project(
+        session, project_id, fields, include, geometry_format
+    )
 
 
 @router.get("/user/{user_id}", response_model=ApiResponse)
 async def get_sites_by_user(
     user_id: str,
-    session: AsyncSession = Depends(get_db),
+    fields=Depends(site_fields),
+    include=Depends(site_include),
+    geometry_format=Depends(geometry_format_query),
+    session: AsyncSession = Depends(list_db),
     current_user=Depends(get_current_user),
 ):
-    return await SiteController.get_sites_by_user(session, user_id)
+    return await SiteController.get_sites_by_user(
+        session, user_id, fields, include, geometry_format
+    )
 
 
 @router.get("/{site_id}/analytics/history", response_model=ApiResponse)
 async def get_site_analytics_history(
     site_id: str,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
+    version = await SiteController.get_site_analytics_history_version(session, site_id)
+    not_modified = check_not_modified(request, response, version)
+    if not_modified:
+        return not_modified
     return await SiteController.get_site_analytics_history(
         site_id=site_id, session=session, current_user=current_user
     )
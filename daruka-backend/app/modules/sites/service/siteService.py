@@ -1,5 +1,15 @@
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.common.tracing import traced
+from app.core.config.settings import get_settings
+from app.integration.db.postgres import after_commit
+from app.integration.db.tenancy import current_tenant
+from app.integration.realtime.broker import hub, site_event
+from app.modules.project.repo.projectRepo import ProjectRepo
 from app.modules.sites.models.siteSchemas import (
     ApiResponse,
     ChartMetric,
@@ -12,12 +22,128 @@ from app.modules.sites.models.siteSchemas import (
 )
 from app.modules.sites.repo.siteRepo import SiteRepo
 
+# app.core.geo pulls in numpy/shapely, so it's imported where outlines are
+# actually handled rather than on app startup
+if TYPE_CHECKING:
+    from app.core.geo.spatial_index import SiteIndex
+
+logger = logging.getLogger(__name__)
+
+# org_id -> project_id -> SiteIndex, least recently used first. Each tenant
+# has its own LRU of SITE_INDEX_CACHE_SIZE projects, so a tenant with many
+# projects only ever evicts its own indexes; whole tenants are dropped past
+# SITE_INDEX_CACHE_TENANTS.
+_site_indexes: "OrderedDict[Optional[str], OrderedDict[str, SiteIndex]]" = OrderedDict()
+
+
+def _cache_index(tenant: Optional[str], project_id: str, index: "SiteIndex") -> None:
+    settings = get_settings()
+    indexes = _site_indexes.setdefault(tenant, OrderedDict())
+    _site_indexes.move_to_end(tenant)
+    if len(_site_indexes) > settings.site_index_cache_tenants:
+        _site_indexes.popitem(last=False)
+    indexes[project_id] = index
+    indexes.move_to_end(project_id)
+    if len(indexes) > settings.site_index_cache_size:
+        indexes.popitem(last=False)
+
 
+@traced
 class SiteService:
+    @staticmethod
+    def outline_geometry(points):
+        """Validated and repaired WKB for a [{"lat", "lon"}, ...] outline"""
+        if not points:
+            return None
+        from app.core.geo import wkb
+        from app.core.geo.validation import clean_outline
+
+        coords, repairs = clean_outline(wkb.points_to_array(points))
+        if repairs:
+            logger.info("Site outline repaired: %s", ", ".join(repairs))
+        return wkb.encode(coords)
+
+    @staticmethod
+    def outline_rows(rows):
+        """(id, wkb) pairs; legacy JSON outlines are encoded on the fly"""
+        from app.core.geo import wkb
+
+        for row in rows:
+            geometry = row.geometry
+            if not geometry and row.legacy_geolocation:
+                coords = wkb.points_to_array(row.legacy_geolocation)
+                geometry = wkb.encode(coords) if len(coords) else None
+            yield row.id, geometry
+
+    @staticmethod
+    async def project_index(session: AsyncSession, project_id: str) -> "SiteIndex":
+        """
+        Spatial index of a project's outlines, cached per process. A cached
+        index is brought up to date from the sites written and deleted since
+        it was last synced, and rebuilt only once it goes stale. The result
+        reflects this transaction's own writes, so it only replaces the cached
+        index once the transaction commits.
+        """
+        from app.core.geo.spatial_index import SiteIndex
+
+        tenant = current_tenant.get()
+        # read first: it is where the next incremental update starts from
+        horizon = await SiteRepo.get_sync_horizon(session)
+        version = await SiteRepo.get_project_sites_version(session, project_id)
+        index = _site_indexes.get(tenant, {}).get(project_id)
+
+        if index and index.version != version and not index.stale:
+            rows = await SiteRepo.get_project_geometries(
+                session, project_id, index.cursor
+            )
+            deleted = await SiteRepo.get_tombstones_since(
+                session, project_id, index.cursor
+            )
+            # other requests keep reading the cached one
+            index = index.copy()
+            index.apply(
+                SiteService.outline_rows(rows),
+                [t.site_id for t in deleted],
+                version,
+                horizon,
+            )
+        elif not index or index.version != version:
+            rows = await SiteRepo.get_project_geometries(session, project_id)
+            outlines = [(i, g) for i, g in SiteService.outline_rows(rows) if g]
+            index = SiteIndex(
+                [site_id for site_id, _ in outlines],
+                [geometry for _, geometry in outlines],
+                version,
+                horizon,
+            )
+
+        after_commit(session, lambda: _cache_index(tenant, project_id, index))
+        return index
+
+    @staticmethod
+    async def site_overlaps(session: AsyncSession, site):
+        """
+        Sites an outline intersects, with overlap area in m².
+        Advisory: failures are logged and reported as None.
+        """
+        if not site.geometry:
+            return []
+        try:
+            # a failed read mustn't abort the request's transaction
+            async with session.begin_nested():
+                index = await SiteService.project_index(session, site.project_id)
+            return index.conflicts(site.geometry, exclude_id=site.id)
+        except Exception:
+            logger.exception("Overlap check failed for site %s", site.id)
+            return None
+
     @staticmethod
     async def create_site(session: AsyncSession, data, current_user_id: str):
         if not data.name:
             raise ValueError("Site name is required")
+        # scoped to the caller's organization like every query
+        if not await ProjectRepo.project_exists(session, data.project_id):
+            raise ValueError("Project not found")
 
         site = await SiteRepo.create_site(
             session,
@@ -26,11 +152,15 @@ class SiteService:
             project_id=data.project_id,
             created_by=current_user_id,
             updated_by=current_user_id,
+            site_type=data.site_type,
+            status=data.status,
             area=data.area,
             location=data.location,
-            geolocation=data.geolocation,
+            geometry=SiteService.outline_geometry(data.geolocation),
             analytics=data.analytics or {},
         )
+        event = site_event("site.created", site)
+        after_commit(session, lambda: hub.publish(event))
         return site
 
     @staticmethod
@@ -46,22 +176,31 @@ class SiteService:
                 session,
                 site_id=site.id,
                 project_id=site.project_id,
+                org_id=site.org_id,
                 created_by=site.created_by,
                 updated_by=current_user_id,
                 analytics=site.analytics,
             )
 
-        updated_site = await SiteRepo.update_site(
-            session,
-            site_id,
+        values = dict(
             name=data.name or site.name,
             description=data.description or site.description,
             updated_by=current_user_id,
+            site_type=data.site_type or site.site_type,
+            status=data.status or site.status,
             area=data.area or site.area,
             location=data.location or site.location,
-            geolocation=data.geolocation or site.geolocation,
             analytics=data.analytics or site.analytics,
         )
+        if data.geolocation:
+            values["geometry"] = SiteService.outline_geometry(data.geolocation)
+
+        updated_site = await SiteRepo.update_site(session, site_id, **values)
+        events = [site_event("site.updated", updated_site)]
+        if data.analytics:
+            events.append(site_event("analytics.updated", updated_site))
+        for event in events:
+            after_commit(session, lambda event=event: hub.publish(event))
         return updated_site
 
     @staticmethod
@@ -69,24 +208,45 @@ class SiteService:
         site = await SiteRepo.delete_site(session, site_id)
         if not site:
             raise ValueError("Site not found")
+        event = site_event("site.deleted", site)
+        after_commit(session, lambda: hub.publish(event))
         return site
 
-
     @staticmethod
-    async def get_site_by_id(session: AsyncSession, site_id: str):
-        site = await SiteRepo.get_site_by_id(session, site_id)
+    async def get_site_by_id(session: AsyncSession, site_id: str, include=()):
+        site = await SiteRepo.get_site_by_id(session, site_id, include)
         if not site:
             raise ValueError("Site not found")
         return site
 
     @staticmethod
-    async def get_sites_by_user(session: AsyncSession, user_id: str):
-        sites = await SiteRepo.get_sites_by_user(session, user_id)
+    async def get_site_version(session: AsyncSession, site_id: str):
+        return await SiteRepo.get_site_version(session, site_id)
+
+    @staticmethod
+    async def get_project_sites_version(session: AsyncSession, project_id: str):
+        return await SiteRepo.get_project_sites_version(session, project_id)
+
+    @staticmethod
+    async def get_site_analytics_history_version(
+        session: AsyncSession, site_id: str, days: int = 7
+    ):
+        return await SiteRepo.get_site_analytics_history_version(session, site_id, days)
+
+    @staticmethod
+    async def get_sites_by_user(
+        session: AsyncSession, user_id: str, fields=None, include=()
+    ):
+        sites = await SiteRepo.get_sites_by_user(session, user_id, fields, include)
         return sites
 
     @staticmethod
-    async def get_sites_by_project(session: AsyncSession, project_id: str):
-        sites = await SiteRepo.get_sites_by_project(session, project_id)
+    async def get_sites_by_project(
+        session: AsyncSession, project_id: str, fields=None, include=()
+    ):
+        sites = await SiteRepo.get_sites_by_project(
+            session, project_id, fields, include
+        )
         return sites
 
     @staticmethod
@@ -116,5 +276,28 @@ class SiteService:
         return SiteAnalyticsHistoryResponse(history=history_records, chart=chart)
 
     @staticmethod
-    async def get_all_sites(session: AsyncSession, skip: int = 0, limit: int = 10):
-        return await SiteRepo.get_all_sites(session, skip, limit)
+    async def get_all_sites(
+        session: AsyncSession, skip: int = 0, limit: int = 10, fields=None, include=()
+    ):
+        return await SiteRepo.get_all_sites(session, skip, limit, fields, include)
+
+    @staticmethod
+    async def query_sites(
+        session: AsyncSession,
+        filters=None,
+        sort=(),
+        skip: int = 0,
+        limit: int = 10,
+        fields=None,
+        include=(),
+    ):
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        if not any(name in filters for name in SiteRepo.SCOPES):
+            raise ValueError("Filter by project_id or created_by")
+        min_area, max_area = filters.get("min_area"), filters.get("max_area")
+        if min_area is not None and max_area is not None and min_area > max_area:
+            raise ValueError("min_area must not be greater than max_area")
+
+        return await SiteRepo.query_sites(
+            session, filters, sort, skip, limit, fields, include
+        )
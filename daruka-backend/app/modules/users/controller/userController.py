@@ -2,18 +2,23 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.common.tracing import traced
 from app.modules.users.models.userModel import (
     ApiResponse,
+    RefreshRequest,
     SigninRequest,
     SigninResponse,
     SignupRequest,
     SignupResponse,
+    TokenResponse,
     UserResponse,
     UserUpdateRequest,
 )
+from app.modules.users.service.sessionService import SessionService
 from app.modules.users.service.userService import UserService
 
 
+@traced
 class UserController:
     @staticmethod
     async def create(
@@ -58,9 +63,39 @@ class UserController:
             )
 
     @staticmethod
-    async def signout(user_id: str) -> ApiResponse:
-        """Sign out (dummy, client should just discard tokens)"""
-        return ApiResponse(success=True, message="Signed out successfully")
+    async def refresh(
+        refresh_request: RefreshRequest, session: AsyncSession
+    ) -> TokenResponse:
+        """Rotate a refresh token"""
+        try:
+            tokens = await SessionService.refresh(
+                session, refresh_request.refresh_token
+            )
+            return TokenResponse(
+                access_token=tokens["access_token"],
+                refresh_token=tokens["refresh_token"],
+            )
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error refreshing token: {str(e)}",
+            )
+
+    @staticmethod
+    async def signout(current_user: dict, session: AsyncSession) -> ApiResponse:
+        """Sign out: revoke the session the access token belongs to"""
+        try:
+            # tokens issued before sessions existed have no sid; they just expire
+            if current_user.get("sid"):
+                await SessionService.revoke(session, current_user["sid"], "signout")
+            return ApiResponse(success=True, message="Signed out successfully")
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error signing out: {str(e)}",
+            )
 
     @staticmethod
     async def get_by_id(user_id: str, session: AsyncSession) -> UserResponse:
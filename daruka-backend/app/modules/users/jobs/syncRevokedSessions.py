@@ -0,0 +1,62 @@
+# app/modules/users/jobs/syncRevokedSessions.py
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.config.logging_setup import configure_logging
+from app.core.config.settings import get_settings
+from app.core.security.revocation import revoked_sessions
+from app.integration.db.postgres import new_session, unit_of_work
+from app.modules.users.repo.sessionRepo import SessionRepo
+
+logger = logging.getLogger(__name__)
+
+# re-read a little before the cursor: a revocation's timestamp is taken
+# before its transaction commits (and by the database's clock, not ours)
+_OVERLAP = timedelta(seconds=30)
+
+
+async def sync_once(since: Optional[datetime] = None) -> datetime:
+    """
+    Add sessions revoked after `since` (by any worker) to this process's
+    revoked_sessions; the first run looks back one access token lifetime.
+    Returns the cursor for the next run.
+    """
+    lifetime = timedelta(minutes=get_settings().access_token_expire_minutes)
+    now = datetime.now(timezone.utc)
+    since = since or now - lifetime
+    async with new_session() as session:
+        rows = await SessionRepo.get_revoked_since(session, since - _OVERLAP)
+    for family_id, revoked_at in rows:
+        revoked_sessions.add(family_id, (revoked_at + lifetime).timestamp())
+    revoked_sessions.prune()
+    return now
+
+
+async def sync_forever(interval: Optional[int] = None):
+    """Sync now, then every `interval` seconds (REVOKED_SESSIONS_SYNC_SECONDS)"""
+    interval = interval or get_settings().revoked_sessions_sync_seconds
+    since = None
+    while True:
+        try:
+            since = await sync_once(since)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Revoked session sync failed")
+        await asyncio.sleep(interval)
+
+
+async def purge_expired() -> int:
+    """Delete sessions whose refresh token has expired (run from cron)"""
+    async with unit_of_work() as session:
+        purged = await SessionRepo.delete_expired(session)
+    logger.info("Purged %d expired session(s)", purged)
+    return purged
+
+
+if __name__ == "__main__":
+    # python -m app.modules.users.jobs.syncRevokedSessions
+    configure_logging(get_settings())
+    asyncio.run(purge_expired())
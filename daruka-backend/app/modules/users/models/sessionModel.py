@@ -0,0 +1,45 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, text
+from sqlalchemy.sql import func
+
+from app.core.common.id_generator import generate_token_id
+from app.integration.db.postgres import Base
+from app.integration.db.tenancy import TenantScoped
+
+
+class RefreshTokenFamily(TenantScoped, Base):
+    """
+    A sign-in session: the chain of refresh tokens issued from one sign-in.
+    Only the latest token (`current_token_id`) can be exchanged; presenting
+    an older one means it was copied, and revokes the whole family.
+    """
+
+    __tablename__ = "refresh_token_families"
+    __table_args__ = (
+        # revocations since a cursor (syncRevokedSessions); most rows are
+        # never revoked, so they stay out of the index
+        Index(
+            "ix_refresh_token_families_revoked_at",
+            "revoked_at",
+            postgresql_where=text("revoked_at IS NOT NULL"),
+        ),
+        # expired sessions to purge
+        Index("ix_refresh_token_families_expires_at", "expires_at"),
+    )
+
+    id = Column(String, primary_key=True, default=generate_token_id)
+    user_id = Column(
+        String,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    current_token_id = Column(String, nullable=False)
+    # of the current refresh token
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_reason = Column(String, nullable=True)  # "signout" or "reuse"
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    rotated_at = Column(DateTime(timezone=True), nullable=True)
@@ -2,11 +2,14 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import Column, DateTime, String
+from sqlalchemy import Column, DateTime, Index, String
 from sqlalchemy.sql import func
 
+# registers the organizations table that users.org_id references
+import app.modules.organizations.models.organizationModel  # noqa: F401
 from app.core.common.id_generator import generate_user_id
 from app.integration.db.postgres import Base
+from app.integration.db.tenancy import TenantScoped
 
 
 # ---------- Request Schemas ----------
@@ -15,6 +18,8 @@ class SignupRequest(BaseModel):
     name: str
     password: str
     role: str = "user"
+    # name of the organization created for the new user
+    organization_name: Optional[str] = None
 
 
 class SigninRequest(BaseModel):
@@ -22,6 +27,10 @@ class SigninRequest(BaseModel):
     password: str
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class UserUpdateRequest(BaseModel):
     name: Optional[str] = None
     password: Optional[str] = None
@@ -31,6 +40,7 @@ class UserUpdateRequest(BaseModel):
 # ---------- Response Schemas ----------
 class UserResponse(BaseModel):
     id: str
+    org_id: str
     email: EmailStr
     name: str
     role: str
@@ -41,6 +51,17 @@ class UserResponse(BaseModel):
         orm_mode = True  # ✅ allows Pydantic to read ORM objects directly
 
 
+class UserSummary(BaseModel):
+    """Public identity of a user, embedded by ?include=creator,updater"""
+
+    id: str
+    name: str
+    email: EmailStr
+
+    class Config:
+        orm_mode = True
+
+
 class SigninResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -58,6 +79,12 @@ class SignupResponse(BaseModel):
     user: UserResponse
 
 
+class TokenResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+
 class ApiResponse(BaseModel):
     success: bool
     message: str
@@ -67,8 +94,12 @@ class ApiResponse(BaseModel):
         orm_mode = True
 
 
-class User(Base):
+class User(TenantScoped, Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # an organization's members (UserRepo.get_all_users)
+        Index("ix_users_org_id_id", "org_id", "id"),
+    )
 
     id = Column(String, primary_key=True, default=generate_user_id, index=True)
     role = Column(String, nullable=False, default="user")  # admin/user
@@ -0,0 +1,97 @@
+# app/modules/users/repo/sessionRepo.py
+from datetime import datetime
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.common.tracing import traced
+from app.modules.users.models.sessionModel import RefreshTokenFamily
+
+
+@traced
+class SessionRepo:
+    @staticmethod
+    async def create_family(
+        session: AsyncSession,
+        family_id: str,
+        user_id: str,
+        org_id: str,
+        token_id: str,
+        expires_at: datetime,
+    ):
+        """Start a refresh token family with its first token"""
+        family = RefreshTokenFamily(
+            id=family_id,
+            user_id=user_id,
+            org_id=org_id,
+            current_token_id=token_id,
+            expires_at=expires_at,
+        )
+        session.add(family)
+        await session.flush()
+        return family
+
+    @staticmethod
+    async def rotate(
+        session: AsyncSession,
+        family_id: str,
+        token_id: str,
+        new_token_id: str,
+        expires_at: datetime,
+    ) -> bool:
+        """
+        Replace the family's current token, in one conditional UPDATE so two
+        concurrent refreshes with the same token can't both succeed.
+        False if `token_id` isn't current, or the family is revoked or expired.
+        """
+        result = await session.execute(
+            update(RefreshTokenFamily)
+            .where(
+                RefreshTokenFamily.id == family_id,
+                RefreshTokenFamily.current_token_id == token_id,
+                RefreshTokenFamily.revoked_at.is_(None),
+                RefreshTokenFamily.expires_at > func.now(),
+            )
+            .values(
+                current_token_id=new_token_id,
+                expires_at=expires_at,
+                rotated_at=func.now(),
+            )
+            .returning(RefreshTokenFamily.id)
+        )
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def revoke_family(session: AsyncSession, family_id: str, reason: str):
+        """Revoke a family; returns its revocation time, None if already revoked"""
+        result = await session.execute(
+            update(RefreshTokenFamily)
+            .where(
+                RefreshTokenFamily.id == family_id,
+                RefreshTokenFamily.revoked_at.is_(None),
+            )
+            .values(revoked_at=func.now(), revoked_reason=reason)
+            .returning(RefreshTokenFamily.revoked_at)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_revoked_since(session: AsyncSession, since: datetime):
+        """(id, revoked_at) of families revoked after `since`, oldest first"""
+        result = await session.execute(
+            select(RefreshTokenFamily.id, RefreshTokenFamily.revoked_at)
+            .where(RefreshTokenFamily.revoked_at > since)
+            .order_by(RefreshTokenFamily.revoked_at)
+        )
+        return result.all()
+
+    @staticmethod
+    async def delete_expired(session: AsyncSession) -> int:
+        """Drop families whose refresh token has expired"""
+        result = await session.execute(
+            delete(RefreshTokenFamily).where(
+                RefreshTokenFamily.expires_at <= func.now()
+            )
+        )
+        return result.rowcount
@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config.settings import get_settings
+from app.integration.db.tenancy import current_tenant
+
+# returned by UserCache.get when the key has to be looked up in the database
+MISS = object()
+
+
+class CachedUser:
+    """Column values of a users row; detached from any session."""
+
+    __slots__ = (
+        "id",
+        "org_id",
+        "email",
+        "name",
+        "role",
+        "hashed_password",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(self, user):
+        for name in self.__slots__:
+            setattr(self, name, getattr(user, name))
+
+
+class UserCache:
+    """
+    Per-process TTL + LRU cache of users by ("id", user_id) and
+    ("email", email). Unknown emails are cached as None for a shorter
+    time, so repeated sign-ins with made-up addresses stay off the
+    database. Other workers only see a change once their entry expires.
+    """
+
+    def __init__(
+        self, max_entries: int, ttl_seconds: float, negative_ttl_seconds: float
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.negative_ttl = negative_ttl_seconds
+        # key -> (expires at, CachedUser or None), least recently used first
+        self._entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        # bumped by every invalidation; a lookup that started before one
+        # doesn't store what it read, as it may be the old row
+        self.generation = 0
+
+    def get(self, key: Tuple[str, str]):
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISS
+        expires, user = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return MISS
+        self._entries.move_to_end(key)
+        return user
+
+    def put(self, user, generation: int) -> Optional[CachedUser]:
+        """Cache a users row under its id and email; returns the snapshot."""
+        if user is None:
+            return None
+        cached = CachedUser(user)
+        if self.ttl and generation == self.generation:
+            expires = time.monotonic() + self.ttl
+            self._store(("id", cached.id), expires, cached)
+            self._store(("email", cached.email), expires, cached)
+        return cached
+
+    def put_missing(self, email: str, generation: int) -> None:
+        if self.negative_ttl and generation == self.generation:
+            self._store(("email", email), time.monotonic() + self.negative_ttl, None)
+
+    def invalidate(self, user_id: str = None, email: str = None) -> None:
+        self.generation += 1
+        cached = self._entries.pop(("id", user_id), (0, None))[1] if user_id else None
+        for address in {email, cached.email if cached else None} - {None}:
+            self._entries.pop(("email", address), None)
+
+    def _store(self, key, expires: float, user: Optional[CachedUser]) -> None:
+        self._entries[key] = (expires, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_cache: Optional[UserCache] = None
+
+
+def user_cache() -> UserCache:
+    """This process's cache, sized from the USER_CACHE_* settings."""
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = UserCache(
+            settings.user_cache_size,
+            settings.user_cache_ttl_seconds,
+            settings.user_cache_negative_ttl_seconds,
+        )
+    return _cache
+
+
+def visible(user: Optional[CachedUser]) -> Optional[CachedUser]:
+    """
+    Entries are shared by all tenants; hide other organizations' users the
+    way the tenant criteria do for rows read from the database.
+    """
+    tenant = current_tenant.get()
+    if user is not None and tenant is not None and user.org_id != tenant:
+        return None
+    return user
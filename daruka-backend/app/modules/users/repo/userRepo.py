@@ -3,9 +3,14 @@ from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.core.common.tracing import traced
+from app.integration.db.postgres import after_commit
+from app.integration.db.tenancy import current_tenant
 from app.modules.users.models.userModel import User
+from app.modules.users.repo.userCache import MISS, user_cache, visible
 
 
+@traced
 class UserRepo:
     @staticmethod
     async def create_user(
@@ -14,30 +19,54 @@ class UserRepo:
         name: str,
         hashed_password: str,
         role: str = "user",
+        org_id: str = None,
     ):
         """Create a new user"""
-        user = User(email=email, name=name, hashed_password=hashed_password, role=role)
+        user = User(
+            email=email,
+            name=name,
+            hashed_password=hashed_password,
+            role=role,
+            org_id=org_id,
+        )
         session.add(user)
-        await session.commit()
+        await session.flush()
         await session.refresh(user)
+        # drop a cached "no such email" from the signup check
+        after_commit(session, lambda: user_cache().invalidate(email=email))
         return user
 
     @staticmethod
     async def get_user_by_id(session: AsyncSession, user_id: str):
-        """Fetch user by ID"""
-        result = await session.execute(select(User).where(User.id == user_id))
-        return result.scalar_one_or_none()
+        """Fetch user by ID, as a read-only CachedUser (see userCache)"""
+        cache = user_cache()
+        user = cache.get(("id", user_id))
+        if user is MISS:
+            generation = cache.generation
+            result = await session.execute(select(User).where(User.id == user_id))
+            user = cache.put(result.scalar_one_or_none(), generation)
+        return visible(user)
 
     @staticmethod
     async def get_user_by_email(session: AsyncSession, email: str):
-        """Fetch user by email"""
-        result = await session.execute(select(User).where(User.email == email))
-        return result.scalar_one_or_none()
+        """Fetch user by email, as a read-only CachedUser (see userCache)"""
+        cache = user_cache()
+        user = cache.get(("email", email))
+        if user is MISS:
+            generation = cache.generation
+            result = await session.execute(select(User).where(User.email == email))
+            user = cache.put(result.scalar_one_or_none(), generation)
+            if user is None and current_tenant.get() is None:
+                # only an unscoped miss means the address isn't registered
+                cache.put_missing(email, generation)
+        return visible(user)
 
     @staticmethod
     async def get_all_users(session: AsyncSession, skip: int = 0, limit: int = 10):
         """Fetch paginated list of users"""
-        result = await session.execute(select(User).offset(skip).limit(limit))
+        result = await session.execute(
+            select(User).order_by(User.id).offset(skip).limit(limit)
+        )
         return result.scalars().all()
 
     @staticmethod
@@ -50,15 +79,22 @@ class UserRepo:
             .execution_options(synchronize_session="fetch")
         )
         await session.execute(query)
-        await session.commit()
 
-        return await UserRepo.get_user_by_id(session, user_id)
+        # not through the cache: the change isn't committed yet
+        result = await session.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        # by email too: the ("email", ...) entry can outlive an evicted id one
+        email = user.email if user else None
+        after_commit(session, lambda: user_cache().invalidate(user_id, email))
+        return visible(user)
 
     @staticmethod
     async def delete_user(session: AsyncSession, user_id: str):
         """Delete a user by ID"""
-        user = await UserRepo.get_user_by_id(session, user_id)
+        result = await session.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
         if user:
             await session.delete(user)
-            await session.commit()
+            await session.flush()
+            after_commit(session, lambda: user_cache().invalidate(user.id, user.email))
         return user
@@ -2,24 +2,39 @@
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.common.request_context import TimedRoute
 from app.core.security.auth_dependency import get_current_user
+from app.core.security.rate_limit import rate_limit
 from app.integration.db.postgres import get_db
 from app.modules.users.controller.userController import UserController
 from app.modules.users.models.userModel import (
     ApiResponse,
+    RefreshRequest,
     SigninRequest,
     SigninResponse,
     SignupRequest,
     SignupResponse,
+    TokenResponse,
     UserResponse,
     UserUpdateRequest,
 )
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(
+    prefix="/users",
+    tags=["users"],
+    dependencies=[Depends(rate_limit())],
+    route_class=TimedRoute,
+)
+
+# bcrypt is deliberately slow; keep anonymous callers from hammering it
+auth_rate_limit = Depends(rate_limit("auth", per_minute=10, burst=5))
 
 
 @router.post(
-    "/signup", response_model=SignupResponse, status_code=status.HTTP_201_CREATED
+    "/signup",
+    response_model=SignupResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[auth_rate_limit],
 )
 async def signup_user(
     signup_request: SignupRequest,
@@ -29,7 +44,12 @@ async def signup_user(
     return await UserController.create(signup_request, session)
 
 
-@router.post("/signin", response_model=SigninResponse, status_code=status.HTTP_200_OK)
+@router.post(
+    "/signin",
+    response_model=SigninResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[auth_rate_limit],
+)
 async def signin_user(
     signin_request: SigninRequest,
     session: AsyncSession = Depends(get_db),
@@ -38,10 +58,22 @@ async def signin_user(
     return await UserController.signin(signin_request, session)
 
 
+@router.post("/refresh", response_model=TokenResponse, status_code=status.HTTP_200_OK)
+async def refresh_tokens(
+    refresh_request: RefreshRequest,
+    session: AsyncSession = Depends(get_db),
+):
+    """Rotate a refresh token; the old one stops working (public route)"""
+    return await UserController.refresh(refresh_request, session)
+
+
 @router.post("/signout", response_model=ApiResponse, status_code=status.HTTP_200_OK)
-async def signout_user(current_user: dict = Depends(get_current_user)):
-    """Sign out a user (protected)"""
-    return await UserController.signout(current_user["user_id"])
+async def signout_user(
+    current_user: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    """Sign out a user, revoking their session's tokens (protected)"""
+    return await UserController.signout(current_user, session)
 
 
 @router.get("/me", response_model=UserResponse, status_code=status.HTTP_200_OK)
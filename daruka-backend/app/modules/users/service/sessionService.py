@@ -0,0 +1,104 @@
+# app/modules/users/service/sessionService.py
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.common.id_generator import generate_token_id
+from app.core.common.tracing import traced
+from app.core.config.settings import get_settings
+from app.core.security.revocation import revoked_sessions
+from app.integration.db.postgres import after_commit, commit
+from app.integration.jwt.jwt_handler import JWTHandler
+from app.modules.users.repo.sessionRepo import SessionRepo
+from app.modules.users.repo.userRepo import UserRepo
+
+logger = logging.getLogger(__name__)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+@traced
+class SessionService:
+    @staticmethod
+    def _issue(user, family_id: str, token_id: str):
+        tokens = JWTHandler.create_tokens(
+            {
+                "user_id": user.id,
+                "user_name": user.name,
+                "user_email": user.email,
+                "role": user.role,
+                "org_id": user.org_id,
+            },
+            family_id,
+            token_id,
+        )
+        expires_at = datetime.now(timezone.utc) + timedelta(
+            days=get_settings().refresh_token_expire_days
+        )
+        return tokens, expires_at
+
+    @staticmethod
+    async def start_session(session: AsyncSession, user):
+        """New refresh token family for a sign-in; returns its tokens"""
+        family_id, token_id = generate_token_id(), generate_token_id()
+        tokens, expires_at = SessionService._issue(user, family_id, token_id)
+        await SessionRepo.create_family(
+            session, family_id, user.id, user.org_id, token_id, expires_at
+        )
+        return tokens
+
+    @staticmethod
+    async def refresh(session: AsyncSession, refresh_token: str):
+        """
+        Exchange a refresh token for a new access/refresh pair. The old
+        refresh token stops working; presenting it again (a stolen copy, or
+        the client it was stolen from) revokes the session.
+        """
+        try:
+            payload = JWTHandler.verify_token(refresh_token, token_type="refresh")
+        except Exception as e:
+            raise _unauthorized(str(e))
+        family_id, token_id = payload.get("sid"), payload.get("jti")
+        if not family_id or not token_id:
+            raise _unauthorized("Token has no session, sign in again")
+
+        user = await UserRepo.get_user_by_id(session, payload["user_id"])
+        if user is None:
+            raise _unauthorized("User not found")
+
+        new_token_id = generate_token_id()
+        tokens, expires_at = SessionService._issue(user, family_id, new_token_id)
+        if await SessionRepo.rotate(
+            session, family_id, token_id, new_token_id, expires_at
+        ):
+            return tokens
+
+        # not the current token: replayed, or the session is revoked/expired
+        if await SessionService.revoke(session, family_id, "reuse"):
+            logger.warning("Refresh token reuse for user %s, session revoked", user.id)
+            # the 401 below would roll the revocation back with the request
+            await commit(session)
+        raise _unauthorized("Session expired or revoked, sign in again")
+
+    @staticmethod
+    async def revoke(session: AsyncSession, family_id: str, reason: str) -> bool:
+        """
+        Revoke a session: its refresh token can't be exchanged any more and
+        its access tokens are rejected at once in this process, and within
+        REVOKED_SESSIONS_SYNC_SECONDS in the others.
+        False if it was already revoked (or doesn't exist).
+        """
+        if await SessionRepo.revoke_family(session, family_id, reason) is None:
+            return False
+        until = time.time() + get_settings().access_token_expire_minutes * 60
+        after_commit(session, lambda: revoked_sessions.add(family_id, until))
+        return True
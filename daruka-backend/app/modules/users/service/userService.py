@@ -2,16 +2,19 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.common.tracing import traced
 from app.core.security.hashing import hash_password, verify_password
-from app.integration.jwt.jwt_handler import JWTHandler
+from app.modules.organizations.repo.organizationRepo import OrganizationRepo
 from app.modules.users.models.userModel import (
     SigninRequest,
     SignupRequest,
     UserUpdateRequest,
 )
 from app.modules.users.repo.userRepo import UserRepo
+from app.modules.users.service.sessionService import SessionService
 
 
+@traced
 class UserService:
     @staticmethod
     async def create_user(user_request: SignupRequest, session: AsyncSession):
@@ -30,6 +33,10 @@ class UserService:
                 detail="Password must be at least 6 characters long",
             )
 
+        # Hash password; bcrypt is slow, so before the transaction starts
+        # rather than while it holds a pooled connection
+        hashed_password = hash_password(user_request.password)
+
         # Check if user already exists
         existing = await UserRepo.get_user_by_email(session, user_request.email)
         if existing:
@@ -38,8 +45,10 @@ class UserService:
                 detail="User already exists",
             )
 
-        # Hash password
-        hashed_password = hash_password(user_request.password)
+        # Every new user starts their own organization
+        organization = await OrganizationRepo.create_organization(
+            session, user_request.organization_name or user_request.name
+        )
 
         # Save user
         user = await UserRepo.create_user(
@@ -48,16 +57,10 @@ class UserService:
             name=user_request.name,
             hashed_password=hashed_password,
             role=user_request.role,
+            org_id=organization.id,
         )
 
-        tokens = JWTHandler.create_tokens(
-            {
-                "user_id": user.id,
-                "user_name": user.name,
-                "user_email": user.email,
-                "role": user.role,
-            }
-        )
+        tokens = await SessionService.start_session(session, user)
 
         return user, tokens
 
@@ -77,15 +80,8 @@ class UserService:
                 detail="Invalid email or password",
             )
 
-        # Create JWT tokens
-        tokens = JWTHandler.create_tokens(
-            {
-                "user_id": user.id,
-                "user_name": user.name,
-                "user_email": user.email,
-                "role": user.role,
-            }
-        )
+        # Create JWT tokens for a new session
+        tokens = await SessionService.start_session(session, user)
 
         return tokens, user
 
@@ -1,45 +1,177 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-import os
-from app.integration.db.postgres import close_postgres_connection, connect_to_postgres
-from app.modules.project.routes.projectRouter import router as projects_router
-from app.modules.sites.routes.siteRouter import router as sites_router
-from app.modules.users.routes.userRouter import router as users_router
 
-app = FastAPI()
+from app.core.config.settings import Settings, get_settings
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Build the app. Routers (and everything they import) are loaded here, and
+    the database engine only in the lifespan, so importing this module is
+    cheap and needs no configuration.
+    `settings` replaces get_settings() for the app's dependencies and its
+    engine/realtime startup; defaults to the process settings.
+    """
+    settings = settings or get_settings()
+
+    from app.core.config.logging_setup import configure_logging
+
+    configure_logging(settings)
+
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.middleware.gzip import GZipMiddleware
+
+    from app.core.middleware.cancel_on_disconnect import CancelOnDisconnectMiddleware
+    from app.core.middleware.request_logging import RequestLoggingMiddleware
+    from app.core.middleware.slow_requests import SlowRequestMiddleware
+    from app.core.middleware.tracing import TracingMiddleware
+    from app.integration.db.postgres import (
+        close_postgres_connection,
+        connect_to_postgres,
+    )
+    from app.integration.realtime.broker import hub
+    from app.modules.project.jobs.reconcileSiteCounters import reconcile_forever
+    from app.modules.project.routes.projectRouter import router as projects_router
+    from app.modules.realtime.routes.realtimeRouter import router as realtime_router
+    from app.modules.search.routes.searchRouter import router as search_router
+    from app.modules.sites.jobs.pruneTombstones import prune_forever
+    from app.modules.sites.routes.siteRouter import router as sites_router
+    from app.modules.users.jobs.syncRevokedSessions import sync_forever
+    from app.modules.users.routes.userRouter import router as users_router
+
+    exporter = None
+    if settings.trace_exporter != "none":
+        from app.core.common.tracing import TraceExporter
+
+        exporter = TraceExporter(
+            "stdout" if settings.trace_exporter == "stdout" else settings.trace_file,
+            settings.trace_service_name,
+        )
+
+    if settings.rate_limit_backend == "postgres":
+        # also registers its table for DB_AUTO_CREATE
+        from app.core.security.rate_limit import set_rate_limit_backend
+        from app.integration.db.rate_limits import PostgresRateLimitBackend
+
+        set_rate_limit_backend(PostgresRateLimitBackend())
+
+    loop_lag = slow_requests = None
+    if settings.profiling_enabled:
+        from app.core.common.profiler import LoopLagMonitor, SlowRequestSampler
+
+        loop_lag = LoopLagMonitor(
+            settings.loop_lag_interval_ms, settings.loop_lag_warn_ms
+        )
+        if settings.slow_request_profile_ms > 0:
+            slow_requests = SlowRequestSampler(
+                settings.slow_request_profile_ms,
+                settings.profile_interval_ms,
+                settings.slow_request_profiles_kept,
+            )
+
+    # Startup & shutdown
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await connect_to_postgres(settings)
+        await hub.start(settings)
+        reconciler = None
+        if settings.site_counter_reconcile_seconds > 0:
+            reconciler = asyncio.create_task(
+                reconcile_forever(settings.site_counter_reconcile_seconds)
+            )
+        pruner = None
+        if settings.site_tombstone_prune_seconds > 0:
+            pruner = asyncio.create_task(
+                prune_forever(settings.site_tombstone_prune_seconds)
+            )
+        # other workers' signouts; this process's own apply immediately
+        revocations = asyncio.create_task(
+            sync_forever(settings.revoked_sessions_sync_seconds)
+        )
+        monitor = asyncio.create_task(loop_lag.run()) if loop_lag else None
+        if slow_requests:
+            slow_requests.start()
+        try:
+            yield
+        finally:
+            if monitor:
+                monitor.cancel()
+            if slow_requests:
+                slow_requests.stop()
+            if reconciler:
+                reconciler.cancel()
+            if pruner:
+                pruner.cancel()
+            revocations.cancel()
+            await hub.stop()
+            await close_postgres_connection()
+            if exporter:
+                exporter.shutdown()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+    app.state.loop_lag = loop_lag
+    app.state.slow_requests = slow_requests
+    app.dependency_overrides[get_settings] = lambda: settings
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Compress responses past a size threshold (small bodies aren't worth the CPU)
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.gzip_minimum_size,
+        compresslevel=settings.gzip_compress_level,
+    )
 
-raw_origins = os.getenv("CORS_ORIGIN", "*")
+    if slow_requests:
+        # inside CancelOnDisconnect, in the task that runs the handler
+        app.add_middleware(SlowRequestMiddleware, sampler=slow_requests)
 
-if raw_origins == "*":
-    allow_origins = ["*"]
-else:
-    allow_origins = [origin.strip() for origin in raw_origins.split(",")]
+    # A client disconnect cancels the handler and its queries
+    app.add_middleware(CancelOnDisconnectMiddleware)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allow_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    if exporter:
+        # inside request logging, so spans carry the request id
+        app.add_middleware(
+            TracingMiddleware,
+            exporter=exporter,
+            sample_rate=settings.trace_sample_rate,
+        )
 
-# Startup & shutdown events
-@app.on_event("startup")
-async def startup_db_client():
-    await connect_to_postgres()
+    # Outermost: request id and access log cover the whole request
+    app.add_middleware(RequestLoggingMiddleware, settings=settings)
 
+    # Register routers
+    app.include_router(projects_router, prefix="/api/v1")
+    app.include_router(users_router, prefix="/api/v1")
+    app.include_router(sites_router, prefix="/api/v1")
+    app.include_router(search_router, prefix="/api/v1")
+    app.include_router(realtime_router)
+    if settings.profiling_enabled:
+        from app.modules.admin.routes.adminRouter import router as admin_router
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    await close_postgres_connection()
+        app.include_router(admin_router, prefix="/api/v1")
 
+    @app.get("/")
+    async def root():
+        return {"message": "Hello, FastAPI with PostgreSQL is running!"}
 
-# Register routers
-app.include_router(projects_router, prefix="/api/v1")
-app.include_router(users_router, prefix="/api/v1")
-app.include_router(sites_router, prefix="/api/v1")
+    return app
 
 
-@app.get("/")
-async def root():
-    return {"message": "Hello, FastAPI with PostgreSQL is running!"}
+def __getattr__(name: str):
+    # `uvicorn main:app` builds the app on first access, not on import
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
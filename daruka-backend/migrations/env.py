@@ -0,0 +1,83 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import async_engine_from_config
+
+# Importing the model modules registers every table on Base.metadata
+import app.integration.db.rate_limits  # noqa: F401
+import app.modules.organizations.models.organizationModel  # noqa: F401
+import app.modules.project.models.projectModel  # noqa: F401
+import app.modules.sites.models.siteModal  # noqa: F401
+import app.modules.users.models.sessionModel  # noqa: F401
+import app.modules.users.models.userModel  # noqa: F401
+from app.integration.db.postgres import Base, database_url
+from app.integration.db.search import has_pg_trgm
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# the URL comes from the environment (.env), never from alembic.ini
+config.set_main_option("sqlalchemy.url", database_url().replace("%", "%%"))
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL to stdout instead of running it."""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    trigram = has_pg_trgm(connection)
+    # end the autobegun transaction, or alembic treats it as an outer one
+    # and never commits the migration
+    connection.commit()
+
+    def include_object(obj, name, type_, reflected, compare_to):
+        # trigram indexes only exist where pg_trgm could be installed
+        return trigram or not (type_ == "index" and obj.info.get("trigram"))
+
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    connectable = async_engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,128 @@
+"""organizations and tenant scoping
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 13:07:47.715968
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# rows that exist before this revision all go to one organization
+DEFAULT_ORG_ID = "ODEFLT"
+
+TENANT_TABLES = (
+    "users",
+    "projects",
+    "sites",
+    "site_analytics_history",
+    "site_tombstones",
+)
+
+# (name, table, columns) of the tenant-leading indexes
+TENANT_INDEXES = (
+    ("ix_users_org_id_id", "users", ["org_id", "id"]),
+    ("ix_projects_org_created_by", "projects", ["org_id", "created_by"]),
+    (
+        "ix_sites_org_project_updated_at",
+        "sites",
+        ["org_id", "project_id", "updated_at"],
+    ),
+    ("ix_sites_org_project_status", "sites", ["org_id", "project_id", "status"]),
+    (
+        "ix_sites_org_project_created_at",
+        "sites",
+        ["org_id", "project_id", "created_at"],
+    ),
+    (
+        "ix_sites_org_created_by_created_at",
+        "sites",
+        ["org_id", "created_by", "created_at"],
+    ),
+    ("ix_sites_org_id_id", "sites", ["org_id", "id"]),
+    (
+        "ix_site_analytics_history_org_site_created_at",
+        "site_analytics_history",
+        ["org_id", "site_id", "created_at"],
+    ),
+    (
+        "ix_site_tombstones_org_project_deleted_at",
+        "site_tombstones",
+        ["org_id", "project_id", "deleted_at"],
+    ),
+)
+
+# the indexes they replace
+PROJECT_INDEXES = (
+    ("ix_sites_project_updated_at", "sites", ["project_id", "updated_at"]),
+    ("ix_sites_project_status", "sites", ["project_id", "status"]),
+    ("ix_sites_project_created_at", "sites", ["project_id", "created_at"]),
+    ("ix_sites_created_by_created_at", "sites", ["created_by", "created_at"]),
+    (
+        "ix_site_tombstones_project_deleted_at",
+        "site_tombstones",
+        ["project_id", "deleted_at"],
+    ),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "organizations",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        sa.text(
+            "INSERT INTO organizations (id, name) VALUES (:id, 'Default organization')"
+        ).bindparams(id=DEFAULT_ORG_ID)
+    )
+
+    for table in TENANT_TABLES:
+        # the constant default backfills existing rows without a table
+        # rewrite; new rows always get an explicit org_id
+        op.add_column(
+            table,
+            sa.Column(
+                "org_id",
+                sa.String(),
+                server_default=DEFAULT_ORG_ID,
+                nullable=False,
+            ),
+        )
+        op.alter_column(table, "org_id", server_default=None)
+        op.create_foreign_key(
+            f"{table}_org_id_fkey", table, "organizations", ["org_id"], ["id"]
+        )
+
+    for name, table, _ in PROJECT_INDEXES:
+        op.drop_index(name, table_name=table)
+    for name, table, columns in TENANT_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in TENANT_INDEXES:
+        op.drop_index(name, table_name=table)
+    for name, table, columns in PROJECT_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+    for table in reversed(TENANT_TABLES):
+        op.drop_constraint(f"{table}_org_id_fkey", table, type_="foreignkey")
+        op.drop_column(table, "org_id")
+    op.drop_table("organizations")
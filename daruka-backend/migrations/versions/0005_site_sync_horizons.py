@@ -0,0 +1,71 @@
+"""site change transaction ids for sync cursors, tombstone pruning index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:02:41.518230
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_XID = sa.text("pg_current_xact_id()::text::bigint")
+
+
+def upgrade() -> None:
+    # existing rows get this migration's transaction id: the next sync of
+    # every client returns them once more, which is harmless
+    for table in ("sites", "site_tombstones"):
+        op.add_column(
+            table,
+            sa.Column(
+                "change_xid",
+                sa.BigInteger(),
+                server_default=CURRENT_XID,
+                nullable=False,
+            ),
+        )
+    op.create_index(
+        "ix_sites_org_project_change_xid",
+        "sites",
+        ["org_id", "project_id", "change_xid"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_site_tombstones_org_project_deleted_at", table_name="site_tombstones"
+    )
+    op.create_index(
+        "ix_site_tombstones_org_project_change_xid",
+        "site_tombstones",
+        ["org_id", "project_id", "change_xid"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_site_tombstones_deleted_at",
+        "site_tombstones",
+        ["deleted_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_site_tombstones_deleted_at", table_name="site_tombstones")
+    op.drop_index(
+        "ix_site_tombstones_org_project_change_xid", table_name="site_tombstones"
+    )
+    op.create_index(
+        "ix_site_tombstones_org_project_deleted_at",
+        "site_tombstones",
+        ["org_id", "project_id", "deleted_at"],
+        unique=False,
+    )
+    op.drop_index("ix_sites_org_project_change_xid", table_name="sites")
+    for table in ("sites", "site_tombstones"):
+        op.drop_column(table, "change_xid")
@@ -0,0 +1,108 @@
+"""
+Startup benchmark: how long until the app can answer its first request.
+
+    python scripts/bench_startup.py --runs 5 --workers 4
+
+Measures, as the median over --runs:
+  import   python -c "import main" (should stay cheap: no routers, no engine)
+  build    main.create_app(): routers, models and their dependencies
+  dev      uvicorn main:app, single process with create_all on startup
+  serve    serve.py --skip-migrations with --workers preforked workers
+
+Needs DATABASE_URL pointing at a migrated database.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_python(code: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, check=True)
+    return time.perf_counter() - started
+
+
+def time_import() -> float:
+    return time_python("import main")
+
+
+def time_build() -> float:
+    return time_python("import main; main.create_app()")
+
+
+def time_first_response(command: list, port: int, timeout: float = 60) -> float:
+    """Seconds from spawning `command` until GET / answers 200."""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        command, cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{command[1]} exited with {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"no response within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark app startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    def dev():
+        port = free_port()
+        return time_first_response(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)], port
+        )
+
+    def serve():
+        port = free_port()
+        command = [
+            sys.executable,
+            "serve.py",
+            "--skip-migrations",
+            "--port",
+            str(port),
+            "--workers",
+            str(args.workers),
+        ]
+        return time_first_response(command, port)
+
+    for name, measure in (
+        ("import", time_import),
+        ("build", time_build),
+        ("dev", dev),
+        ("serve", serve),
+    ):
+        samples = [measure() for _ in range(args.runs)]
+        print(
+            f"{name:<8} median {statistics.median(samples) * 1000:8.1f} ms"
+            f"   min {min(samples) * 1000:8.1f} ms   max {max(samples) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Production entry point: migrate once, then fork the uvicorn workers.
+
+    python serve.py --workers 4
+
+Schema changes run a single time in this parent process (`alembic upgrade
+head`), so workers start without any DDL. The total number of Postgres
+connections the app may hold (DB_CONNECTION_BUDGET) is split evenly across
+workers. Use `uvicorn main:app --reload` for development instead.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+import uvicorn
+
+from app.core.config.logging_setup import configure_logging
+from app.core.config.settings import get_settings
+
+BASE_DIR = Path(__file__).resolve().parent
+
+logger = logging.getLogger("serve")
+
+
+def migrate() -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(str(BASE_DIR / "alembic.ini")), "head")
+
+
+def pool_sizes(budget: int, workers: int, listeners: int) -> tuple:
+    """(pool_size, max_overflow) per worker so all workers stay within budget."""
+    per_worker = budget // workers - listeners
+    if per_worker < 1:
+        raise SystemExit(
+            f"DB_CONNECTION_BUDGET={budget} is too small for {workers} workers"
+        )
+    # keep half warm, let the rest open on demand
+    pool_size = max(1, per_worker // 2)
+    return pool_size, per_worker - pool_size
+
+
+def main() -> None:
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument(
+        "--workers", type=int, default=settings.web_concurrency or os.cpu_count() or 1
+    )
+    parser.add_argument(
+        "--connection-budget",
+        type=int,
+        default=settings.db_connection_budget,
+        help="max Postgres connections across all workers",
+    )
+    parser.add_argument(
+        "--skip-migrations",
+        action="store_true",
+        help="don't run `alembic upgrade head` before starting",
+    )
+    args = parser.parse_args()
+
+    if not args.skip_migrations:
+        migrate()
+    # after alembic, which sets up its own logging
+    configure_logging(settings)
+
+    # the postgres realtime backend holds one extra LISTEN connection per worker
+    listeners = 1 if settings.realtime_backend == "postgres" else 0
+    pool_size, max_overflow = pool_sizes(
+        args.connection_budget, args.workers, listeners
+    )
+
+    # workers inherit the environment of this process, which takes precedence
+    # over .env when they load their settings
+    os.environ["DB_AUTO_CREATE"] = "false"
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    if "route_max_concurrency" not in settings.__fields_set__:
+        # shed load at the route before requests queue for a connection
+        os.environ["ROUTE_MAX_CONCURRENCY"] = str(pool_size + max_overflow)
+
+    logger.info(
+        "%d workers, %d+%d DB connections each (budget %d)",
+        args.workers,
+        pool_size,
+        max_overflow,
+        args.connection_budget,
+    )
+
+    sys.path.insert(0, str(BASE_DIR))
+    uvicorn.run(
+        "main:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="uvloop",
+        http="httptools",
+        proxy_headers=True,
+        forwarded_allow_ips=settings.forwarded_allow_ips,
+        timeout_keep_alive=settings.keep_alive_seconds,
+        timeout_graceful_shutdown=settings.graceful_shutdown_seconds,
+        # RequestLoggingMiddleware writes the access log
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import asyncio
+import itertools
+import os
+
+import pytest
+
+# Tests that need Postgres run against this database and are skipped
+# without it. Use a throwaway database: its tables are created on first use
+# and the tests leave their rows behind.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# a client address per api() client, so rate limits don't carry over
+_client_hosts = (f"10.0.{n // 256}.{n % 256}" for n in itertools.count(1))
+
+
+@pytest.fixture
+def test_settings():
+    from app.core.config.settings import Settings
+
+    # enough connections for the concurrency tests
+    return Settings(
+        app_env="test",
+        database_url=TEST_DATABASE_URL,
+        db_pool_size=10,
+        db_max_overflow=0,
+    )
+
+
+@pytest.fixture
+def db(test_settings):
+    """
+    `db(fn)` runs `await fn()` with this process's engine connected to the
+    test database and disposed of afterwards, in a fresh event loop.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+
+    # every model, so connect_to_postgres creates all the tables
+    import app.integration.db.rate_limits  # noqa: F401
+    import app.modules.organizations.models.organizationModel  # noqa: F401
+    import app.modules.project.models.projectModel  # noqa: F401
+    import app.modules.sites.models.siteModal  # noqa: F401
+    import app.modules.users.models.sessionModel  # noqa: F401
+    import app.modules.users.models.userModel  # noqa: F401
+    from app.integration.db.postgres import (
+        close_postgres_connection,
+        connect_to_postgres,
+    )
+
+    def run(fn):
+        async def main():
+            await connect_to_postgres(test_settings)
+            try:
+                return await fn()
+            finally:
+                await close_postgres_connection()
+
+        return asyncio.run(main())
+
+    return run
+
+
+async def _seed_project():
+    from app.core.common.id_generator import (
+        generate_org_id,
+        generate_project_id,
+        generate_user_id,
+    )
+    from app.integration.db.postgres import unit_of_work
+    from app.modules.organizations.models.organizationModel import Organization
+    from app.modules.project.models.projectModel import Project
+    from app.modules.users.models.userModel import User
+
+    org_id, user_id, p_id = generate_org_id(), generate_user_id(), generate_project_id()
+    async with unit_of_work() as session:
+        session.add(Organization(id=org_id, name="Test organization"))
+        await session.flush()
+        session.add(
+            User(
+                id=user_id,
+                org_id=org_id,
+                email=f"{user_id}@example.com",
+                name="Test user",
+                hashed_password="-",
+            )
+        )
+        await session.flush()
+        session.add(
+            Project(p_id=p_id, org_id=org_id, name="Test project", created_by=user_id)
+        )
+    return org_id, user_id, p_id
+
+
+@pytest.fixture
+def seed_project():
+    """`await seed_project()` -> (org_id, user_id, p_id) of a new project"""
+    return _seed_project
+
+
+@pytest.fixture
+def api(test_settings):
+    """
+    `api(**settings)` -> httpx client calling the app in process. Its
+    lifespan isn't run: use it inside `db(fn)`, which connects the engine.
+    """
+    import httpx
+
+    from main import create_app
+
+    def client(**overrides):
+        app = create_app(test_settings.copy(update=overrides))
+        transport = httpx.ASGITransport(app=app, client=(next(_client_hosts), 1234))
+        return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+    return client
+
+
+@pytest.fixture
+def bearer():
+    """`bearer(org_id, user_id)` -> Authorization header for that user"""
+    from app.core.common.id_generator import generate_token_id
+    from app.integration.jwt.jwt_handler import JWTHandler
+
+    def headers(org_id, user_id):
+        tokens = JWTHandler.create_tokens(
+            {"user_id": user_id, "org_id": org_id, "role": "user"},
+            generate_token_id(),
+            generate_token_id(),
+        )
+        return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    return headers
@@ -0,0 +1,29 @@
+from app.core.common.id_generator import generate_user_id
+
+
+def test_self_registered_admin_is_refused(db, api):
+    async def check():
+        email = f"{generate_user_id().lower()}@example.com"
+        signup = {
+            "email": email,
+            "name": "Mallory",
+            "password": "hunter22",
+            "role": "admin",
+        }
+        async with api(profiling_enabled=True, slow_request_profile_ms=0) as client:
+            response = await client.post("/api/v1/users/signup", json=signup)
+            token = response.json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            refused = await client.get("/api/v1/admin/loop-lag", headers=headers)
+
+        user_id = response.json()["user"]["id"]
+        async with api(
+            profiling_enabled=True, slow_request_profile_ms=0, admin_user_ids=user_id
+        ) as client:
+            allowed = await client.get("/api/v1/admin/loop-lag", headers=headers)
+        return response, refused, allowed
+
+    signup, refused, allowed = db(check)
+    assert signup.status_code == 201 and signup.json()["user"]["role"] == "admin"
+    assert refused.status_code == 403
+    assert allowed.status_code == 200
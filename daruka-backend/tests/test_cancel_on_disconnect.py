@@ -0,0 +1,49 @@
+import asyncio
+
+from app.core.middleware.cancel_on_disconnect import CancelOnDisconnectMiddleware
+
+SCOPE = {"type": "http", "method": "POST", "path": "/"}
+
+
+def run(app, disconnect_after: float):
+    """Serve one request whose client disconnects after `disconnect_after` s"""
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message["type"])
+
+    async def main():
+        await CancelOnDisconnectMiddleware(app)(SCOPE, receive, send)
+
+    asyncio.run(main())
+    return sent
+
+
+def test_disconnect_before_the_response_cancels_the_handler():
+    finished = []
+
+    async def app(scope, receive, send):
+        await asyncio.sleep(1)
+        finished.append(True)
+
+    assert run(app, disconnect_after=0.01) == []
+    assert not finished
+
+
+def test_disconnect_after_the_response_lets_the_handler_finish():
+    finished = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+        # work after the response, e.g. background tasks
+        await asyncio.sleep(0.05)
+        finished.append(True)
+
+    sent = run(app, disconnect_after=0.01)
+    assert sent == ["http.response.start", "http.response.body"]
+    assert finished
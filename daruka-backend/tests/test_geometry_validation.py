@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.core.config.settings import Settings
+from app.core.geo.validation import GeometryError, clean_outline
+
+
+def circle(vertices: int) -> np.ndarray:
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    return np.column_stack([77 + 0.01 * np.cos(angles), 28 + 0.01 * np.sin(angles)])
+
+
+def test_outline_is_simplified_to_the_cap():
+    coords, repairs = clean_outline(circle(500), max_vertices=50)
+    assert 3 <= len(coords) <= 50
+    assert any(r.startswith("simplified") for r in repairs)
+
+
+def test_unreachable_cap_stops_at_a_triangle():
+    # a ring can't go below 3 vertices; this used to loop forever
+    coords, _ = clean_outline(circle(100), max_vertices=1)
+    assert len(coords) >= 3
+
+
+def test_vertex_cap_must_allow_a_triangle():
+    with pytest.raises(ValidationError):
+        Settings(max_site_vertices=2)
+    assert Settings(max_site_vertices=3).max_site_vertices == 3
+
+
+def test_degenerate_outline_is_rejected():
+    with pytest.raises(GeometryError):
+        clean_outline(np.array([[77.0, 28.0], [77.1, 28.0], [77.0, 28.0]]))
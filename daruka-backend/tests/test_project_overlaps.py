@@ -0,0 +1,19 @@
+def test_overlaps_of_a_missing_or_foreign_project_is_404(db, api, seed_project, bearer):
+    async def check():
+        org_id, user_id, p_id = await seed_project()
+        other_org, other_user, other_p_id = await seed_project()
+        headers = bearer(org_id, user_id)
+        async with api() as client:
+            own = await client.get(f"/api/v1/projects/{p_id}/overlaps", headers=headers)
+            missing = await client.get(
+                "/api/v1/projects/PNONE/overlaps", headers=headers
+            )
+            foreign = await client.get(
+                f"/api/v1/projects/{other_p_id}/overlaps", headers=headers
+            )
+        return own, missing, foreign
+
+    own, missing, foreign = db(check)
+    assert own.status_code == 200 and own.json()["data"]["count"] == 0
+    assert missing.status_code == 404
+    assert foreign.status_code == 404
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.core.common.cursor import encode_cursor
+from app.integration.db.postgres import new_session, unit_of_work
+from app.modules.project.service.projectService import ProjectService
+from app.modules.sites.jobs.pruneTombstones import prune_once
+from app.modules.sites.models.siteModal import SiteTombstone
+from app.modules.sites.repo.siteRepo import SiteRepo
+
+
+async def add_site(session, org_id, user_id, p_id, name):
+    site = await SiteRepo.create_site(
+        session, name=name, project_id=p_id, created_by=user_id, org_id=org_id
+    )
+    return site.id
+
+
+async def changes(p_id, cursor=None):
+    async with new_session() as session:
+        data = await ProjectService.get_changes(session, p_id, cursor)
+    if data is None:
+        return None
+    return {
+        "sites": {s.id for s in data["sites"]},
+        "deleted": {t.site_id for t in data["deleted"]},
+        "full": data["full"],
+        "cursor": data["cursor"],
+    }
+
+
+def test_change_committed_after_the_cursor_is_not_skipped(db, seed_project):
+    async def check():
+        org_id, user_id, p_id = await seed_project()
+        first = await changes(p_id)
+
+        # a slow transaction writes before the next sync and commits after it
+        async with new_session() as slow:
+            slow_id = await add_site(slow, org_id, user_id, p_id, "Slow")
+            async with unit_of_work() as fast:
+                fast_id = await add_site(fast, org_id, user_id, p_id, "Fast")
+            second = await changes(p_id, first["cursor"])
+            await slow.commit()
+
+        third = await changes(p_id, second["cursor"])
+        return first, second, third, slow_id, fast_id
+
+    first, second, third, slow_id, fast_id = db(check)
+    assert first["full"] and not first["sites"]
+    assert second["sites"] == {fast_id} and not second["full"]
+    assert slow_id in third["sites"]
+
+
+def test_deletes_are_synced_and_pruned(db, seed_project):
+    async def check():
+        org_id, user_id, p_id = await seed_project()
+        async with unit_of_work() as session:
+            site_id = await add_site(session, org_id, user_id, p_id, "Doomed")
+        cursor = (await changes(p_id))["cursor"]
+        async with unit_of_work() as session:
+            await SiteRepo.delete_site(session, site_id)
+        synced = await changes(p_id, cursor)
+
+        async with unit_of_work() as session:
+            await session.execute(
+                update(SiteTombstone)
+                .where(SiteTombstone.site_id == site_id)
+                .values(deleted_at=datetime.now(timezone.utc) - timedelta(days=365))
+            )
+        await prune_once()
+        async with new_session() as session:
+            left = await session.get(SiteTombstone, site_id)
+        return site_id, synced, left
+
+    site_id, synced, left = db(check)
+    assert synced["deleted"] == {site_id}
+    assert left is None
+
+
+def test_expired_cursor_gets_a_full_sync(db, seed_project):
+    async def check():
+        org_id, user_id, p_id = await seed_project()
+        async with unit_of_work() as session:
+            site_id = await add_site(session, org_id, user_id, p_id, "Kept")
+        issued = datetime.now(timezone.utc) - timedelta(days=365)
+        return site_id, await changes(p_id, encode_cursor(0, int(issued.timestamp())))
+
+    site_id, synced = db(check)
+    assert synced["full"] and synced["sites"] == {site_id}
+
+
+def test_missing_project_and_bad_cursor(db):
+    assert db(lambda: changes("prj_missing")) is None
+    with pytest.raises(ValueError):
+        db(lambda: changes("prj_missing", "not-a-cursor"))
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.core.security.rate_limit import InMemoryRateLimitBackend, RateLimitBackend
+
+
+async def take(backend, key, count, rate=1.0, burst=3):
+    return [await backend.consume(key, rate, burst) for _ in range(count)]
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+
+def test_memory_bucket_allows_the_burst_then_limits():
+    waits = asyncio.run(take(InMemoryRateLimitBackend(), "k", 4))
+    assert waits[:3] == [0, 0, 0]
+    assert 0 < waits[3] <= 1
+
+
+def test_postgres_buckets_are_shared_across_workers(db):
+    from app.integration.db.rate_limits import PostgresRateLimitBackend
+
+    async def check():
+        # two processes' backends, one caller
+        first, second = PostgresRateLimitBackend(), PostgresRateLimitBackend()
+        key = f"test|{id(first)}"
+        waits = await take(first, key, 2) + await take(second, key, 2)
+        # fast refill: a token is back after 50ms
+        other = f"{key}|fast"
+        await take(first, other, 3, rate=20)
+        limited = await second.consume(other, 20, 3)
+        await asyncio.sleep(limited)
+        return waits, limited, await first.consume(other, 20, 3)
+
+    waits, limited, refilled = db(check)
+    assert waits[:3] == [0, 0, 0]
+    assert 0 < waits[3] <= 1
+    assert 0 < limited <= 0.05
+    assert refilled == 0
@@ -0,0 +1,61 @@
+import asyncio
+
+from sqlalchemy import text
+
+from app.integration.db.postgres import get_engine
+from app.integration.realtime.broker import RealtimeHub
+
+
+def event(site_id: str):
+    return {"type": "site.updated", "project_id": "p1", "site_id": site_id}
+
+
+async def received(subscription, count: int):
+    """Site ids of the next `count` events (resyncs reported as "resync")"""
+    seen = []
+    while len(seen) < count:
+        batch = await asyncio.wait_for(subscription.next_batch(), 5)
+        seen.extend(e.get("site_id") or e["type"] for e in batch)
+    return seen
+
+
+def test_concurrent_publishes_are_all_delivered(db, test_settings):
+    settings = test_settings.copy(update={"realtime_backend": "postgres"})
+
+    async def check():
+        hub = RealtimeHub()
+        await hub.start(settings)
+        try:
+            subscription = hub.subscribe("p1")
+            site_ids = [f"s{i}" for i in range(20)]
+            await asyncio.gather(*(hub.publish(event(i)) for i in site_ids))
+            return sorted(await received(subscription, 20)) == sorted(site_ids)
+        finally:
+            await hub.stop()
+
+    assert db(check)
+
+
+def test_listener_reconnects_after_connection_loss(db, test_settings, monkeypatch):
+    monkeypatch.setattr("app.integration.realtime.broker.RECONNECT_MIN_SECONDS", 0.05)
+    settings = test_settings.copy(update={"realtime_backend": "postgres"})
+
+    async def check():
+        hub = RealtimeHub()
+        await hub.start(settings)
+        try:
+            subscription = hub.subscribe("p1")
+            lost = hub._listener
+            async with get_engine().connect() as connection:
+                await connection.execute(
+                    text("SELECT pg_terminate_backend(:pid)"),
+                    {"pid": lost.get_server_pid()},
+                )
+            # clients are told to resync, then get events again
+            first = await received(subscription, 1)
+            await hub.publish(event("s1"))
+            return hub._listener is not lost, first + await received(subscription, 1)
+        finally:
+            await hub.stop()
+
+    assert db(check) == (True, ["resync", "s1"])
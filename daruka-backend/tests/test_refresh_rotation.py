@@ -0,0 +1,68 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app.integration.db.postgres import new_session, unit_of_work
+from app.modules.users.models.sessionModel import RefreshTokenFamily
+from app.modules.users.models.userModel import User
+from app.modules.users.service.sessionService import SessionService
+
+
+async def sign_in(user_id):
+    """Refresh token of a new session for the user"""
+    async with unit_of_work() as session:
+        user = await session.get(User, user_id)
+        tokens = await SessionService.start_session(session, user)
+    return tokens["refresh_token"]
+
+
+async def family_of(user_id):
+    async with new_session() as session:
+        result = await session.execute(
+            select(RefreshTokenFamily).where(RefreshTokenFamily.user_id == user_id)
+        )
+        return result.scalar_one()
+
+
+def refresh(client, token):
+    return client.post("/api/v1/users/refresh", json={"refresh_token": token})
+
+
+def test_rotated_token_works_once_and_replay_revokes(db, api, seed_project):
+    async def check():
+        _, user_id, _ = await seed_project()
+        first = await sign_in(user_id)
+        async with api() as client:
+            rotated = await refresh(client, first)
+            second = rotated.json()["refresh_token"]
+            again = await refresh(client, second)
+            third = again.json()["refresh_token"]
+            # the stolen (already rotated) token comes back
+            replayed = await refresh(client, second)
+            # the 401 rolled the request back; the revocation must stay
+            latest = await refresh(client, third)
+            me = await client.get(
+                "/api/v1/users/me",
+                headers={"Authorization": f"Bearer {again.json()['access_token']}"},
+            )
+        return rotated, again, replayed, latest, me, await family_of(user_id)
+
+    rotated, again, replayed, latest, me, family = db(check)
+    assert rotated.status_code == 200 and again.status_code == 200
+    assert replayed.status_code == 401
+    assert latest.status_code == 401
+    assert me.status_code == 401
+    assert family.revoked_at is not None and family.revoked_reason == "reuse"
+
+
+def test_concurrent_refreshes_with_one_token_let_one_through(db, api, seed_project):
+    async def check():
+        _, user_id, _ = await seed_project()
+        token = await sign_in(user_id)
+        async with api() as client:
+            responses = await asyncio.gather(
+                refresh(client, token), refresh(client, token)
+            )
+        return sorted(r.status_code for r in responses)
+
+    assert db(check) == [200, 401]
@@ -0,0 +1,54 @@
+import asyncio
+
+from sqlalchemy import text
+
+from app.integration.db.postgres import new_session, unit_of_work
+from app.integration.db.tenancy import tenant_scope
+from app.modules.project.repo.projectRepo import ProjectRepo
+from app.modules.sites.repo.siteRepo import SiteRepo
+
+CONCURRENT_SITES = 12
+
+
+async def create_site(org_id: str, user_id: str, p_id: str, n: int):
+    with tenant_scope(org_id):
+        async with unit_of_work() as session:
+            # fail instead of waiting if anything blocks on a row lock
+            await session.execute(text("SET LOCAL lock_timeout = '2s'"))
+            await SiteRepo.create_site(
+                session,
+                name=f"Site {n}",
+                project_id=p_id,
+                created_by=user_id,
+                status="active" if n % 2 else "inactive",
+                area=1.5,
+            )
+
+
+def test_concurrent_site_creation_does_not_lock_the_project_row(db, seed_project):
+    async def check():
+        org_id, user_id, p_id = await seed_project()
+        async with new_session() as holder:
+            # the lock an UPDATE of the project row (the old counter) takes;
+            # site inserts only need the FK's KEY SHARE lock, which is
+            # compatible with it
+            await holder.execute(
+                text("SELECT 1 FROM projects WHERE p_id = :p_id FOR NO KEY UPDATE"),
+                {"p_id": p_id},
+            )
+            await asyncio.gather(
+                *(
+                    create_site(org_id, user_id, p_id, n)
+                    for n in range(CONCURRENT_SITES)
+                )
+            )
+            await holder.rollback()
+
+        async with new_session() as session:
+            return (await ProjectRepo.get_site_stats(session, [p_id]))[p_id]
+
+    stats = db(check)
+    assert stats["sites_total"] == CONCURRENT_SITES
+    assert stats["active_sites"] == CONCURRENT_SITES // 2
+    assert stats["inactive_sites"] == CONCURRENT_SITES // 2
+    assert stats["area_total"] == 1.5 * CONCURRENT_SITES
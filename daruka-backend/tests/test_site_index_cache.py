@@ -0,0 +1,50 @@
+from app.integration.db.postgres import commit, new_session, rollback, unit_of_work
+from app.modules.sites.repo.siteRepo import SiteRepo
+from app.modules.sites.service import siteService
+from app.modules.sites.service.siteService import SiteService
+
+SQUARE = [
+    {"lat": 28.0, "lon": 77.0},
+    {"lat": 28.0, "lon": 77.001},
+    {"lat": 28.001, "lon": 77.001},
+    {"lat": 28.001, "lon": 77.0},
+]
+
+
+async def add_site(session, org_id, user_id, p_id, name):
+    site = await SiteRepo.create_site(
+        session,
+        name=name,
+        project_id=p_id,
+        created_by=user_id,
+        org_id=org_id,
+        geolocation=SQUARE,
+    )
+    return site.id
+
+
+def cached(p_id):
+    return siteService._site_indexes.get(None, {}).get(p_id)
+
+
+def test_index_with_uncommitted_sites_is_not_cached(db, seed_project):
+    async def check():
+        org_id, user_id, p_id = await seed_project()
+        async with unit_of_work() as session:
+            kept = await add_site(session, org_id, user_id, p_id, "Kept")
+        async with new_session() as session:
+            await SiteService.project_index(session, p_id)
+            await commit(session)
+        committed = cached(p_id)
+
+        # built (incrementally) around a site that is then rolled back
+        async with new_session() as session:
+            dropped = await add_site(session, org_id, user_id, p_id, "Dropped")
+            seen = await SiteService.project_index(session, p_id)
+            await rollback(session)
+        return kept, dropped, committed, seen, cached(p_id)
+
+    kept, dropped, committed, seen, after = db(check)
+    assert dropped in seen.pending
+    assert after is committed
+    assert set(after.ids) == {kept} and not after.pending
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.integration.db.postgres import new_session, unit_of_work
+from app.modules.organizations.models.organizationModel import Organization
+from app.modules.project.models.projectModel import Project
+from app.modules.sites.models.siteModal import Site
+from app.modules.sites.repo.siteRepo import SiteRepo
+from app.modules.users.models.userModel import User
+
+ORG_ID = "org_plan"
+PROJECTS, USERS, SITES = 50, 50, 5000
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# a value for every whitelisted ?filter=
+FILTER_VALUES = {
+    "project_id": "prj_plan_0",
+    "created_by": "usr_plan_0",
+    "status": "inactive",
+    "site_type": "farm",
+    "min_area": 1.0,
+    "max_area": 5.0,
+    "created_after": EPOCH + timedelta(days=SITES - 50),
+}
+# filters that have a column of their own in the scope's composite index
+INDEXED = {
+    ("project_id", "status"): "status",
+    ("project_id", "created_after"): "created_at",
+    ("created_by", "created_after"): "created_at",
+}
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def seed_sites():
+    """One tenant with enough sites for the planner's estimates to matter"""
+    async with unit_of_work() as session:
+        if await session.get(Organization, ORG_ID):
+            return
+        await session.execute(insert(Organization).values(id=ORG_ID, name="Plans"))
+        await session.execute(
+            insert(User),
+            [
+                dict(
+                    id=f"usr_plan_{i}",
+                    org_id=ORG_ID,
+                    email=f"plan{i}@example.com",
+                    name="Planner",
+                    hashed_password="-",
+                )
+                for i in range(USERS)
+            ],
+        )
+        await session.execute(
+            insert(Project),
+            [
+                dict(
+                    p_id=f"prj_plan_{i}",
+                    org_id=ORG_ID,
+                    name="Plans",
+                    created_by=f"usr_plan_{i}",
+                )
+                for i in range(PROJECTS)
+            ],
+        )
+        await session.execute(
+            insert(Site),
+            [
+                dict(
+                    id=f"sit_plan_{i}",
+                    org_id=ORG_ID,
+                    project_id=f"prj_plan_{i % PROJECTS}",
+                    created_by=f"usr_plan_{i % USERS}",
+                    name=f"Site {i}",
+                    site_type="farm" if i % 3 else "forest",
+                    area=float(i % 10),
+                    status="inactive" if i % 10 == 0 else "active",
+                    created_at=EPOCH + timedelta(days=i),
+                )
+                for i in range(SITES)
+            ],
+        )
+        await session.flush()
+        await session.execute(text("ANALYZE sites"))
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+async def sites_scans(filters):
+    """(node type, index name, index condition) of the scans of sites"""
+    await seed_sites()
+    # with the tenant predicate every request query carries (TenantScoped)
+    query = SiteRepo.query_sites_statement(filters, sort=[("created_at", True)])
+    query = query.where(Site.org_id == ORG_ID)
+    async with new_session() as session:
+        # at this size a full scan can still be cheaper; we want the index
+        # the planner would pick once a table no longer fits that
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        result = await session.execute(Explain(query))
+        plan = result.scalar()[0]["Plan"]
+        await session.rollback()
+    return [
+        (node["Node Type"], node.get("Index Name"), node.get("Index Cond", ""))
+        for node in plan_nodes(plan)
+        if node.get("Relation Name") == "sites"
+        or node.get("Index Name", "").startswith("ix_sites_")
+    ]
+
+
+def test_filters_are_whitelisted_with_a_value():
+    assert set(FILTER_VALUES) == set(SiteRepo.FILTERS)
+
+
+@pytest.mark.parametrize("scope", SiteRepo.SCOPES)
+@pytest.mark.parametrize("name", sorted(SiteRepo.FILTERS))
+def test_filter_is_served_by_an_index(db, scope, name):
+    filters = {scope: FILTER_VALUES[scope], name: FILTER_VALUES[name]}
+    scans = db(lambda: sites_scans(filters))
+
+    assert "Seq Scan" not in {node for node, _, _ in scans}, scans
+    # the index narrows to the scope (and the filter, where it has a column)
+    conditions = " ".join(condition for _, _, condition in scans)
+    assert any(s in conditions for s in filters if s in SiteRepo.SCOPES), scans
+    if (scope, name) in INDEXED:
+        assert INDEXED[scope, name] in conditions, scans
@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# only loaded once outlines are actually handled
+HEAVY_MODULES = ("numpy", "shapely", "app.core.geo")
+
+PROBE = """
+import json, sys
+import main
+{build}
+postgres = sys.modules.get("app.integration.db.postgres")
+print(json.dumps({{
+    "modules": [m for m in {heavy!r} if m in sys.modules],
+    "engine": bool(postgres and postgres._engine is not None),
+}}))
+"""
+
+
+def probe(build: str = ""):
+    """Modules loaded and whether an engine exists, in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(build=build, heavy=HEAVY_MODULES)],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_importing_main_is_cheap():
+    assert probe() == {"modules": [], "engine": False}
+
+
+def test_building_the_app_loads_no_geometry_stack_or_engine():
+    assert probe("main.create_app()") == {"modules": [], "engine": False}
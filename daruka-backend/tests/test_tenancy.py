@@ -0,0 +1,124 @@
+from sqlalchemy import select
+
+from app.integration.db.postgres import new_session
+from app.integration.db.tenancy import tenant_scope
+from app.modules.project.models.projectModel import Project
+from app.modules.sites.models.siteModal import Site
+
+
+def succeeded(response) -> bool:
+    return response.status_code < 300 and response.json()["success"]
+
+
+async def row(model, key):
+    """The row as stored, whichever tenant owns it"""
+    async with new_session() as session:
+        result = await session.execute(
+            select(model)
+            .where(model.__mapper__.primary_key[0] == key)
+            .execution_options(all_tenants=True)
+        )
+        return result.scalar_one_or_none()
+
+
+def test_other_tenants_sites_and_projects_are_out_of_reach(
+    db, api, seed_project, bearer
+):
+    async def check():
+        a_org, a_user, a_p_id = await seed_project()
+        b_org, b_user, b_p_id = await seed_project()
+        a, b = bearer(a_org, a_user), bearer(b_org, b_user)
+        async with api() as client:
+            created = await client.post(
+                "/api/v1/sites/",
+                json={"name": "Beta field", "project_id": b_p_id},
+                headers=b,
+            )
+            site_id = created.json()["data"]["site"]["id"]
+
+            refused = {}
+            for method, url, body in [
+                ("GET", f"/api/v1/sites/{site_id}", None),
+                ("PUT", f"/api/v1/sites/{site_id}", {"name": "Hijacked"}),
+                ("DELETE", f"/api/v1/sites/{site_id}", None),
+                ("POST", "/api/v1/sites/", {"name": "Planted", "project_id": b_p_id}),
+                ("GET", f"/api/v1/projects/{b_p_id}", None),
+                ("PUT", f"/api/v1/projects/{b_p_id}", {"name": "Hijacked"}),
+                ("DELETE", f"/api/v1/projects/{b_p_id}", None),
+            ]:
+                response = await client.request(method, url, json=body, headers=a)
+                refused[f"{method} {url}"] = not succeeded(response)
+
+            listed = [
+                (await client.get(url, headers=a)).json()["data"]
+                for url in (
+                    f"/api/v1/sites/?project_id={b_p_id}",
+                    f"/api/v1/sites/project/{b_p_id}",
+                    f"/api/v1/sites/user/{b_user}",
+                    "/api/v1/sites/all",
+                    "/api/v1/search/?q=Beta",
+                )
+            ]
+            projects = (await client.get("/api/v1/projects/", headers=a)).json()
+
+        site, project = await row(Site, site_id), await row(Project, b_p_id)
+        async with new_session() as session:
+            result = await session.execute(
+                select(Site.id)
+                .where(Site.project_id == b_p_id)
+                .execution_options(all_tenants=True)
+            )
+            b_sites = result.scalars().all()
+        return refused, listed, projects, site, project, b_sites, a_p_id
+
+    refused, listed, projects, site, project, b_sites, a_p_id = db(check)
+    assert all(refused.values()), refused
+    assert listed[:4] == [{"sites": []}] * 4
+    assert listed[4]["results"] == []
+    assert [p["p_id"] for p in projects["data"]["projects"]] == [a_p_id]
+    assert site.name == "Beta field"
+    assert project is not None and project.name == "Test project"
+    assert b_sites == [site.id]
+
+
+def test_new_rows_belong_to_the_callers_tenant(db, api, seed_project, bearer):
+    async def check():
+        org_id, user_id, p_id = await seed_project()
+        other_org, _, _ = await seed_project()
+        async with api() as client:
+            headers = bearer(org_id, user_id)
+            project = await client.post(
+                "/api/v1/projects/", json={"name": "Alpha project"}, headers=headers
+            )
+            site = await client.post(
+                "/api/v1/sites/",
+                # an org_id in the body is ignored: it isn't in the schema
+                json={"name": "Alpha field", "project_id": p_id, "org_id": other_org},
+                headers=headers,
+            )
+        new_p_id = project.json()["data"]["project"]["p_id"]
+        site_id = site.json()["data"]["site"]["id"]
+        return org_id, await row(Project, new_p_id), await row(Site, site_id)
+
+    org_id, project, site = db(check)
+    assert project.org_id == org_id
+    assert site.org_id == org_id
+
+
+def test_only_all_tenants_reads_across_tenants(db, seed_project):
+    async def check():
+        a_org, _, _ = await seed_project()
+        b_org, _, b_p_id = await seed_project()
+        query = select(Project).where(Project.p_id == b_p_id)
+        with tenant_scope(a_org):
+            async with new_session() as session:
+                scoped = (await session.execute(query)).scalar_one_or_none()
+                got = await session.get(Project, b_p_id)
+                unscoped = (
+                    await session.execute(query.execution_options(all_tenants=True))
+                ).scalar_one_or_none()
+        return scoped, got, unscoped, b_org
+
+    scoped, got, unscoped, b_org = db(check)
+    assert scoped is None and got is None
+    assert unscoped is not None and unscoped.org_id == b_org
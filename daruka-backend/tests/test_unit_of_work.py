@@ -0,0 +1,77 @@
+from sqlalchemy import text
+
+from app.core.common.id_generator import generate_org_id
+from app.core.common.request_context import TimedRoute
+from app.integration.db.postgres import (
+    close_postgres_connection,
+    connect_to_postgres,
+    db_session,
+    get_engine,
+    new_session,
+)
+from app.modules.organizations.models.organizationModel import Organization
+from app.modules.sites.models.siteSchemas import ApiResponse
+
+
+async def call_route(settings, success: bool) -> str:
+    """
+    Insert an organization in a route endpoint that reports `success`, the
+    way TimedRoute and the db_session dependency run it; returns its id.
+    """
+    org_id = generate_org_id()
+    dependency = db_session()(settings)
+    session = await dependency.__anext__()
+
+    async def endpoint():
+        session.add(Organization(id=org_id, name="Unit of work"))
+        await session.flush()
+        return ApiResponse(success=success, message="done")
+
+    await TimedRoute("/", endpoint).endpoint()
+    try:
+        await dependency.__anext__()
+    except StopAsyncIteration:
+        pass
+    return org_id
+
+
+async def stored(org_id: str) -> bool:
+    async with new_session() as session:
+        return await session.get(Organization, org_id) is not None
+
+
+def test_successful_response_commits(db, test_settings):
+    async def check():
+        return await stored(await call_route(test_settings, success=True))
+
+    assert db(check)
+
+
+def test_failed_response_rolls_back(db, test_settings):
+    # controllers catch errors and return success=False; whatever was
+    # flushed before the failure must not be committed
+    async def check():
+        return await stored(await call_route(test_settings, success=False))
+
+    assert not db(check)
+
+
+def test_pooler_gets_the_statement_timeout_per_transaction(db, test_settings):
+    pooled = test_settings.copy(
+        update={"db_pooler": True, "db_statement_timeout_ms": 1234}
+    )
+
+    async def check():
+        await close_postgres_connection()
+        await connect_to_postgres(pooled)
+        show = text("SHOW statement_timeout")
+        # not a startup parameter: the pooler would reject it
+        async with get_engine().connect() as connection:
+            startup = (await connection.execute(show)).scalar_one()
+        async with new_session() as session:
+            in_session = (await session.execute(show)).scalar_one()
+        return startup, in_session
+
+    startup, in_session = db(check)
+    assert startup == "0"
+    assert in_session == "1234ms"
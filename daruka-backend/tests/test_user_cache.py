@@ -0,0 +1,20 @@
+from app.integration.db.postgres import new_session, unit_of_work
+from app.modules.users.repo.userCache import user_cache
+from app.modules.users.repo.userRepo import UserRepo
+
+
+def test_update_drops_the_email_entry_without_the_id_one(db, seed_project):
+    async def check():
+        _, user_id, _ = await seed_project()
+        async with new_session() as session:
+            email = (await UserRepo.get_user_by_id(session, user_id)).email
+            # cached under both keys; then the id entry alone is evicted
+            await UserRepo.get_user_by_email(session, email)
+        user_cache()._entries.pop(("id", user_id))
+
+        async with unit_of_work() as session:
+            await UserRepo.update_user(session, user_id, name="Renamed")
+        async with new_session() as session:
+            return (await UserRepo.get_user_by_email(session, email)).name
+
+    assert db(check) == "Renamed"